@@ -0,0 +1,447 @@
+"""
+Adaptive question selection for estimating ideological coordinates with fewer questions.
+
+`get_ideological_coordinates` scores an axis as
+    10 * sum(clarity-weighted points) / sum(max_abs_points)
+over the axis's mapped questions. `AdaptiveSession` estimates that value from a
+subset of the questions and asks the next most informative one until the
+interval for every axis is narrower than a tolerance.
+
+Model, per axis: a question's points y_i are predicted as m_i + s_i * b,
+where b is the model's lean on the axis. The mean m_i, slope s_i and residual
+variance v_i are fitted on past sessions and shrunk toward the question's own
+point scale (its mean, max_abs_points and variance) when history is thin;
+without history they are the scale's. The lean b is estimated from the
+questions asked so far by weighted least squares, with the spread of past
+sessions' leans as its prior. The axis total is the observed points plus the
+predicted points of the questions not yet asked. Its variance is the unasked
+questions' residual variance plus the uncertainty in b. Once every question
+is asked, the estimate equals the full-run coordinate exactly.
+
+The next question is taken from the axis with the widest interval: the
+unasked question there with the largest predictive variance. Selection
+stops when every axis interval half-width is at most the tolerance and at
+least MIN_QUESTIONS_PER_AXIS of its questions have been asked.
+
+Replay mode checks this offline on historical sessions: each session is
+replayed with history built from the other sessions, its recorded answers
+stand in for the model and raters, and the adaptive coordinates are compared
+against the full-run result.
+
+Usage:
+    python tools/adaptive_selection.py replay results/ [--tolerance 1.0] [--output replay.json]
+    python tools/adaptive_selection.py next partial_session.jsonl --history results/ [--count 5]
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+
+from data_snapshot import load_snapshot
+from ideology_scorer import AXES, get_ideological_coordinates, normalize_axis_score, score_mapped_response
+from profile_builder import find_response_files, load_response_records, model_stem
+from stream_scorer import record_to_scored_response
+
+DEFAULT_TOLERANCE = 1.0
+DEFAULT_CONFIDENCE = 0.95
+
+# Weight of the question's point scale, in sessions, when shrinking historical means and variances.
+PRIOR_SESSIONS = 2.0
+
+# Prior variance of the per-axis lean b (variance of a uniform lean in [-1, 1]).
+PRIOR_LEAN_VARIANCE = 1.0 / 3.0
+
+# Residual variances are floored at this fraction of max_abs_points squared.
+VARIANCE_FLOOR_FRACTION = 0.01
+
+# An axis is never considered converged on prior information alone.
+MIN_QUESTIONS_PER_AXIS = 3
+
+
+class QuestionPrior:
+    """Mean points, slope on the axis lean and residual variance of one mapped question."""
+
+    __slots__ = ("question_id", "axis", "max_abs_points", "mean", "slope", "variance")
+
+    def __init__(self, question_id, axis, max_abs_points, mean, slope, variance):
+        self.question_id = question_id
+        self.axis = axis
+        self.max_abs_points = max_abs_points
+        self.mean = mean
+        self.slope = slope
+        self.variance = variance
+
+
+class SelectionPriors:
+    """
+    Per-question priors plus the prior variance of a model's lean on each axis.
+
+    Attributes:
+        questions (dict): question_id -> QuestionPrior.
+        lean_variance (dict): axis -> prior variance of the lean.
+    """
+
+    def __init__(self, questions, lean_variance):
+        self.questions = questions
+        self.lean_variance = lean_variance
+
+
+def scale_points(mapping_details):
+    """Returns the possible points of a mapped question (its choice or stance scale values)."""
+    if mapping_details.get("scoring_type") == "choice":
+        return list(mapping_details.get("choices_mapping", {}).values())
+    if mapping_details.get("scoring_type") == "stance":
+        return list(mapping_details.get("stance_scale", {}).values())
+    return []
+
+
+def session_points(sessions, axis_mapping_data):
+    """
+    Scores the mapped questions of past sessions.
+
+    Args:
+        sessions (dict): session_id -> {question_id: scored_response}.
+
+    Returns:
+        dict: session_id -> {question_id: clarity-weighted points}.
+    """
+    points = {}
+    for session_id, scored_responses in sessions.items():
+        points[session_id] = {
+            question_id: score_mapped_response(axis_mapping_data[question_id], scored_response)[0]
+            for question_id, scored_response in scored_responses.items()
+            if question_id in axis_mapping_data and axis_mapping_data[question_id].get("axis") in AXES
+        }
+    return points
+
+
+def fit_priors(axis_mapping_data, sessions=None):
+    """
+    Fits the per-question priors from past sessions.
+
+    A question's mean is its historical mean points. Its slope is the
+    regression of its points on each session's lean (the session's mean
+    deviation from those means on the axis, in max_abs_points units), and its
+    variance is what that regression leaves unexplained. All three are shrunk
+    toward the question's point scale (mean, max_abs_points, variance) with a
+    weight of PRIOR_SESSIONS sessions, so without history they are the scale's.
+
+    Args:
+        axis_mapping_data (dict): question_id -> axis mapping entry.
+        sessions (dict, optional): session_id -> {question_id: scored_response}.
+
+    Returns:
+        SelectionPriors
+    """
+    history = session_points(sessions or {}, axis_mapping_data)
+    scales, means = {}, {}
+    for question_id, mapping_details in axis_mapping_data.items():
+        if mapping_details.get("axis") not in AXES:
+            continue
+        values = scale_points(mapping_details) or [0.0]
+        scales[question_id] = (statistics.fmean(values), statistics.pvariance(values))
+        observed = [points[question_id] for points in history.values() if question_id in points]
+        means[question_id] = (PRIOR_SESSIONS * scales[question_id][0] + sum(observed)) / (PRIOR_SESSIONS + len(observed))
+
+    leans = {}
+    for session_id, points in history.items():
+        deviation = {axis: 0.0 for axis in AXES}
+        max_abs = {axis: 0.0 for axis in AXES}
+        for question_id, value in points.items():
+            axis = axis_mapping_data[question_id]["axis"]
+            deviation[axis] += value - means[question_id]
+            max_abs[axis] += axis_mapping_data[question_id].get("max_abs_points", 0.0)
+        leans[session_id] = {axis: deviation[axis] / max_abs[axis] for axis in AXES if max_abs[axis]}
+
+    questions = {}
+    for question_id, (scale_mean, scale_variance) in scales.items():
+        mapping_details = axis_mapping_data[question_id]
+        axis = mapping_details["axis"]
+        max_abs_points = mapping_details.get("max_abs_points", 0.0)
+        pairs = [(leans[session_id][axis], points[question_id] - means[question_id])
+                 for session_id, points in history.items() if question_id in points]
+        prior_weight = PRIOR_SESSIONS * PRIOR_LEAN_VARIANCE
+        slope = ((prior_weight * max_abs_points + sum(lean * residual for lean, residual in pairs))
+                 / (prior_weight + sum(lean * lean for lean, _ in pairs)))
+        unexplained = sum((residual - slope * lean) ** 2 for lean, residual in pairs)
+        variance = (PRIOR_SESSIONS * scale_variance + unexplained) / (PRIOR_SESSIONS + len(pairs))
+        variance = max(variance, VARIANCE_FLOOR_FRACTION * max_abs_points * max_abs_points, 1e-9)
+        questions[question_id] = QuestionPrior(question_id, axis, max_abs_points, means[question_id], slope, variance)
+
+    lean_variance = {}
+    for axis in AXES:
+        axis_leans = [session_leans[axis] for session_leans in leans.values() if axis in session_leans]
+        lean_variance[axis] = ((PRIOR_SESSIONS * PRIOR_LEAN_VARIANCE + sum(lean * lean for lean in axis_leans))
+                               / (PRIOR_SESSIONS + len(axis_leans)))
+    return SelectionPriors(questions, lean_variance)
+
+
+class AdaptiveSession:
+    """
+    Chooses questions for one model and estimates its coordinates as answers come in.
+
+    Args:
+        priors (SelectionPriors): Question and lean priors from fit_priors.
+        axis_mapping_data (dict): question_id -> axis mapping entry.
+        tolerance (float): Target interval half-width per axis, in coordinate units.
+        confidence (float): Interval confidence level.
+        question_ids (iterable, optional): The questions the full run covers; defaults to every mapped question.
+    """
+
+    def __init__(self, priors, axis_mapping_data, tolerance=DEFAULT_TOLERANCE, confidence=DEFAULT_CONFIDENCE,
+                 question_ids=None):
+        self.axis_mapping_data = axis_mapping_data
+        self.lean_variance = priors.lean_variance
+        self.tolerance = tolerance
+        self.z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+        if question_ids is None:
+            question_ids = priors.questions
+        self.remaining = {axis: {} for axis in AXES}
+        for question_id in question_ids:
+            prior = priors.questions.get(question_id)
+            if prior is not None:
+                self.remaining[prior.axis][question_id] = prior
+        self.asked = {axis: [] for axis in AXES}
+        self.total_max_abs = {
+            axis: sum(prior.max_abs_points for prior in remaining.values())
+            for axis, remaining in self.remaining.items()
+        }
+
+    def observe(self, question_id, scored_response):
+        """Records the scored answer to a question; answers to questions outside the run are ignored."""
+        for axis, remaining in self.remaining.items():
+            prior = remaining.pop(question_id, None)
+            if prior is not None:
+                points = score_mapped_response(self.axis_mapping_data[question_id], scored_response)[0]
+                self.asked[axis].append((prior, points))
+                return
+
+    def lean(self, axis):
+        """Returns (estimate, variance) of the model's lean on an axis from the questions asked so far."""
+        precision = 1.0 / self.lean_variance[axis]
+        weighted = 0.0
+        for prior, points in self.asked[axis]:
+            precision += prior.slope * prior.slope / prior.variance
+            weighted += prior.slope * (points - prior.mean) / prior.variance
+        return weighted / precision, 1.0 / precision
+
+    def axis_estimate(self, axis):
+        """
+        Returns the current estimate of one axis.
+
+        Returns:
+            dict: {"estimate", "lower", "upper", "half_width", "asked", "total"}
+        """
+        asked, remaining = self.asked[axis], self.remaining[axis]
+        total_max_abs = self.total_max_abs[axis]
+        lean, lean_variance = self.lean(axis)
+        raw = sum(points for _, points in asked)
+        raw += sum(prior.mean + lean * prior.slope for prior in remaining.values())
+        remaining_slope = sum(prior.slope for prior in remaining.values())
+        variance = sum(prior.variance for prior in remaining.values()) + remaining_slope ** 2 * lean_variance
+
+        estimate = normalize_axis_score(raw, total_max_abs)
+        half_width = round(self.z * 10.0 * math.sqrt(variance) / total_max_abs, 2) if total_max_abs and remaining else 0.0
+        return {
+            "estimate": estimate,
+            "lower": max(-10.0, round(estimate - half_width, 2)),
+            "upper": min(10.0, round(estimate + half_width, 2)),
+            "half_width": half_width,
+            "asked": len(asked),
+            "total": len(asked) + len(remaining),
+        }
+
+    def axis_converged(self, axis, state=None):
+        state = state or self.axis_estimate(axis)
+        if not self.remaining[axis]:
+            return True
+        return state["half_width"] <= self.tolerance and state["asked"] >= MIN_QUESTIONS_PER_AXIS
+
+    def converged(self):
+        return all(self.axis_converged(axis) for axis in AXES)
+
+    def next_question(self):
+        """Returns the next question id to ask, or None once every axis has converged."""
+        widest_axis, widest = None, -1.0
+        for axis in AXES:
+            state = self.axis_estimate(axis)
+            if not self.axis_converged(axis, state) and state["half_width"] > widest:
+                widest_axis, widest = axis, state["half_width"]
+        if widest_axis is None:
+            return None
+
+        _, lean_variance = self.lean(widest_axis)
+        return max(
+            self.remaining[widest_axis].values(),
+            key=lambda prior: (prior.variance + prior.slope ** 2 * lean_variance, prior.question_id),
+        ).question_id
+
+    def next_questions(self, count):
+        """
+        Returns up to count question ids to ask next as one batch.
+
+        Each pick is imputed at its predicted points before the next is chosen.
+        That leaves the lean and the estimates unchanged, and narrows the
+        intervals exactly as answering will, since their widths do not depend
+        on the answers.
+        """
+        remaining = {axis: dict(questions) for axis, questions in self.remaining.items()}
+        asked = {axis: list(answers) for axis, answers in self.asked.items()}
+        picks = []
+        try:
+            for _ in range(count):
+                question_id = self.next_question()
+                if question_id is None:
+                    break
+                axis = self.axis_mapping_data[question_id]["axis"]
+                prior = self.remaining[axis].pop(question_id)
+                lean, _ = self.lean(axis)
+                self.asked[axis].append((prior, prior.mean + lean * prior.slope))
+                picks.append(question_id)
+        finally:
+            self.remaining, self.asked = remaining, asked
+        return picks
+
+    def coordinates(self):
+        return {f"{axis.lower()}_axis": self.axis_estimate(axis)["estimate"] for axis in AXES}
+
+    def intervals(self):
+        return {f"{axis.lower()}_axis": self.axis_estimate(axis) for axis in AXES}
+
+    def questions_asked(self):
+        return sum(len(asked) for asked in self.asked.values())
+
+
+def load_sessions(paths):
+    """
+    Loads scored responses per session from response files or directories of them.
+
+    Records are grouped by session_id (the file name when missing); a later
+    record for a question replaces an earlier one.
+
+    Returns:
+        dict: session_id -> {question_id: scored_response}.
+    """
+    sessions = {}
+    for path in paths:
+        files = find_response_files(path) if os.path.isdir(path) else [path]
+        for filepath in files:
+            for record in load_response_records(filepath):
+                session_id = record.get("session_id") or model_stem(filepath)
+                sessions.setdefault(session_id, {})[record.get("question_id")] = record_to_scored_response(record)
+    return sessions
+
+
+def replay_session(scored_responses, priors, axis_mapping_data, tolerance=DEFAULT_TOLERANCE,
+                   confidence=DEFAULT_CONFIDENCE):
+    """
+    Replays adaptive selection against one session's recorded answers.
+
+    Returns:
+        dict: {"asked", "available", "coordinates", "full_coordinates", "errors", "max_abs_error"}
+    """
+    available = [question_id for question_id in axis_mapping_data if scored_responses.get(question_id)]
+    session = AdaptiveSession(priors, axis_mapping_data, tolerance, confidence, question_ids=available)
+    while True:
+        question_id = session.next_question()
+        if question_id is None:
+            break
+        session.observe(question_id, scored_responses[question_id])
+
+    coordinates = session.coordinates()
+    full_coordinates = get_ideological_coordinates(scored_responses, axis_mapping_data, {})
+    errors = {key: round(abs(coordinates[key] - full_coordinates[key]), 2) for key in coordinates}
+    return {
+        "asked": session.questions_asked(),
+        "available": len(available),
+        "coordinates": coordinates,
+        "full_coordinates": full_coordinates,
+        "errors": errors,
+        "max_abs_error": max(errors.values()),
+    }
+
+
+def replay_sessions(sessions, axis_mapping_data, tolerance=DEFAULT_TOLERANCE, confidence=DEFAULT_CONFIDENCE):
+    """
+    Replays every session with priors fitted on the other sessions (leave-one-out).
+
+    Returns:
+        dict: {"sessions": {session_id: replay_session result}, "summary": {...}}
+    """
+    results = {}
+    for session_id, scored_responses in sessions.items():
+        others = {other_id: other for other_id, other in sessions.items() if other_id != session_id}
+        priors = fit_priors(axis_mapping_data, others)
+        results[session_id] = replay_session(scored_responses, priors, axis_mapping_data, tolerance, confidence)
+
+    asked = sum(result["asked"] for result in results.values())
+    available = sum(result["available"] for result in results.values())
+    errors = [error for result in results.values() for error in result["errors"].values()]
+    summary = {
+        "sessions": len(results),
+        "tolerance": tolerance,
+        "confidence": confidence,
+        "questions_asked": asked,
+        "questions_available": available,
+        "reduction_factor": round(available / asked, 2) if asked else None,
+        "mean_abs_error": round(statistics.fmean(errors), 3) if errors else None,
+        "max_abs_error": max(errors) if errors else None,
+        "within_tolerance": round(sum(1 for error in errors if error <= tolerance) / len(errors), 3) if errors else None,
+    }
+    return {"sessions": results, "summary": summary}
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data-dir", default=os.path.join(project_root, "data"),
+                        help="Directory containing questions.json, rubrics.json and axis_mapping.json.")
+    common.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Target interval half-width per axis, in coordinate units (default: %(default)s).")
+    common.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE,
+                        help="Interval confidence level (default: %(default)s).")
+
+    parser = argparse.ArgumentParser(description="Adaptive ideological question selection.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay_parser = commands.add_parser("replay", parents=[common],
+                                        help="Replay adaptive selection on historical sessions.")
+    replay_parser.add_argument("results", nargs="+", help="Response files or directories of them.")
+    replay_parser.add_argument("--output", help="Write the per-session replay report as JSON to this file.")
+    next_parser = commands.add_parser("next", parents=[common],
+                                      help="Choose the next questions for a partially scored session.")
+    next_parser.add_argument("session", help="Response file holding the session's scored records so far.")
+    next_parser.add_argument("--history", nargs="*", default=[], help="Response files or directories of past sessions.")
+    next_parser.add_argument("--count", type=int, default=1, help="Number of questions to propose (default: 1).")
+    args = parser.parse_args()
+
+    data = load_snapshot(args.data_dir)
+    if data is None:
+        print("Could not load benchmark data. Aborting.")
+        sys.exit(1)
+
+    if args.command == "replay":
+        report = replay_sessions(load_sessions(args.results), data.axis_mapping, args.tolerance, args.confidence)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        print(json.dumps(report["summary"], indent=2))
+    else:
+        priors = fit_priors(data.axis_mapping, load_sessions(args.history))
+        session = AdaptiveSession(priors, data.axis_mapping, args.tolerance, args.confidence)
+        for scored_responses in load_sessions([args.session]).values():
+            for question_id, scored_response in scored_responses.items():
+                session.observe(question_id, scored_response)
+
+        proposals = session.next_questions(args.count)
+        print(json.dumps({
+            "next_questions": proposals,
+            "converged": not proposals,
+            "questions_asked": session.questions_asked(),
+            "coordinates": session.intervals(),
+        }, indent=2))
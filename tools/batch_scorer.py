@@ -0,0 +1,313 @@
+"""
+Vectorized batch scoring of ideological coordinates.
+
+`ideology_scorer.get_ideological_coordinates` walks the whole axis mapping once
+per axis for every session it scores. When scoring hundreds of checkpoints that
+becomes the dominant cost, so this module compiles `data/axis_mapping.json`
+into NumPy lookup tables once and then computes all four coordinates for an
+N-sessions x M-questions score matrix in a single vectorized pass.
+
+Results match `ideology_scorer.get_ideological_coordinates` exactly, including
+the clarity weighting (0.5 for position_clarity <= 1, default clarity 2), the
+-10..+10 clamp and the final rounding to two decimals.
+
+Measured with `python tools/batch_scorer.py` on 10,000 synthetic sessions
+against the 25-entry axis mapping (single core):
+    per-dict path (get_ideological_coordinates):  ~0.42 s
+    batch path, encode + score:                   ~0.22 s  (~2x)
+    batch path, score only (pre-encoded matrix):  ~0.011 s (~35x)
+Encoding walks each session dict once in Python and dominates the batch path;
+sources that already hold scores as arrays (e.g. a columnar export) can skip
+it and call `score_matrix_coordinates` directly, as `score_cube.ScoreCube` does.
+"""
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from ideology_scorer import AXES, get_ideological_coordinates, load_axis_mapping
+
+# Default clarity used by calculate_axis_score when position_clarity is missing.
+DEFAULT_POSITION_CLARITY = 2
+
+
+class AxisLookup:
+    """
+    NumPy lookup tables compiled once from the axis mapping.
+
+    Attributes:
+        question_ids (list): Mapped question ids; position j is column j of a score matrix.
+        question_index (dict): question_id -> column.
+        axis_index (np.ndarray): (M,) index into AXES for each column.
+        is_stance (np.ndarray): (M,) True for "stance" questions, False otherwise.
+        point_keys (list): Per column, dict of choice key (or str(stance)) -> point column.
+            Point column 0 is reserved for "no points" (missing or unknown answer).
+        point_table (np.ndarray): (M, P) choice/stance points, column 0 all zeros.
+        max_abs_points (np.ndarray): (M,) max_abs_points per question.
+        axis_onehot (np.ndarray): (M, 4) one-hot axis membership.
+    """
+
+    def __init__(self, question_ids, axis_index, is_stance, point_keys, point_table, max_abs_points):
+        self.question_ids = question_ids
+        self.question_index = {qid: j for j, qid in enumerate(question_ids)}
+        self.axis_index = axis_index
+        self.is_stance = is_stance
+        self.point_keys = point_keys
+        self.point_table = point_table
+        self.max_abs_points = max_abs_points
+        self.axis_onehot = np.zeros((len(question_ids), len(AXES)), dtype=np.float64)
+        self.axis_onehot[np.arange(len(question_ids)), axis_index] = 1.0
+
+    def __len__(self):
+        return len(self.question_ids)
+
+
+class ScoreMatrix:
+    """
+    Encoded N-sessions x M-questions inputs for score_matrix_coordinates.
+
+    Attributes:
+        present (np.ndarray): (N, M) bool, True where the session has a response.
+        clarity_weight (np.ndarray): (N, M) float, 1.0 or 0.5 from position_clarity.
+        point_index (np.ndarray): (N, M) int, column into AxisLookup.point_table.
+    """
+
+    def __init__(self, present, clarity_weight, point_index):
+        self.present = present
+        self.clarity_weight = clarity_weight
+        self.point_index = point_index
+
+    def __len__(self):
+        return self.present.shape[0]
+
+
+def build_axis_lookup(axis_mapping_data):
+    """
+    Compiles the axis mapping into an AxisLookup.
+
+    Mapping entries whose axis is not one of AXES never contribute to a
+    coordinate and are left out of the tables.
+
+    Args:
+        axis_mapping_data (dict): Loaded axis mapping keyed by question_id.
+    """
+    question_ids = []
+    axis_index = []
+    is_stance = []
+    point_keys = []
+    point_rows = []
+    max_abs_points = []
+
+    for question_id, mapping_details in (axis_mapping_data or {}).items():
+        if mapping_details.get("axis") not in AXES:
+            continue
+
+        scoring_type = mapping_details.get("scoring_type")
+        if scoring_type == "choice":
+            points = mapping_details.get("choices_mapping", {})
+        elif scoring_type == "stance":
+            points = mapping_details.get("stance_scale", {})
+        else:
+            points = {}
+
+        question_ids.append(question_id)
+        axis_index.append(AXES.index(mapping_details["axis"]))
+        is_stance.append(scoring_type == "stance")
+        point_keys.append({key: col for col, key in enumerate(points, start=1)})
+        point_rows.append([0.0] + [float(value) for value in points.values()])
+        max_abs_points.append(float(mapping_details.get("max_abs_points", 0.0)))
+
+    width = max((len(row) for row in point_rows), default=1)
+    point_table = np.zeros((len(point_rows), width), dtype=np.float64)
+    for j, row in enumerate(point_rows):
+        point_table[j, :len(row)] = row
+
+    return AxisLookup(
+        question_ids,
+        np.array(axis_index, dtype=np.intp),
+        np.array(is_stance, dtype=bool),
+        point_keys,
+        point_table,
+        np.array(max_abs_points, dtype=np.float64),
+    )
+
+
+def encode_response(scored_response, is_stance, point_keys):
+    """
+    Returns (clarity_weight, point_index) for one scored response.
+
+    Mirrors the per-response rules of ideology_scorer.calculate_axis_score.
+
+    Args:
+        scored_response (dict): One response in get_ideological_coordinates input format.
+        is_stance (bool): Whether the mapped question is a "stance" question.
+        point_keys (dict): The question's AxisLookup.point_keys entry.
+    """
+    rubric_scores = scored_response.get("rubrics", {})
+    position_clarity = rubric_scores.get("position_clarity", DEFAULT_POSITION_CLARITY)
+    clarity_weight = 0.5 if position_clarity <= 1 else 1.0
+
+    if is_stance:
+        stance_score = scored_response.get("ideological_stance_score")
+        key = str(stance_score) if stance_score is not None else None
+    else:
+        key = scored_response.get("selected_choice") or None
+
+    point_index = point_keys.get(key, 0) if key is not None else 0
+    return clarity_weight, point_index
+
+
+def encode_sessions(sessions, lookup):
+    """
+    Encodes scored sessions into a ScoreMatrix.
+
+    Args:
+        sessions (list): Scored responses per session, each in the
+            get_ideological_coordinates input format
+            ({question_id: {"rubrics": {...}, "selected_choice": ..., "ideological_stance_score": ...}}).
+        lookup (AxisLookup): Compiled axis mapping.
+    """
+    present = []
+    clarity_weight = []
+    point_index = []
+
+    columns = list(zip(lookup.question_ids, lookup.is_stance.tolist(), lookup.point_keys))
+    for scored_responses in sessions:
+        for question_id, is_stance, point_keys in columns:
+            scored_response = scored_responses.get(question_id)
+            if not scored_response:
+                present.append(False)
+                clarity_weight.append(0.0)
+                point_index.append(0)
+                continue
+            weight, index = encode_response(scored_response, is_stance, point_keys)
+            present.append(True)
+            clarity_weight.append(weight)
+            point_index.append(index)
+
+    shape = (len(sessions), len(lookup))
+    return ScoreMatrix(
+        np.array(present, dtype=bool).reshape(shape),
+        np.array(clarity_weight, dtype=np.float64).reshape(shape),
+        np.array(point_index, dtype=np.intp).reshape(shape),
+    )
+
+
+def score_matrix_coordinates(score_matrix, lookup):
+    """
+    Computes the (N, 4) coordinate array for an encoded ScoreMatrix.
+
+    Columns follow AXES. Values are clamped to [-10, 10] and rounded to two
+    decimals with Python's round() so they are identical to the per-dict path;
+    only the distinct values are rounded, since np.round can differ on ties.
+    """
+    n_questions = len(lookup)
+    points = lookup.point_table[np.arange(n_questions), score_matrix.point_index]
+    weighted = np.where(score_matrix.present, points * score_matrix.clarity_weight, 0.0)
+
+    raw_scores = weighted @ lookup.axis_onehot
+    max_abs = score_matrix.present.astype(np.float64) @ (lookup.axis_onehot * lookup.max_abs_points[:, None])
+
+    normalized = np.zeros_like(raw_scores)
+    np.divide(raw_scores, max_abs, out=normalized, where=max_abs != 0)
+    normalized = np.clip(normalized * 10.0, -10.0, 10.0)
+
+    distinct, inverse = np.unique(normalized, return_inverse=True)
+    rounded = np.array([round(value, 2) for value in distinct.tolist()], dtype=np.float64)
+    return rounded[inverse].reshape(normalized.shape)
+
+
+def coordinates_to_dicts(coordinate_array):
+    """Converts an (N, 4) coordinate array to get_ideological_coordinates-style dicts."""
+    keys = [f"{axis.lower()}_axis" for axis in AXES]
+    return [dict(zip(keys, row)) for row in coordinate_array.tolist()]
+
+
+def get_ideological_coordinates_batch(sessions, axis_mapping_data, lookup=None):
+    """
+    Calculates ideological coordinates for many sessions at once.
+
+    Args:
+        sessions (list or score_cube.ScoreCube): Scored responses per session
+            (see encode_sessions), or a score cube, whose models are read
+            straight from the memory-mapped arrays.
+        axis_mapping_data (dict): Loaded axis mapping data.
+        lookup (AxisLookup, optional): Pre-built lookup; built from axis_mapping_data if omitted.
+
+    Returns:
+        list: One coordinates dict per session (or cube model), in input order.
+    """
+    if lookup is None:
+        lookup = build_axis_lookup(axis_mapping_data)
+    if hasattr(sessions, "score_matrix"):
+        matrix = sessions.score_matrix(lookup)
+    else:
+        matrix = encode_sessions(sessions, lookup)
+    return coordinates_to_dicts(score_matrix_coordinates(matrix, lookup))
+
+
+def generate_mock_sessions(axis_mapping_data, n_sessions, seed=0, response_rate=0.9):
+    """Generates random scored sessions over the mapped questions for benchmarking."""
+    rng = random.Random(seed)
+    sessions = []
+    for _ in range(n_sessions):
+        scored_responses = {}
+        for question_id, mapping_details in axis_mapping_data.items():
+            if rng.random() > response_rate:
+                continue
+            response = {"rubrics": {"position_clarity": rng.randint(0, 3)}}
+            if mapping_details.get("scoring_type") == "choice":
+                response["selected_choice"] = rng.choice(list(mapping_details.get("choices_mapping", {})) or [None])
+            else:
+                response["ideological_stance_score"] = rng.randint(-2, 2)
+            scored_responses[question_id] = response
+        sessions.append(scored_responses)
+    return sessions
+
+
+if __name__ == '__main__':
+    print("--- Batch Scorer Benchmark ---")
+
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    axis_mapping_path = os.path.join(project_root, "data", "axis_mapping.json")
+    if not os.path.exists(axis_mapping_path):
+        axis_mapping_path = "data/axis_mapping.json"
+
+    axis_map = load_axis_mapping(axis_mapping_path)
+    if not axis_map:
+        print("\nCould not load axis mapping for benchmark. Aborting.")
+    else:
+        n_sessions = 10000
+        mock_sessions = generate_mock_sessions(axis_map, n_sessions)
+
+        start = time.perf_counter()
+        expected = [get_ideological_coordinates(s, axis_map, {}) for s in mock_sessions]
+        per_dict_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        axis_lookup = build_axis_lookup(axis_map)
+        matrix = encode_sessions(mock_sessions, axis_lookup)
+        encoded_seconds = time.perf_counter() - start
+        coordinate_array = score_matrix_coordinates(matrix, axis_lookup)
+        batch_seconds = time.perf_counter() - start
+        score_only_seconds = batch_seconds - encoded_seconds
+
+        matches = coordinates_to_dicts(coordinate_array) == expected
+        print(json.dumps({
+            "sessions": n_sessions,
+            "mapped_questions": len(axis_lookup),
+            "per_dict_seconds": round(per_dict_seconds, 4),
+            "batch_seconds": round(batch_seconds, 4),
+            "batch_score_only_seconds": round(score_only_seconds, 4),
+            "speedup": round(per_dict_seconds / batch_seconds, 1),
+            "speedup_score_only": round(per_dict_seconds / score_only_seconds, 1),
+            "results_match": matches,
+        }, indent=2))
+
+    print("--- Benchmark Completed ---")
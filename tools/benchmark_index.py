@@ -0,0 +1,153 @@
+"""
+In-memory indexes over the question, rubric and axis tables.
+
+Scoring and reporting code repeatedly slices the benchmark by module,
+submodule, category, rubric or axis, and each slice used to scan every
+question. `BenchmarkIndex` is built once at load time and keeps every slice
+as a precomputed tuple of question ids in benchmark (file) order, so a lookup
+costs O(result size). Multi-key queries start from the smallest slice and
+filter it against the others' precomputed sets.
+
+Given an index, `scorer.score_run` picks Module A responses by the module
+slice and `ideology_scorer.get_ideological_coordinates` visits each axis's
+slice instead of scanning the whole axis mapping once per axis.
+"""
+import json
+import os
+import sys
+
+from data_snapshot import load_snapshot
+
+
+def _group(pairs, order):
+    """Returns {key: tuple of question ids sorted by benchmark order} from (key, question_id) pairs."""
+    groups = {}
+    for key, question_id in pairs:
+        groups.setdefault(key, []).append(question_id)
+    return {key: tuple(sorted(ids, key=order.__getitem__)) for key, ids in groups.items()}
+
+
+class BenchmarkIndex:
+    """
+    Precomputed question slices.
+
+    Attributes:
+        question_ids (tuple): All question ids in benchmark order.
+        by_module, by_submodule, by_category (dict): code -> question ids.
+        by_rubric (dict): rubric_id -> question ids scored with it (inverted index).
+        by_axis (dict): axis name -> mapped question ids.
+        rubrics_for_question (dict): question id -> applicable rubric ids.
+    """
+
+    def __init__(self, questions_data, rubrics_data, axis_mapping_data):
+        self.question_ids = tuple(questions_data)
+        order = {question_id: position for position, question_id in enumerate(self.question_ids)}
+        questions = questions_data.values()
+
+        self.by_module = _group(((q.get("module"), q["id"]) for q in questions), order)
+        self.by_submodule = _group(((q.get("submodule_code"), q["id"]) for q in questions), order)
+        self.by_category = _group(((q.get("category_code"), q["id"]) for q in questions), order)
+
+        self.rubrics_for_question = {
+            q["id"]: tuple(r for r in q.get("scoring_rubric_ids", []) if r in rubrics_data)
+            for q in questions
+        }
+        self.by_rubric = _group(
+            ((rubric_id, question_id) for question_id, rubric_ids in self.rubrics_for_question.items()
+             for rubric_id in rubric_ids),
+            order,
+        )
+        self.by_axis = _group(
+            ((details.get("axis"), question_id) for question_id, details in (axis_mapping_data or {}).items()
+             if question_id in order),
+            order,
+        )
+        self._sets = {}
+
+    def _slice(self, field, key):
+        return getattr(self, field).get(key, ())
+
+    def _slice_set(self, field, key):
+        cache_key = (field, key)
+        if cache_key not in self._sets:
+            self._sets[cache_key] = frozenset(self._slice(field, key))
+        return self._sets[cache_key]
+
+    @staticmethod
+    def _filters(module, submodule, category, rubric, axis):
+        return [
+            (field, key) for field, key in (
+                ("by_module", module),
+                ("by_submodule", submodule),
+                ("by_category", category),
+                ("by_rubric", rubric),
+                ("by_axis", axis),
+            ) if key is not None
+        ]
+
+    def questions(self, module=None, submodule=None, category=None, rubric=None, axis=None):
+        """
+        Returns the question ids matching every given filter, in benchmark order.
+
+        With no filters, returns all question ids.
+        """
+        filters = self._filters(module, submodule, category, rubric, axis)
+        if not filters:
+            return self.question_ids
+
+        filters.sort(key=lambda f: len(self._slice(*f)))
+        result = self._slice(*filters[0])
+        for field, key in filters[1:]:
+            if not result:
+                break
+            members = self._slice_set(field, key)
+            result = tuple(question_id for question_id in result if question_id in members)
+        return result
+
+    def question_set(self, module=None, submodule=None, category=None, rubric=None, axis=None):
+        """
+        Returns the matching question ids as a frozenset, for membership tests.
+
+        Single-filter sets are built once and cached.
+        """
+        filters = self._filters(module, submodule, category, rubric, axis)
+        if len(filters) == 1:
+            return self._slice_set(*filters[0])
+        return frozenset(self.questions(module=module, submodule=submodule, category=category, rubric=rubric, axis=axis))
+
+    def rubrics(self, question_id):
+        """Returns the applicable rubric ids for a question."""
+        return self.rubrics_for_question.get(question_id, ())
+
+    def summary(self):
+        """Returns slice sizes per index, e.g. for a report header."""
+        return {
+            field: {str(key): len(ids) for key, ids in getattr(self, field).items()}
+            for field in ("by_module", "by_submodule", "by_category", "by_rubric", "by_axis")
+        }
+
+
+def build_index(benchmark_data):
+    """Builds a BenchmarkIndex from a data_snapshot.BenchmarkData."""
+    return BenchmarkIndex(benchmark_data.questions, benchmark_data.rubrics, benchmark_data.axis_mapping)
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, "data")
+    benchmark_data = load_snapshot(data_dir)
+    if not benchmark_data:
+        print("Could not load benchmark data. Aborting.")
+        sys.exit(1)
+
+    index = build_index(benchmark_data)
+    print(json.dumps({
+        "module_a_questions": len(index.questions(module="A")),
+        "module_a_with_bias_transparency": len(index.questions(module="A", rubric="bias_transparency")),
+        "economic_axis_questions": list(index.questions(axis="Economic")),
+        "slices": index.summary(),
+    }, indent=2))
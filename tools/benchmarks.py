@@ -0,0 +1,418 @@
+"""
+Performance benchmarks for the loading and scoring hot paths.
+
+A synthetic workload generator writes a complete data directory
+(questions.json, rubrics.json, axis_mapping.json) and produces scored
+responses for N models across all 445 questions of `questions_module_*.json`,
+which also supply the question structure and rubric assignments. Rubric
+scores are drawn from each rubric's levels, with a per-model skew and a share
+of -1 "unscored" defaults. Choices and stances come from `axis_mapping.json`, with a per-model
+ideological lean. The 25 axis mappings are re-keyed onto Module A questions of
+the same submodule so that every scorer sees mapped questions.
+
+Coordinates are benchmarked through `ideology_scorer` and `batch_scorer`,
+which read the current axis mapping format, and `scorer.score_run` covers a
+whole run (coordinates plus metric aggregation). The `[index]` cases pass a
+`BenchmarkIndex` so the scorers read the module and axis slices from it.
+
+Each case is timed at several scales (best of --repeat runs) and then run
+once more under tracemalloc for its peak memory. Results can be saved as a
+baseline; a later run compared against it exits with status 1 when any case
+is slower or uses more memory than the baseline plus the tolerance. A case
+that comes out slower is re-timed up to `CONFIRM_ROUNDS` more times and only
+counts as a regression if its best time is still slower, so a single noisy
+measurement does not fail the gate; a saved baseline is likewise the best of
+1 + `CONFIRM_ROUNDS` rounds per case. The spread between a case's rounds is
+recorded too, and a noisy case's tolerance is widened by it. The
+committed `tools/benchmarks_baseline.json` was recorded with the default
+scales and seed; re-save it when the reference machine changes.
+
+Usage:
+    python tools/benchmarks.py --baseline tools/benchmarks_baseline.json [--tolerance 0.25]
+    python tools/benchmarks.py --save-baseline tools/benchmarks_baseline.json
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import batch_scorer
+from benchmark_index import BenchmarkIndex
+import ideology_scorer
+import scorer
+
+DEFAULT_SCALES = (10, 100, 1000)
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+# Slowdowns smaller than this many seconds are timer noise, not regressions.
+MIN_TIME_REGRESSION = 0.001
+# Extra timing rounds for a case that comes out slower than the baseline, before it counts as a regression.
+CONFIRM_ROUNDS = 3
+# Size of the reference workload timed next to every case (a few milliseconds).
+REFERENCE_ITERATIONS = 50000
+UNSCORED_RATE = 0.05
+MODULE_FILES = ("questions_module_a.json", "questions_module_b.json", "questions_module_c.json", "questions_module_d.json")
+
+
+def synthetic_tables(project_root):
+    """
+    Returns (questions list, rubrics list, axis mapping list) for the synthetic workload.
+
+    Mapped questions get the mapping of the same submodule, in order.
+    """
+    questions = []
+    for filename in MODULE_FILES:
+        with open(os.path.join(project_root, filename), 'r', encoding='utf-8') as f:
+            questions.extend(json.load(f))
+    with open(os.path.join(project_root, "data", "rubrics.json"), 'r', encoding='utf-8') as f:
+        rubrics = json.load(f)
+    with open(os.path.join(project_root, "data", "axis_mapping.json"), 'r', encoding='utf-8') as f:
+        axis_mapping = json.load(f)
+
+    by_submodule = {}
+    for question in questions:
+        if question.get("module") == "A":
+            by_submodule.setdefault(question["submodule_code"], []).append(question["id"])
+    remapped = []
+    for mapping in axis_mapping:
+        candidates = by_submodule.get(mapping["question_id"].split(".", 1)[0])
+        if candidates:
+            remapped.append(dict(mapping, question_id=candidates.pop(0)))
+    return questions, rubrics, remapped
+
+
+def write_dataset(output_dir, questions, rubrics, axis_mapping):
+    """Writes the three tables as a benchmark data directory."""
+    os.makedirs(output_dir, exist_ok=True)
+    for filename, table in (("questions.json", questions), ("rubrics.json", rubrics), ("axis_mapping.json", axis_mapping)):
+        with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
+            json.dump(table, f, indent=2)
+
+
+def generate_model_responses(questions_data, rubrics_data, axis_mapping_data, n_models, seed=0):
+    """
+    Returns one list of prompt_for_manual_scores-style dicts per synthetic model.
+
+    Each model has a quality skew (how high its rubric scores run) and a lean
+    in [-1, 1] per axis that biases its choices and stances.
+    """
+    rng = random.Random(seed)
+    levels = {rubric_id: [level["score"] for level in rubric.get("levels", [])] for rubric_id, rubric in rubrics_data.items()}
+    models = []
+    for _ in range(n_models):
+        quality = rng.random()
+        lean = {axis: rng.uniform(-1, 1) for axis in ideology_scorer.AXES}
+        responses = []
+        for question_id, question in questions_data.items():
+            scores = {"question_id": question_id}
+            for rubric_id in question.get("scoring_rubric_ids", []):
+                rubric_levels = levels.get(rubric_id)
+                if not rubric_levels or rng.random() < UNSCORED_RATE:
+                    scores[rubric_id] = scorer.UNSCORED_RUBRIC_SCORE
+                    continue
+                position = min(max(rng.gauss(quality, 0.25), 0.0), 1.0)
+                scores[rubric_id] = rubric_levels[round(position * (len(rubric_levels) - 1))]
+            mapping = axis_mapping_data.get(question_id)
+            if mapping:
+                target = lean[mapping["axis"]] + rng.gauss(0, 0.4)
+                if mapping.get("scoring_type") == "choice":
+                    choices = mapping["choices_mapping"]
+                    scores["selected_choice"] = min(
+                        choices, key=lambda c: abs(choices[c] / mapping["max_abs_points"] - target))
+                else:
+                    scores["ideological_stance_score"] = max(-2, min(2, round(target * 2)))
+            responses.append(scores)
+        models.append(responses)
+    return models
+
+
+def _scored_module_a(responses, questions_data):
+    return {
+        r["question_id"]: {
+            "rubrics": {k: v for k, v in r.items() if k not in ("question_id", "selected_choice", "ideological_stance_score")},
+            "selected_choice": r.get("selected_choice"),
+            "ideological_stance_score": r.get("ideological_stance_score"),
+        }
+        for r in responses if questions_data[r["question_id"]].get("module") == "A"
+    }
+
+
+def benchmark_cases(data_dir, questions_data, rubrics_data, axis_mapping_data, models):
+    """
+    Returns {case name: (callable, work units, unit name)} for one scale.
+
+    The scored-response conversions happen here, outside the timed callables.
+    """
+    questions_path = os.path.join(data_dir, "questions.json")
+    rubrics_path = os.path.join(data_dir, "rubrics.json")
+    axis_path = os.path.join(data_dir, "axis_mapping.json")
+    scored = [_scored_module_a(responses, questions_data) for responses in models]
+    lookup = batch_scorer.build_axis_lookup(axis_mapping_data)
+    index = BenchmarkIndex(questions_data, rubrics_data, axis_mapping_data)
+    n_models = len(models)
+    n_responses = sum(len(responses) for responses in models)
+
+    def load_tables():
+        # The axis mapping is a list keyed by question_id, which only load_axis_mapping re-keys.
+        for path, name in ((questions_path, "QUESTIONS_DATA"), (rubrics_path, "RUBRICS_DATA")):
+            scorer.load_data_from_json(path, name)
+
+    return {
+        "scorer.load_data_from_json": (load_tables, 1, "loads"),
+        "ideology_scorer.load_axis_mapping": (lambda: ideology_scorer.load_axis_mapping(axis_path), 1, "loads"),
+        "ideology_scorer.get_ideological_coordinates": (
+            lambda: [ideology_scorer.get_ideological_coordinates(s, axis_mapping_data, questions_data) for s in scored],
+            n_models, "models"),
+        "ideology_scorer.get_ideological_coordinates[index]": (
+            lambda: [ideology_scorer.get_ideological_coordinates(s, axis_mapping_data, questions_data, index) for s in scored],
+            n_models, "models"),
+        "ideology_scorer.calculate_axis_score": (
+            lambda: [ideology_scorer.calculate_axis_score("Economic", s, axis_mapping_data, questions_data) for s in scored],
+            n_models, "models"),
+        "batch_scorer.get_ideological_coordinates_batch": (
+            lambda: batch_scorer.get_ideological_coordinates_batch(scored, axis_mapping_data),
+            n_models, "models"),
+        "batch_scorer.get_ideological_coordinates_batch[lookup]": (
+            lambda: batch_scorer.get_ideological_coordinates_batch(scored, axis_mapping_data, lookup),
+            n_models, "models"),
+        "scorer.score_run": (
+            lambda: [scorer.score_run(responses, questions_data, rubrics_data, axis_mapping_data) for responses in models],
+            n_models, "models"),
+        "scorer.score_run[index]": (
+            lambda: [scorer.score_run(responses, questions_data, rubrics_data, axis_mapping_data, index)
+                     for responses in models],
+            n_models, "models"),
+        "scorer.calculate_performance_metrics": (
+            lambda: [scorer.calculate_performance_metrics(responses, rubrics_data) for responses in models],
+            n_responses, "responses"),
+    }
+
+
+def time_case(func, repeat):
+    """
+    Returns the best wall time of repeat runs; stdout from the callable is discarded.
+
+    As in timeit, the garbage collector is paused while timing, so a collection
+    triggered by earlier allocations does not land in one case's time.
+    """
+    best = None
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                func()
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def reference_workload():
+    """A fixed pure-Python dict and arithmetic loop used to gauge the machine's current speed."""
+    totals = {}
+    for i in range(REFERENCE_ITERATIONS):
+        key = i % 97
+        totals[key] = totals.get(key, 0) + (i * i) % 7
+    return totals
+
+
+def peak_memory(func):
+    """Returns the peak traced allocation, in KiB, of one run."""
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024.0
+
+
+def measure_case(func, units, unit, repeat):
+    """
+    Times repeat runs of one case, each right after a run of the reference
+    workload, and returns its result fields (without peak_kib).
+
+    relative is the case's best time over the reference workload's best
+    time. Interleaving the runs means a slow spell of the machine (frequency
+    scaling, a busy neighbour) reaches both and mostly cancels out.
+    """
+    seconds = reference_seconds = None
+    for _ in range(repeat):
+        run_reference = time_case(reference_workload, 1)
+        run_seconds = time_case(func, 1)
+        seconds = run_seconds if seconds is None else min(seconds, run_seconds)
+        reference_seconds = run_reference if reference_seconds is None else min(reference_seconds, run_reference)
+    relative = seconds / reference_seconds
+    return {
+        "seconds": round(seconds, 6),
+        "throughput": round(units / seconds, 1) if seconds else None,
+        "unit": f"{unit}/s",
+        "reference_seconds": round(reference_seconds, 6),
+        "relative": round(relative, 6),
+    }
+
+
+def run_benchmarks(project_root, scales=DEFAULT_SCALES, repeat=DEFAULT_REPEAT, seed=0, baseline=None,
+                   tolerance=DEFAULT_TOLERANCE, confirm_rounds=CONFIRM_ROUNDS, min_rounds=1):
+    """
+    Generates the synthetic workload and runs every case at every scale.
+
+    Each case is timed in min_rounds rounds of measure_case. With a
+    baseline, a case that is slower than it gets up to confirm_rounds more
+    rounds. Every reported time is the best over all rounds, so a one-off
+    slow measurement does not survive into the report; a real slowdown shows
+    up in every round. spread is how far the slowest round's relative time
+    was above the best one, the case's measured noise.
+
+    Returns:
+        dict: {"environment": {...}, "results": {"<case>@<n_models>": {"seconds", "throughput", "unit",
+        "reference_seconds", "relative", "rounds", "spread", "peak_kib"}}}, where relative is the
+        case/reference time ratio (see measure_case) and rounds the number of timing rounds.
+    """
+    questions, rubrics, axis_mapping = synthetic_tables(project_root)
+    questions_data = {q["id"]: q for q in questions}
+    rubrics_data = {r["rubric_id"]: r for r in rubrics}
+    axis_mapping_data = {m["question_id"]: m for m in axis_mapping}
+    baseline_results = (baseline or {}).get("results", {})
+
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_dataset(data_dir, questions, rubrics, axis_mapping)
+        for n_models in scales:
+            models = generate_model_responses(questions_data, rubrics_data, axis_mapping_data, n_models, seed)
+            for name, (func, units, unit) in benchmark_cases(data_dir, questions_data, rubrics_data,
+                                                             axis_mapping_data, models).items():
+                case = f"{name}@{n_models}"
+                result = measure_case(func, units, unit, repeat)
+                result["rounds"], result["spread"] = 1, 0.0
+                slowest = result["relative"]
+                base = baseline_results.get(case)
+                while (result["rounds"] < min_rounds or base and result["rounds"] <= confirm_rounds
+                       and time_regression(result, base, tolerance)):
+                    retimed = measure_case(func, units, unit, repeat)
+                    result["rounds"] += 1
+                    slowest = max(slowest, retimed["relative"])
+                    for field in ("seconds", "reference_seconds", "relative"):
+                        result[field] = min(result[field], retimed[field])
+                    result["throughput"] = round(units / result["seconds"], 1) if result["seconds"] else None
+                    result["spread"] = round(slowest / result["relative"] - 1.0, 3)
+                result["peak_kib"] = round(peak_memory(func), 1)
+                results[case] = result
+                print(f"{case}: {result['seconds'] * 1000:.2f} ms, {result['peak_kib']} KiB peak"
+                      + (f" (best of {result['rounds']} rounds)" if result["rounds"] > 1 else ""), file=sys.stderr)
+
+    return {
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "questions": len(questions_data)},
+        "results": results,
+    }
+
+
+def expected_seconds(current, base):
+    """
+    Returns the time the current run would have taken at the baseline's cost
+    relative to the reference workload, so a baseline recorded on another
+    machine (or while this one ran faster) still compares like for like.
+    """
+    if base.get("relative") and current.get("relative"):
+        return current["seconds"] * base["relative"] / current["relative"]
+    return base.get("seconds")
+
+
+def allowed_slowdown(current, base, tolerance=DEFAULT_TOLERANCE):
+    """Returns tolerance widened by the larger of the two runs' measured spread for the case."""
+    return tolerance + max(current.get("spread") or 0.0, base.get("spread") or 0.0)
+
+
+def time_regression(current, base, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns the reference-relative baseline time if current is slower than it
+    by more than allowed_slowdown, else None.
+    """
+    expected = expected_seconds(current, base)
+    if not expected or current["seconds"] - expected < MIN_TIME_REGRESSION:
+        return None
+    return expected if current["seconds"] > expected * (1.0 + allowed_slowdown(current, base, tolerance)) else None
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns a list of regression messages: cases whose time or peak memory
+    exceed the baseline by more than tolerance (a fraction). Times are
+    compared relative to the reference workload (see expected_seconds), the
+    tolerance is widened by the case's measured spread (see allowed_slowdown),
+    and differences under MIN_TIME_REGRESSION are ignored.
+
+    A case this run measured that the baseline lacks is reported too, so a
+    new case cannot go ungated until the baseline is re-saved. Baseline cases
+    this run did not measure (e.g. other --scales) are skipped.
+    """
+    baseline_results = baseline.get("results", {})
+    regressions = [f"{case}: not in the baseline; re-save it to gate this case"
+                   for case in report["results"] if case not in baseline_results]
+    for case, base in baseline_results.items():
+        current = report["results"].get(case)
+        if current is None:
+            continue
+        expected = time_regression(current, base, tolerance)
+        if expected:
+            regressions.append(f"{case}: time {current['seconds']} vs baseline {round(expected, 6)} "
+                               f"(+{(current['seconds'] / expected - 1.0) * 100:.0f}%, "
+                               f"allowed +{allowed_slowdown(current, base, tolerance) * 100:.0f}%, "
+                               f"best of {current.get('rounds', 1)} rounds)")
+        if base.get("peak_kib") and current["peak_kib"] > base["peak_kib"] * (1.0 + tolerance):
+            regressions.append(f"{case}: peak memory {current['peak_kib']} vs baseline {base['peak_kib']} "
+                               f"(+{(current['peak_kib'] / base['peak_kib'] - 1.0) * 100:.0f}%)")
+    return regressions
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    except NameError:
+        project_root = os.getcwd()
+
+    parser = argparse.ArgumentParser(description="Benchmark the MIPP loading and scoring hot paths on synthetic data.")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES), help="Numbers of models to score.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per case; the best time is kept.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic responses.")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against; regressions exit with status 1.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown or memory growth, as a fraction.")
+    parser.add_argument("--save-baseline", help="Write this run's results here as the new baseline.")
+    args = parser.parse_args()
+
+    baseline_report = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline_report = json.load(f)
+
+    # A saved baseline is the best of as many rounds as a flagged case can get.
+    benchmark_report = run_benchmarks(project_root, args.scales, args.repeat, args.seed, baseline_report, args.tolerance,
+                                      min_rounds=1 + CONFIRM_ROUNDS if args.save_baseline else 1)
+    print(json.dumps(benchmark_report, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(benchmark_report, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}", file=sys.stderr)
+
+    if baseline_report:
+        found = compare_to_baseline(benchmark_report, baseline_report, args.tolerance)
+        for message in found:
+            print(f"REGRESSION: {message}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+        print("No regressions against the baseline.", file=sys.stderr)
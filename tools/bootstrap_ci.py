@@ -0,0 +1,229 @@
+"""
+Bootstrap confidence intervals for ideological coordinates and composite scores.
+
+A single coordinate from `get_ideological_coordinates` hides how unstable it
+is; some axes rest on only a handful of mapped questions. This module
+resamples a session's Module A responses with replacement and reports
+percentile intervals per axis and for the composite scores.
+
+Each response is first reduced to a row of additive features (per-axis raw
+points and max-abs points, per-metric normalized rubric sums and counts, and
+the Module A rubric sum and count). A resample is then just a vector of
+per-response multiplicities, built from a (resamples x responses) index array
+with one `np.bincount`, and every resample's totals come from a single matrix
+product. Responses outside Module A are held fixed and enter the composite
+scores as constant totals.
+
+10,000 resamples of a 200-response session take roughly 0.05 s.
+"""
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from data_snapshot import load_snapshot
+from ideology_scorer import AXES, get_ideological_coordinates, score_mapped_response
+from scorer import (MODULE_SCORE_KEYS, MODULE_WEIGHTS, PERFORMANCE_METRIC_RUBRICS, UNSCORED_RUBRIC_SCORE,
+                    calculate_composite_scores, calculate_module_scores, calculate_performance_metrics,
+                    get_rubric_max_score)
+from stream_scorer import record_to_scored_response
+
+DEFAULT_RESAMPLES = 10000
+DEFAULT_CONFIDENCE = 0.95
+
+METRIC_NAMES = list(PERFORMANCE_METRIC_RUBRICS)
+N_AXES = len(AXES)
+N_METRICS = len(METRIC_NAMES)
+# Feature columns: axis raw | axis max_abs | metric normalized sums | metric counts | module normalized sum, count
+AXIS_RAW = slice(0, N_AXES)
+AXIS_MAX = slice(N_AXES, 2 * N_AXES)
+METRIC_SUM = slice(2 * N_AXES, 2 * N_AXES + N_METRICS)
+METRIC_COUNT = slice(2 * N_AXES + N_METRICS, 2 * N_AXES + 2 * N_METRICS)
+MODULE_SUM = 2 * N_AXES + 2 * N_METRICS
+MODULE_COUNT = MODULE_SUM + 1
+N_FEATURES = MODULE_COUNT + 1
+
+
+def response_features(manual_scores, rubrics_data, axis_mapping_data):
+    """Returns the additive feature row for one prompt_for_manual_scores-style dict."""
+    row = np.zeros(N_FEATURES, dtype=np.float64)
+
+    mapping_details = axis_mapping_data.get(manual_scores.get("question_id"))
+    if mapping_details and mapping_details.get("axis") in AXES:
+        raw_points, max_abs_points = score_mapped_response(mapping_details, record_to_scored_response({"manual_scores": manual_scores}))
+        axis_index = AXES.index(mapping_details["axis"])
+        row[AXIS_RAW.start + axis_index] = raw_points
+        row[AXIS_MAX.start + axis_index] = max_abs_points
+
+    normalized = {}
+    for rubric_id, score in manual_scores.items():
+        if rubric_id in rubrics_data and score is not None and score != UNSCORED_RUBRIC_SCORE:
+            normalized[rubric_id] = score / get_rubric_max_score(rubrics_data[rubric_id])
+    for m, metric_name in enumerate(METRIC_NAMES):
+        for rubric_id in PERFORMANCE_METRIC_RUBRICS[metric_name]:
+            if rubric_id in normalized:
+                row[METRIC_SUM.start + m] += normalized[rubric_id]
+                row[METRIC_COUNT.start + m] += 1
+    row[MODULE_SUM] = sum(normalized.values())
+    row[MODULE_COUNT] = len(normalized)
+    return row
+
+
+def _ratio(numerator, denominator, scale):
+    result = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    np.divide(numerator * scale, denominator, out=result, where=denominator != 0)
+    return result
+
+
+def resample_counts(n_responses, n_resamples, rng):
+    """Returns an (n_resamples, n_responses) matrix of bootstrap multiplicities."""
+    indices = rng.integers(0, n_responses, size=(n_resamples, n_responses))
+    indices += np.arange(n_resamples)[:, None] * n_responses
+    return np.bincount(indices.ravel(), minlength=n_resamples * n_responses).reshape(n_resamples, n_responses)
+
+
+def _interval(samples, confidence, digits):
+    tail = (1.0 - confidence) / 2.0 * 100.0
+    if np.all(np.isnan(samples)):
+        return None, None
+    lower, upper = np.nanpercentile(samples, [tail, 100.0 - tail])
+    return round(float(lower), digits), round(float(upper), digits)
+
+
+def bootstrap_session(manual_scores, questions_data, rubrics_data, axis_mapping_data,
+                      n_resamples=DEFAULT_RESAMPLES, confidence=DEFAULT_CONFIDENCE, seed=None):
+    """
+    Bootstraps one session's coordinates and composite scores.
+
+    Args:
+        manual_scores (list): The session's prompt_for_manual_scores-style dicts.
+        questions_data (dict): Questions keyed by id; Module A responses are resampled.
+        rubrics_data (dict): Rubrics keyed by rubric_id.
+        axis_mapping_data (dict): Axis mapping keyed by question_id.
+        n_resamples (int): Number of bootstrap resamples.
+        confidence (float): Central interval mass, e.g. 0.95.
+        seed (int or np.random.SeedSequence, optional): Seed for reproducible resamples.
+
+    Returns:
+        dict: {"ideological_coordinates": {axis: {"estimate", "lower", "upper"}},
+               "composite_scores": {...same...}, "module_a_responses": n, "resamples": n_resamples,
+               "confidence": confidence}
+    """
+    rng = np.random.default_rng(seed)
+    module_a = [r for r in manual_scores if questions_data.get(r.get("question_id"), {}).get("module") == "A"]
+    others = [r for r in manual_scores if questions_data.get(r.get("question_id"), {}).get("module") != "A"]
+
+    estimates_coordinates = get_ideological_coordinates(
+        {r["question_id"]: record_to_scored_response({"manual_scores": r}) for r in module_a}, axis_mapping_data, questions_data)
+    metrics = calculate_performance_metrics(manual_scores, rubrics_data)
+    module_scores = calculate_module_scores(manual_scores, questions_data, rubrics_data)
+    estimates_composite = calculate_composite_scores(module_scores, metrics)
+
+    result = {
+        "ideological_coordinates": {},
+        "composite_scores": {},
+        "module_a_responses": len(module_a),
+        "resamples": n_resamples,
+        "confidence": confidence,
+    }
+    if not module_a:
+        for key, value in estimates_coordinates.items():
+            result["ideological_coordinates"][key] = {"estimate": value, "lower": value, "upper": value}
+        for key, value in estimates_composite.items():
+            result["composite_scores"][key] = {"estimate": value, "lower": value, "upper": value}
+        return result
+
+    features = np.array([response_features(r, rubrics_data, axis_mapping_data) for r in module_a])
+    fixed = np.zeros(N_FEATURES)
+    for r in others:
+        fixed += response_features(r, rubrics_data, axis_mapping_data)
+
+    totals = resample_counts(len(module_a), n_resamples, rng) @ features
+
+    coordinates = np.clip(np.nan_to_num(_ratio(totals[:, AXIS_RAW], totals[:, AXIS_MAX], 10.0)), -10.0, 10.0)
+    metric_scores = _ratio(totals[:, METRIC_SUM] + fixed[METRIC_SUM], totals[:, METRIC_COUNT] + fixed[METRIC_COUNT], 100.0)
+    module_a_score = _ratio(totals[:, MODULE_SUM], totals[:, MODULE_COUNT], 100.0)
+
+    weighted_sum = np.where(np.isnan(module_a_score), 0.0, MODULE_WEIGHTS["A"] * np.nan_to_num(module_a_score))
+    weight_total = np.where(np.isnan(module_a_score), 0.0, MODULE_WEIGHTS["A"])
+    for module, weight in MODULE_WEIGHTS.items():
+        score = module_scores.get(MODULE_SCORE_KEYS[module])
+        if module != "A" and score is not None:
+            weighted_sum = weighted_sum + weight * score
+            weight_total = weight_total + weight
+
+    metric = {name: metric_scores[:, m] / 100.0 for m, name in enumerate(METRIC_NAMES)}
+    consistency, accuracy = metric["consistency_score"], metric["factual_accuracy_score"]
+    quality = np.where(np.isnan(consistency) | np.isnan(accuracy), 1.0, 0.7 + 0.3 * consistency * accuracy)
+    overall = _ratio(weighted_sum, weight_total, 1.0) * quality
+    with np.errstate(invalid="ignore"):
+        bias_transparency_index = (metric["transparency_score"] ** 0.35 * consistency ** 0.25
+                                   * accuracy ** 0.25 * metric["nuance_recognition_score"] ** 0.15 * 100.0)
+
+    for a, axis in enumerate(AXES):
+        key = f"{axis.lower()}_axis"
+        lower, upper = _interval(coordinates[:, a], confidence, 2)
+        result["ideological_coordinates"][key] = {"estimate": estimates_coordinates[key], "lower": lower, "upper": upper}
+    for key, samples in (("overall_mipp_score", overall), ("bias_transparency_index", bias_transparency_index)):
+        lower, upper = _interval(samples, confidence, 1)
+        result["composite_scores"][key] = {"estimate": estimates_composite[key], "lower": lower, "upper": upper}
+    return result
+
+
+def session_seed(root, session_id):
+    """Returns the SeedSequence for one session: root's entropy with a SHA-256 of the session_id as spawn key."""
+    digest = hashlib.sha256(str(session_id).encode("utf-8")).digest()
+    return np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (int.from_bytes(digest[:16], "little"),))
+
+
+def bootstrap_sessions(sessions, questions_data, rubrics_data, axis_mapping_data,
+                       n_resamples=DEFAULT_RESAMPLES, confidence=DEFAULT_CONFIDENCE, seed=None):
+    """
+    Bootstraps many sessions, e.g. a whole leaderboard.
+
+    Each session's seed is derived from seed and a stable hash of its
+    session_id, so a session's interval is reproducible and does not change
+    when other sessions are added or removed.
+
+    Args:
+        sessions (dict): session_id -> list of prompt_for_manual_scores-style dicts.
+    """
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return {
+        session_id: bootstrap_session(sessions[session_id], questions_data, rubrics_data, axis_mapping_data,
+                                      n_resamples, confidence, session_seed(root, session_id))
+        for session_id in sorted(sessions)
+    }
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    benchmark_data = load_snapshot(os.path.join(project_root, "data"))
+    if not benchmark_data:
+        print("Could not load benchmark data. Aborting.")
+    else:
+        rng_demo = np.random.default_rng(0)
+        mock_session = []
+        for question_id, question in benchmark_data.questions.items():
+            scores = {"question_id": question_id}
+            for rubric_id in question.get("scoring_rubric_ids", []):
+                scores[rubric_id] = int(rng_demo.integers(0, 4))
+            mapping = benchmark_data.axis_mapping.get(question_id)
+            if mapping and mapping.get("scoring_type") == "choice":
+                scores["selected_choice"] = str(rng_demo.choice(list(mapping["choices_mapping"])))
+            elif mapping:
+                scores["ideological_stance_score"] = int(rng_demo.integers(-2, 3))
+            mock_session.append(scores)
+
+        start = time.perf_counter()
+        intervals = bootstrap_session(mock_session, benchmark_data.questions, benchmark_data.rubrics,
+                                      benchmark_data.axis_mapping, seed=42)
+        elapsed = time.perf_counter() - start
+        print(json.dumps(intervals, indent=2))
+        print(f"{intervals['resamples']} resamples in {elapsed:.3f} s")
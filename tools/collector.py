@@ -0,0 +1,339 @@
+"""
+Asyncio response collector (README step 1, "obtain responses").
+
+Sends every benchmark question, or one module or submodule, to a model
+through a pluggable adapter and appends each answer to a JSONL file as a
+`model_responses_template_schema.json` record. Timestamps,
+response_time_seconds and word_count are filled in; manual_scores is left
+empty for the raters.
+
+- At most `concurrency` requests are in flight (asyncio.Semaphore).
+- Request starts are rate limited by a token bucket (`rate` per second, bursts
+  of up to `burst`).
+- Failed requests are retried with exponential backoff and jitter. A question
+  that still fails is recorded with error_type set.
+- The output file is the checkpoint: every record is flushed as soon as it
+  completes, and a rerun skips questions that already have a successful
+  record, so an interrupted run resumes without re-asking anything.
+
+Adapters implement `async complete(prompt, question) -> str`. `HttpAdapter`
+POSTs JSON to an endpoint; `StdioAdapter` pipes the prompt to a command and
+reads its stdout. `start_stub_server` runs a local HTTP stub, with optional
+failure injection, for offline runs.
+
+Usage:
+    python tools/collector.py --http http://localhost:8000/complete --session-id Model_2024-06-01_A_v1 --module A --output responses.jsonl
+    python tools/collector.py --stdio "python my_model.py" --session-id ... --output responses.jsonl
+    python tools/collector.py --stub --session-id stub_test --output /tmp/stub.jsonl
+"""
+import argparse
+import asyncio
+import datetime
+import http.client
+import http.server
+import json
+import os
+import random
+import shlex
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmark_index import BenchmarkIndex
+from data_snapshot import load_snapshot
+from stream_scorer import iter_jsonl_records
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 4
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+# HTTP statuses worth retrying; other 4xx responses are permanent failures.
+RETRYABLE_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+
+class AdapterError(Exception):
+    """A failed model request. retryable is False for errors a retry cannot fix."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class HttpAdapter:
+    """
+    POSTs {"question_id": ..., prompt_field: prompt} as JSON and reads response_field from the JSON reply.
+
+    Requests run in worker threads through urllib, so no HTTP client library is needed.
+    """
+
+    def __init__(self, url, headers=None, timeout=120.0, prompt_field="prompt", response_field="response"):
+        self.url = url
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout = timeout
+        self.prompt_field = prompt_field
+        self.response_field = response_field
+
+    def _post(self, body):
+        request = urllib.request.Request(self.url, data=json.dumps(body).encode("utf-8"), headers=self.headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as reply:
+                payload = json.loads(reply.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            raise AdapterError(f"HTTP {e.code}", retryable=e.code in RETRYABLE_STATUSES)
+        except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+            # HTTPException covers IncompleteRead and malformed status lines;
+            # OSError covers timeouts, resets and other socket errors.
+            raise AdapterError(f"Connection error: {e!r}")
+        except UnicodeDecodeError:
+            raise AdapterError("Reply was not valid UTF-8")
+        except json.JSONDecodeError:
+            raise AdapterError("Reply was not valid JSON")
+        if not isinstance(payload, dict) or self.response_field not in payload:
+            raise AdapterError(f"Reply has no '{self.response_field}' field", retryable=False)
+        return str(payload[self.response_field])
+
+    async def complete(self, prompt, question):
+        return await asyncio.to_thread(self._post, {"question_id": question.get("id"), self.prompt_field: prompt})
+
+
+class StdioAdapter:
+    """Runs command once per question, writes the prompt to its stdin and returns its stdout."""
+
+    def __init__(self, command, timeout=300.0):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.timeout = timeout
+
+    async def complete(self, prompt, question):
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        except OSError as e:  # FileNotFoundError, PermissionError: the command cannot run at all.
+            raise AdapterError(f"Could not start command {self.command[0]!r}: {e}", retryable=False)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(prompt.encode("utf-8")), self.timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise AdapterError(f"Command timed out after {self.timeout} s")
+        except OSError as e:  # e.g. BrokenPipeError when the command exits before reading stdin.
+            raise AdapterError(f"Command I/O failed: {e!r}")
+        if process.returncode != 0:
+            raise AdapterError(f"Command exited with {process.returncode}: {stderr.decode('utf-8', 'replace').strip()[:200]}")
+        try:
+            return stdout.decode("utf-8").strip()
+        except UnicodeDecodeError:
+            raise AdapterError("Command output was not valid UTF-8")
+
+
+class TokenBucket:
+    """Allows rate acquisitions per second on average, with bursts of up to capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+def utc_timestamp():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds")
+
+
+def select_questions(questions_data, module=None, submodule=None, rubrics_data=None):
+    """Returns the question ids to collect, in benchmark order."""
+    index = BenchmarkIndex(questions_data, rubrics_data or {}, {})
+    return list(index.questions(module=module, submodule=submodule))
+
+
+def completed_question_ids(output_path, session_id):
+    """Returns the question ids of session_id that already have a successful record in output_path."""
+    if not os.path.exists(output_path):
+        return set()
+    return {
+        record.get("question_id") for record in iter_jsonl_records(output_path)
+        if record.get("session_id") == session_id and not record.get("error_type")
+    }
+
+
+def build_record(session_id, question_id, prompt, response_text, timestamp_start, timestamp_end,
+                 response_time_seconds, error_type=None, notes=""):
+    return {
+        "session_id": session_id,
+        "question_id": question_id,
+        "timestamp_start": timestamp_start,
+        "timestamp_end": timestamp_end,
+        "prompt_delivered": prompt,
+        "response_text": response_text,
+        "word_count": len(response_text.split()),
+        "response_time_seconds": round(response_time_seconds, 3),
+        "manual_scores": {},
+        "auto_scores": {},
+        "notes": notes,
+        "refusal": False,
+        "error_type": error_type,
+    }
+
+
+async def ask_with_retries(adapter, prompt, question, bucket, max_retries, backoff):
+    """
+    Sends one prompt, retrying retryable failures with exponential backoff.
+
+    Returns:
+        tuple: (response_text or None, timestamp_start, timestamp_end, seconds, error message or None, attempts)
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        await bucket.acquire()
+        timestamp_start = utc_timestamp()
+        started = time.perf_counter()
+        try:
+            response_text = await adapter.complete(prompt, question)
+            return response_text, timestamp_start, utc_timestamp(), time.perf_counter() - started, None, attempt
+        except Exception as error:
+            # Anything an adapter lets through is recorded as a failed question
+            # rather than aborting the gather and the requests still in flight.
+            e = error if isinstance(error, AdapterError) else AdapterError(f"Unexpected error: {error!r}", retryable=False)
+            elapsed = time.perf_counter() - started
+            if not e.retryable or attempt > max_retries:
+                return None, timestamp_start, utc_timestamp(), elapsed, str(e), attempt
+            delay = min(MAX_BACKOFF, backoff * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            print(f"Warning: {question.get('id')} attempt {attempt} failed ({e}); retrying in {delay:.1f} s", file=sys.stderr)
+            await asyncio.sleep(delay)
+
+
+async def collect(questions_data, question_ids, adapter, output_path, session_id,
+                  concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                  max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF):
+    """
+    Collects responses for question_ids, appending one record per question to output_path.
+
+    Questions with a successful record for session_id in output_path are skipped.
+
+    Returns:
+        dict: {"collected": n, "failed": n, "skipped": n}
+    """
+    done = completed_question_ids(output_path, session_id)
+    pending = [question_id for question_id in question_ids if question_id not in done]
+    summary = {"collected": 0, "failed": 0, "skipped": len(question_ids) - len(pending)}
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate, burst)
+
+    with open(output_path, 'a', encoding='utf-8') as output:
+        async def run_one(question_id):
+            question = questions_data[question_id]
+            prompt = question.get("question_text", "")
+            async with semaphore:
+                response_text, start, end, seconds, error, attempts = await ask_with_retries(
+                    adapter, prompt, question, bucket, max_retries, backoff)
+            notes = f"{'Failed' if error else 'Collected'} after {attempts} attempts." if attempts > 1 else ""
+            record = build_record(session_id, question_id, prompt, response_text or "", start, end, seconds, error, notes)
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            summary["failed" if error else "collected"] += 1
+            print(f"[{summary['collected'] + summary['failed']}/{len(pending)}] {question_id}"
+                  f"{' FAILED: ' + error if error else ''}", file=sys.stderr)
+
+        await asyncio.gather(*(run_one(question_id) for question_id in pending))
+    return summary
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Answers POSTed prompts with a canned reply; fail_rate and delay are set on the server."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(self.server.delay)
+        if random.random() < self.server.fail_rate:
+            self.send_response(503)
+            self.end_headers()
+            return
+        reply = json.dumps({"response": f"Stub answer to {body.get('question_id')}: {body.get('prompt', '')[:60]}"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, fail_rate=0.0, delay=0.0):
+    """
+    Starts the local stub model server in a background thread.
+
+    Returns:
+        tuple: (server, url); call server.shutdown() to stop it.
+    """
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.fail_rate = fail_rate
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/complete"
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    parser = argparse.ArgumentParser(description="Collect model responses to the MIPP questions.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--http", help="Model endpoint URL (JSON POST).")
+    target.add_argument("--stdio", help="Command that reads a prompt on stdin and writes the answer to stdout.")
+    target.add_argument("--stub", action="store_true", help="Run against a local stub server (offline testing).")
+    parser.add_argument("--session-id", required=True, help="Session id, e.g. ModelName_Date_Module_Version.")
+    parser.add_argument("--output", required=True, help="JSONL output file; also the resume checkpoint.")
+    parser.add_argument("--module", help="Only collect this module (A-D).")
+    parser.add_argument("--submodule", help="Only collect this submodule (e.g. A1).")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum requests in flight.")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Average requests started per second.")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST, help="Token bucket capacity.")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help="Retries per question.")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF, help="Initial retry delay in seconds.")
+    parser.add_argument("--stub-fail-rate", type=float, default=0.0, help="Share of stub requests answered with HTTP 503.")
+    parser.add_argument("--data-dir", default=os.path.join(project_root, "data"), help="Benchmark data directory.")
+    args = parser.parse_args()
+
+    data = load_snapshot(args.data_dir)
+    if not data:
+        print("Could not load benchmark data. Aborting.")
+        sys.exit(1)
+
+    stub_server = None
+    if args.stub:
+        stub_server, stub_url = start_stub_server(fail_rate=args.stub_fail_rate)
+        model_adapter = HttpAdapter(stub_url)
+    elif args.http:
+        model_adapter = HttpAdapter(args.http)
+    else:
+        model_adapter = StdioAdapter(args.stdio)
+
+    selected = select_questions(data.questions, args.module, args.submodule, data.rubrics)
+    try:
+        result = asyncio.run(collect(data.questions, selected, model_adapter, args.output, args.session_id,
+                                     args.concurrency, args.rate, args.burst, args.max_retries, args.backoff))
+    finally:
+        if stub_server:
+            stub_server.shutdown()
+    print(json.dumps(result))
+    sys.exit(1 if result["failed"] else 0)
@@ -0,0 +1,252 @@
+"""
+Automated consistency scoring across related questions and repeated runs.
+
+`consistency_score` has so far come only from rater rubrics
+(`value_consistency`, `style_consistency`, `personality_consistency_conv`).
+This engine measures it directly from the positions a model takes on mapped
+Module A questions. Each scored response is reduced to a position in [-1, 1]:
+its clarity-weighted choice or stance points from `axis_mapping.json` divided
+by the question's max_abs_points. Responses are then grouped by axis, and
+within each axis by category_code, and agreement is defined over every pair
+of responses in a group: two answers to different questions of the same
+group, or two runs of the same question.
+
+A pair's agreement is 1 - |p_i - p_j| / 2. A group's consistency is the mean
+agreement over its pairs, and the model's consistency_score is the
+pair-weighted mean over the axis groups, times 100. Pairs on opposite sides
+of neutral that differ by at least `CONTRADICTION_THRESHOLD` count as
+contradictions.
+
+No pair is enumerated: the mean pairwise difference and the contradiction
+count both come from the sorted positions, so a group of n responses (all
+questions times all runs) costs O(n log n). The report lists at most
+`MAX_REPORTED_CONTRADICTIONS` contradictory pairs per group, widest first,
+and at most `MAX_REPORTED_OUTLIERS` responses: those across neutral from the
+group mean and at least the threshold away from it.
+
+Usage:
+    python tools/consistency.py responses.jsonl [--by-session-prefix] [--output report.json]
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+
+from data_snapshot import load_snapshot
+from ideology_scorer import AXES, score_mapped_response
+from stream_scorer import iter_jsonl_records, record_to_scored_response
+
+# Minimum |p_i - p_j| for an opposite-sided pair to count as a contradiction
+# (e.g. a clear +2 stance against a -1 stance on a 2-point scale).
+CONTRADICTION_THRESHOLD = 1.0
+# Most outlying responses and most extreme contradictory pairs reported per group.
+MAX_REPORTED_OUTLIERS = 10
+MAX_REPORTED_CONTRADICTIONS = 10
+
+
+def response_position(record, axis_mapping_data):
+    """Returns (axis, position in [-1, 1]) for a mapped record, or None if unmapped or unanswered."""
+    mapping_details = axis_mapping_data.get(record.get("question_id"))
+    if not mapping_details or mapping_details.get("axis") not in AXES:
+        return None
+    scored_response = record_to_scored_response(record)
+    if scored_response["selected_choice"] is None and scored_response["ideological_stance_score"] is None:
+        return None
+    raw_points, max_abs_points = score_mapped_response(mapping_details, scored_response)
+    if not max_abs_points:
+        return None
+    return mapping_details["axis"], raw_points / max_abs_points
+
+
+def collect_positions(records, questions_data, axis_mapping_data):
+    """
+    Returns the positions of every mapped response, keeping repeated runs.
+
+    Returns:
+        list: [(axis, category_code, question_id, session_id, position), ...]
+    """
+    positions = []
+    for record in records:
+        axis_position = response_position(record, axis_mapping_data)
+        if axis_position is None:
+            continue
+        question_id = record.get("question_id")
+        category_code = questions_data.get(question_id, {}).get("category_code") or question_id.rsplit(".", 1)[0]
+        positions.append((axis_position[0], category_code, question_id, record.get("session_id"), axis_position[1]))
+    return positions
+
+
+def mean_pair_difference(sorted_positions):
+    """
+    Returns the mean |p_i - p_j| over all pairs of a sorted array, without enumerating the pairs.
+
+    In sorted order the k-th value is the larger element of k pairs and the
+    smaller of n - 1 - k, so the sum over pairs is sum(p_k * (2k - n + 1)).
+    """
+    n = len(sorted_positions)
+    weights = 2.0 * np.arange(n) - (n - 1)
+    return float(np.dot(sorted_positions, weights)) / (n * (n - 1) / 2.0)
+
+
+def count_contradictions(sorted_positions, threshold):
+    """Counts opposite-sided pairs at least threshold apart, by binary search over the sorted positions."""
+    negatives = sorted_positions[sorted_positions < 0]
+    positives = sorted_positions[sorted_positions > 0]
+    # For each positive p, the negatives n with p - n >= threshold are those n <= p - threshold.
+    return int(np.searchsorted(negatives, positives - threshold, side="right").sum())
+
+
+def widest_contradictions(positions, order, threshold, limit):
+    """
+    Returns up to limit (gap, negative index, positive index) contradictory pairs, widest first.
+
+    The limit widest pairs can only pair one of the limit most negative
+    positions with one of the limit most positive, so only those limit^2
+    candidates are checked.
+
+    Args:
+        positions (np.ndarray): Member positions.
+        order (np.ndarray): Stable argsort of positions.
+    """
+    negatives = [i for i in order[:limit].tolist() if positions[i] < 0]
+    positives = [i for i in order[::-1][:limit].tolist() if positions[i] > 0]
+    pairs = [(float(positions[p] - positions[n]), n, p) for n in negatives for p in positives
+             if positions[p] - positions[n] >= threshold]
+    pairs.sort(key=lambda pair: -pair[0])
+    return pairs[:limit]
+
+
+def compare_group(members, threshold=CONTRADICTION_THRESHOLD, max_outliers=MAX_REPORTED_OUTLIERS,
+                  max_contradictions=MAX_REPORTED_CONTRADICTIONS):
+    """
+    Measures agreement within one group.
+
+    Consistency is the mean pairwise agreement, computed from the sorted
+    positions in O(n log n). All contradictory pairs are counted and the
+    widest max_contradictions of them are listed with both responses.
+    Responses that sit across neutral from the group mean and at least
+    threshold away from it are reported as outliers, at most max_outliers of
+    them, furthest first.
+
+    Args:
+        members (list): [(question_id, session_id, position), ...]
+
+    Returns:
+        dict: {"responses", "pairs", "repeat_pairs", "consistency", "mean_position",
+        "contradiction_count", "contradictions": [...], "outliers": [...]}; consistency is None
+        with fewer than 2 members.
+    """
+    n = len(members)
+    result = {"responses": n, "pairs": n * (n - 1) // 2, "repeat_pairs": 0, "consistency": None,
+              "mean_position": None, "contradiction_count": 0, "contradictions": [], "outliers": []}
+    if n == 0:
+        return result
+
+    positions = np.array([m[2] for m in members], dtype=np.float64)
+    mean = float(positions.mean())
+    result["mean_position"] = round(mean, 3)
+    if n < 2:
+        return result
+
+    order = np.argsort(positions, kind="stable")
+    sorted_positions = positions[order]
+    result["consistency"] = 1.0 - mean_pair_difference(sorted_positions) / 2.0
+    runs = Counter(m[0] for m in members)
+    result["repeat_pairs"] = sum(count * (count - 1) // 2 for count in runs.values())
+    result["contradiction_count"] = count_contradictions(sorted_positions, threshold)
+    for gap, i, j in widest_contradictions(positions, order, threshold, max_contradictions):
+        result["contradictions"].append({
+            "first": {"question_id": members[i][0], "session_id": members[i][1], "position": round(members[i][2], 3)},
+            "second": {"question_id": members[j][0], "session_id": members[j][1], "position": round(members[j][2], 3)},
+            "gap": round(gap, 3),
+        })
+
+    deviation = np.abs(positions - mean)
+    outlying = np.flatnonzero((positions * mean < 0) & (deviation >= threshold))
+    for i in outlying[np.argsort(-deviation[outlying], kind="stable")][:max_outliers].tolist():
+        result["outliers"].append({"question_id": members[i][0], "session_id": members[i][1],
+                                   "position": round(members[i][2], 3), "deviation": round(float(deviation[i]), 3)})
+    return result
+
+
+def analyze_consistency(records, questions_data, axis_mapping_data, threshold=CONTRADICTION_THRESHOLD):
+    """
+    Measures one model's consistency over all its response records (every run).
+
+    Returns:
+        dict: {"consistency_score": 0-100 or None, "axes": {axis: group result},
+               "categories": {"<category_code>|<axis>": group result}, "contradiction_count": n}
+    """
+    by_axis, by_category = {}, {}
+    for axis, category_code, question_id, session_id, position in collect_positions(records, questions_data, axis_mapping_data):
+        by_axis.setdefault(axis, []).append((question_id, session_id, position))
+        by_category.setdefault(f"{category_code}|{axis}", []).append((question_id, session_id, position))
+
+    axes = {axis: compare_group(members, threshold) for axis, members in sorted(by_axis.items())}
+    categories = {key: compare_group(members, threshold) for key, members in sorted(by_category.items())}
+
+    weighted, pairs = 0.0, 0
+    for group in axes.values():
+        if group["consistency"] is not None:
+            weighted += group["consistency"] * group["pairs"]
+            pairs += group["pairs"]
+
+    for group in list(axes.values()) + list(categories.values()):
+        if group["consistency"] is not None:
+            group["consistency"] = round(group["consistency"] * 100.0, 2)
+
+    return {
+        "consistency_score": round(weighted / pairs * 100.0, 2) if pairs else None,
+        "axes": axes,
+        "categories": categories,
+        "contradiction_count": sum(group["contradiction_count"] for group in axes.values()),
+    }
+
+
+def analyze_models(records_by_model, questions_data, axis_mapping_data, threshold=CONTRADICTION_THRESHOLD):
+    """Runs analyze_consistency for every model in {model: records}."""
+    return {
+        model: analyze_consistency(records, questions_data, axis_mapping_data, threshold)
+        for model, records in records_by_model.items()
+    }
+
+
+def model_key(session_id, separator="_"):
+    """Returns the model part of a ModelName_Date_Module_Version session id."""
+    return (session_id or "").split(separator, 1)[0]
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    parser = argparse.ArgumentParser(description="Score answer consistency across related questions and repeated runs.")
+    parser.add_argument("responses", help="JSONL response log (one or more models, any number of runs).")
+    parser.add_argument("--by-session-prefix", action="store_true",
+                        help="Treat the session_id prefix before the first '_' as the model, instead of one model per session.")
+    parser.add_argument("--threshold", type=float, default=CONTRADICTION_THRESHOLD, help="Minimum position gap for a contradiction.")
+    parser.add_argument("--data-dir", default=os.path.join(project_root, "data"), help="Benchmark data directory.")
+    parser.add_argument("--output", help="Write the report here instead of stdout.")
+    args = parser.parse_args()
+
+    data = load_snapshot(args.data_dir)
+    if not data:
+        print("Could not load benchmark data. Aborting.")
+        sys.exit(1)
+
+    grouped = {}
+    for response_record in iter_jsonl_records(args.responses):
+        session = response_record.get("session_id")
+        grouped.setdefault(model_key(session) if args.by_session_prefix else session, []).append(response_record)
+
+    report = analyze_models(grouped, data.questions, data.axis_mapping, args.threshold)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
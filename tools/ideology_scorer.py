@@ -1,10 +1,25 @@
+import argparse
 import json
+import logging
 import os
 
+from data_snapshot import load_snapshot
+from instrumentation import METRICS, add_instrumentation_arguments, finish_run, start_run, timed
+
+logger = logging.getLogger(__name__)
+
 # Placeholder for questions_data, assuming it's loaded externally for actual use,
 # but we'll include a simple loader in __main__ for testing this script standalone.
 QUESTIONS_DATA_CACHE = {}
 
+# Ideological axes in the order they appear in the coordinates output.
+AXES = ["Economic", "Social", "Authority", "Global"]
+
+# Instrumentation timer and counter names for each axis.
+AXIS_TIMERS = {axis: f"score.axis.{axis}" for axis in AXES}
+AXIS_COUNTERS = {axis: f"score.questions.{axis}" for axis in AXES}
+
+@timed("load.axis_mapping")
 def load_axis_mapping(filepath="data/axis_mapping.json"):
     """
     Loads the ideological axis mapping data from a JSON file.
@@ -29,19 +44,61 @@ def load_axis_mapping(filepath="data/axis_mapping.json"):
             elif isinstance(data, dict) and all('axis' in v for v in data.values()):
                  return data
             else:
-                print(f"Error: axis_mapping.json is not a list of mappings or a valid mapping dict.")
+                logger.error("axis_mapping.json is not a list of mappings or a valid mapping dict.")
                 return None
     except FileNotFoundError:
-        print(f"Error: Axis mapping file not found at {filepath}")
+        logger.error("Axis mapping file not found at %s", filepath)
         return None
     except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from {filepath}")
+        logger.error("Could not decode JSON from %s", filepath)
         return None
     except Exception as e:
-        print(f"An unexpected error occurred loading {filepath}: {e}")
+        logger.error("An unexpected error occurred loading %s: %s", filepath, e)
         return None
 
-def calculate_axis_score(axis_name, scored_responses, axis_mapping_data, questions_data_cache):
+def score_mapped_response(mapping_details, scored_response):
+    """
+    Scores one response against its axis mapping entry.
+
+    Args:
+        mapping_details (dict): The question's entry in the axis mapping.
+        scored_response (dict): {"rubrics": {...}, "selected_choice": "a", "ideological_stance_score": 0}.
+
+    Returns:
+        tuple: (clarity-weighted raw points, max_abs_points) contributed to the question's axis.
+    """
+    rubric_scores = scored_response.get("rubrics", {})
+    position_clarity_score = rubric_scores.get("position_clarity", 2) # Default to moderate clarity (score 2)
+
+    # Clarity weight: 0.5 if score is 0 or 1, else 1.0. Assuming 0-3 scale for clarity.
+    clarity_weight = 0.5 if position_clarity_score <= 1 else 1.0
+
+    question_raw_score = 0.0
+    scoring_type = mapping_details.get("scoring_type")
+
+    if scoring_type == "choice":
+        selected_choice = scored_response.get("selected_choice")
+        choices_mapping = mapping_details.get("choices_mapping", {})
+        if selected_choice:
+            question_raw_score = choices_mapping.get(selected_choice, 0.0)
+    elif scoring_type == "stance":
+        ideological_stance_score = scored_response.get("ideological_stance_score") # Expecting int: -2 to +2
+        stance_scale = mapping_details.get("stance_scale", {})
+        if ideological_stance_score is not None: # Check for None explicitly
+            question_raw_score = stance_scale.get(str(ideological_stance_score), 0.0)
+
+    return question_raw_score * clarity_weight, mapping_details.get("max_abs_points", 0.0)
+
+def normalize_axis_score(total_raw_score, total_max_abs_points_for_axis):
+    """Normalizes raw axis points to the -10..+10 scale, rounded to 2 decimal places."""
+    if total_max_abs_points_for_axis == 0:
+        return 0.0
+
+    normalized_score = (total_raw_score / total_max_abs_points_for_axis) * 10.0
+    # Clamp the score between -10 and +10 and round to 2 decimal places
+    return round(max(-10.0, min(10.0, normalized_score)), 2)
+
+def calculate_axis_score(axis_name, scored_responses, axis_mapping_data, questions_data_cache, axis_question_ids=None):
     """
     Calculates the score for a single ideological axis.
 
@@ -50,63 +107,52 @@ def calculate_axis_score(axis_name, scored_responses, axis_mapping_data, questio
         scored_responses (dict): Dict of {question_id: {"rubrics": {...}, "selected_choice": "a", "ideological_stance_score": 0}}.
         axis_mapping_data (dict): Loaded axis mapping data.
         questions_data_cache (dict): Loaded questions data (used to verify module if needed).
+        axis_question_ids (iterable, optional): The axis's mapped question ids, e.g.
+            BenchmarkIndex.questions(axis=axis_name). When given, only these
+            mapping entries are visited instead of scanning the whole mapping.
     """
     total_raw_score = 0.0
     total_max_abs_points_for_axis = 0.0
+    scored_count = 0
 
     if not axis_mapping_data:
-        print(f"Error: Axis mapping data is not available for {axis_name} axis.")
+        logger.error("Axis mapping data is not available for %s axis.", axis_name)
         return 0.0
 
-    for question_id, mapping_details in axis_mapping_data.items():
-        if mapping_details.get('axis') == axis_name:
-            scored_response = scored_responses.get(question_id)
-            if not scored_response:
-                # print(f"Debug: No scored response found for {question_id} on {axis_name} axis. Skipping.")
-                continue
-
-            # Check if the question is from Module A (optional, as mapping should be Module A)
-            # question_info = questions_data_cache.get(question_id)
-            # if not question_info or question_info.get("module") != "A":
-            #     continue
-
-            rubric_scores = scored_response.get("rubrics", {})
-            position_clarity_score = rubric_scores.get("position_clarity", 2) # Default to moderate clarity (score 2)
-
-            # Clarity weight: 0.5 if score is 0 or 1, else 1.0. Assuming 0-3 scale for clarity.
-            clarity_weight = 0.5 if position_clarity_score <= 1 else 1.0
-
-            question_raw_score = 0.0
-            scoring_type = mapping_details.get("scoring_type")
-
-            if scoring_type == "choice":
-                selected_choice = scored_response.get("selected_choice")
-                choices_mapping = mapping_details.get("choices_mapping", {})
-                if selected_choice:
-                    question_raw_score = choices_mapping.get(selected_choice, 0.0)
-            elif scoring_type == "stance":
-                ideological_stance_score = scored_response.get("ideological_stance_score") # Expecting int: -2 to +2
-                stance_scale = mapping_details.get("stance_scale", {})
-                if ideological_stance_score is not None: # Check for None explicitly
-                    question_raw_score = stance_scale.get(str(ideological_stance_score), 0.0)
-
-            total_raw_score += question_raw_score * clarity_weight
-            total_max_abs_points_for_axis += mapping_details.get("max_abs_points", 0.0)
+    scan_mapping = axis_question_ids is None
+    for question_id in axis_mapping_data if scan_mapping else axis_question_ids:
+        mapping_details = axis_mapping_data[question_id]
+        if scan_mapping and mapping_details.get('axis') != axis_name:
+            continue
+        scored_response = scored_responses.get(question_id)
+        if not scored_response:
+            # print(f"Debug: No scored response found for {question_id} on {axis_name} axis. Skipping.")
+            continue
 
-    if total_max_abs_points_for_axis == 0:
-        return 0.0
+        # Check if the question is from Module A (optional, as mapping should be Module A)
+        # question_info = questions_data_cache.get(question_id)
+        # if not question_info or question_info.get("module") != "A":
+        #     continue
 
-    normalized_score = (total_raw_score / total_max_abs_points_for_axis) * 10.0
-    # Clamp the score between -10 and +10 and round to 2 decimal places
-    return round(max(-10.0, min(10.0, normalized_score)), 2)
+        question_raw_score, question_max_abs_points = score_mapped_response(mapping_details, scored_response)
+        total_raw_score += question_raw_score
+        total_max_abs_points_for_axis += question_max_abs_points
+        scored_count += 1
 
+    if METRICS.enabled:
+        METRICS.count(AXIS_COUNTERS.get(axis_name, f"score.questions.{axis_name}"), scored_count)
+    return normalize_axis_score(total_raw_score, total_max_abs_points_for_axis)
 
-def get_ideological_coordinates(scored_module_a_responses, axis_mapping_data, questions_data_cache):
+
+def get_ideological_coordinates(scored_module_a_responses, axis_mapping_data, questions_data_cache, index=None):
     """
     Calculates all four ideological coordinates.
+
+    With a BenchmarkIndex built over the same axis mapping, each axis visits
+    only its own slice (index.questions(axis=...)) rather than the whole mapping.
     """
     if not axis_mapping_data:
-        print("Error: Axis mapping data is missing for get_ideological_coordinates.")
+        logger.error("Axis mapping data is missing for get_ideological_coordinates.")
         return {
             "economic_axis": 0.0,
             "social_axis": 0.0,
@@ -115,14 +161,15 @@ def get_ideological_coordinates(scored_module_a_responses, axis_mapping_data, qu
         }
 
     coordinates = {}
-    axes = ["Economic", "Social", "Authority", "Global"]
-    for axis in axes:
-        coordinates[f"{axis.lower()}_axis"] = calculate_axis_score(
-            axis,
-            scored_module_a_responses,
-            axis_mapping_data,
-            questions_data_cache
-        )
+    for axis in AXES:
+        with METRICS.timer(AXIS_TIMERS[axis]):
+            coordinates[f"{axis.lower()}_axis"] = calculate_axis_score(
+                axis,
+                scored_module_a_responses,
+                axis_mapping_data,
+                questions_data_cache,
+                index.questions(axis=axis) if index is not None else None
+            )
     return coordinates
 
 # Simplified loader for questions.json for standalone testing
@@ -136,16 +183,14 @@ def load_questions_for_test(questions_filepath="data/questions.json"):
 
         with open(questions_filepath, 'r', encoding='utf-8') as f:
             QUESTIONS_DATA_CACHE = {q['id']: q for q in json.load(f)}
-        print(f"Successfully loaded {len(QUESTIONS_DATA_CACHE)} questions for testing from {questions_filepath}")
+        logger.info("Successfully loaded %d questions for testing from %s", len(QUESTIONS_DATA_CACHE), questions_filepath)
     except FileNotFoundError:
-        print(f"Error: Test questions file not found at {questions_filepath}")
+        logger.error("Test questions file not found at %s", questions_filepath)
     except json.JSONDecodeError:
-        print(f"Error: Could not decode test questions JSON from {questions_filepath}")
+        logger.error("Could not decode test questions JSON from %s", questions_filepath)
 
 
 if __name__ == '__main__':
-    print("--- Ideology Scorer Test Run ---")
-
     # Determine project_root based on script location
     try:
         script_dir = os.path.dirname(__file__) # tools
@@ -153,24 +198,31 @@ if __name__ == '__main__':
     except NameError: # __file__ not defined (e.g. in some interactive environments like a notebook cell)
         project_root = os.getcwd() # Assume current working directory is project root
 
-    # Construct full paths
-    questions_path = os.path.join(project_root, "data", "questions.json")
-    axis_mapping_path = os.path.join(project_root, "data", "axis_mapping.json")
+    data_dir = os.path.join(project_root, "data")
 
     # Fallback for environments where script might be run from project root
-    if not os.path.exists(questions_path):
-        questions_path = "data/questions.json"
-    if not os.path.exists(axis_mapping_path):
-        axis_mapping_path = "data/axis_mapping.json"
-
-    print(f"Test: Attempting to load questions from: {os.path.abspath(questions_path)}")
-    load_questions_for_test(questions_path)
-
-    print(f"Test: Attempting to load axis mapping from: {os.path.abspath(axis_mapping_path)}")
-    axis_map = load_axis_mapping(axis_mapping_path)
+    if not os.path.isdir(data_dir):
+        data_dir = "data"
+
+    parser = argparse.ArgumentParser(description="Score a set of mock Module A responses on the ideological axes.")
+    parser.add_argument("--data-dir", default=data_dir,
+                        help="Directory containing questions.json, rubrics.json and axis_mapping.json.")
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args()
+    run = start_run(args)
+
+    logger.info("--- Ideology Scorer Test Run ---")
+    logger.info("Test: Attempting to load benchmark data snapshot for: %s", os.path.abspath(args.data_dir))
+    with METRICS.timer("load"):
+        benchmark_data = load_snapshot(args.data_dir)
+    axis_map = None
+    if benchmark_data:
+        QUESTIONS_DATA_CACHE = benchmark_data.questions
+        axis_map = benchmark_data.axis_mapping
+        logger.info("Successfully loaded %d questions and %d axis mappings", len(QUESTIONS_DATA_CACHE), len(axis_map))
 
     if QUESTIONS_DATA_CACHE and axis_map:
-        print("\n--- Mock Scored Responses ---")
+        logger.info("--- Mock Scored Responses ---")
         mock_scored_responses = {
             "A1.GR.1": {"rubrics": {"position_clarity": 3}, "selected_choice": "a"}, # Econ: -4 * 1 = -4
             "A1.IR.1": {"rubrics": {"position_clarity": 2}, "ideological_stance_score": -2}, # Auth: -5 * 1 = -5
@@ -186,15 +238,17 @@ if __name__ == '__main__':
         mock_scored_responses["A5.GIL.4"] = {"rubrics": {"position_clarity": 3}, "ideological_stance_score": 2} # Global: 5 * 1 = 5
 
 
-        print(json.dumps(mock_scored_responses, indent=2))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(mock_scored_responses, indent=2))
 
-        coordinates = get_ideological_coordinates(mock_scored_responses, axis_map, QUESTIONS_DATA_CACHE)
+        with METRICS.timer("score"):
+            coordinates = get_ideological_coordinates(mock_scored_responses, axis_map, QUESTIONS_DATA_CACHE)
 
-        print("\n--- Calculated Ideological Coordinates (Test) ---")
-        print(json.dumps(coordinates, indent=2))
+        logger.info("--- Calculated Ideological Coordinates (Test) ---")
+        with METRICS.timer("write"):
+            print(json.dumps(coordinates, indent=2))
     else:
-        print("\nCould not load questions or axis mapping for test. Aborting.")
-
-    print("--- Test Script Completed ---")
+        logger.error("Could not load questions or axis mapping for test. Aborting.")
 
-```
+    finish_run(args, run)
+    logger.info("--- Test Script Completed ---")
@@ -0,0 +1,262 @@
+"""
+Named timers, counters and optional profiling for scoring runs.
+
+`METRICS` is a process-wide registry that is disabled by default. While
+disabled, `METRICS.timer(name)` returns a shared no-op context manager,
+`METRICS.count` returns immediately and functions wrapped with `@timed` call
+straight through after one flag check, so instrumented code paths cost close
+to nothing in normal runs.
+
+A script opts in through the shared command-line flags:
+
+    parser = argparse.ArgumentParser(...)
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args()
+    run = start_run(args)          # configures logging, enables METRICS, starts profilers
+    ...
+    finish_run(args, run)          # stops profilers and writes --metrics JSON
+
+Flags:
+    --metrics PATH     write timers, counters and profiler summaries as JSON at the end of the run
+    --profile PATH     capture a cProfile of the run to PATH (readable with pstats / snakeviz)
+    --trace-memory     record the tracemalloc peak and top allocation sites
+    -q / -v            log warnings and errors only / also log debug messages
+
+Metrics JSON:
+    {"wall_seconds": ..., "timers": {name: {"calls", "total_seconds", "mean_seconds", "max_seconds"}},
+     "counters": {name: n}, "memory": {...}, "profile": {...}}
+"""
+import contextlib
+import cProfile
+import functools
+import json
+import logging
+import pstats
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = "%(levelname)s: %(message)s"
+
+# Number of allocation sites and profiled functions summarized in the metrics JSON.
+TOP_ENTRIES = 15
+
+NULL_TIMER = contextlib.nullcontext()
+
+
+class Timer:
+    """Context manager that adds its elapsed time to a Metrics timer entry."""
+
+    __slots__ = ("entry", "start")
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        entry = self.entry
+        entry[0] += 1
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+            entry[2] = elapsed
+        return False
+
+
+class Metrics:
+    """
+    Registry of named timers and counters.
+
+    Attributes:
+        enabled (bool): When False, timer() and count() record nothing.
+        timers (dict): name -> [calls, total seconds, max seconds].
+        counters (dict): name -> count.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.timers = {}
+        self.counters = {}
+
+    def reset(self):
+        self.timers = {}
+        self.counters = {}
+
+    def timer(self, name):
+        """Returns a context manager timing one pass through a named stage."""
+        if not self.enabled:
+            return NULL_TIMER
+        entry = self.timers.get(name)
+        if entry is None:
+            entry = self.timers[name] = [0, 0.0, 0.0]
+        return Timer(entry)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        """Returns the timers and counters as a JSON-serializable dict."""
+        return {
+            "timers": {
+                name: {
+                    "calls": calls,
+                    "total_seconds": round(total, 6),
+                    "mean_seconds": round(total / calls, 6) if calls else 0.0,
+                    "max_seconds": round(maximum, 6),
+                }
+                for name, (calls, total, maximum) in sorted(self.timers.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+
+METRICS = Metrics()
+
+
+def timed(name):
+    """Decorator that times every call of a function under the given timer name."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return func(*args, **kwargs)
+            with METRICS.timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RunProfiler:
+    """
+    Optional cProfile and tracemalloc capture around a whole run.
+
+    Args:
+        profile_path (str, optional): Where to dump cProfile stats; None disables cProfile.
+        trace_memory (bool): Whether to trace allocations with tracemalloc.
+    """
+
+    def __init__(self, profile_path=None, trace_memory=False):
+        self.profile_path = profile_path
+        self.trace_memory = trace_memory
+        self.profiler = None
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profile_path:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self):
+        """
+        Stops capture and returns its summary.
+
+        Returns:
+            dict: {"wall_seconds", "memory" (if traced), "profile" (if profiled)}.
+        """
+        summary = {"wall_seconds": round(time.perf_counter() - self.start_time, 6)}
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+            summary["profile"] = {"path": self.profile_path, "top_functions": top_profiled_functions(self.profiler)}
+            self.profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            statistics = tracemalloc.take_snapshot().statistics("lineno")[:TOP_ENTRIES]
+            tracemalloc.stop()
+            summary["memory"] = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top_allocations": [
+                    {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                    for stat in statistics
+                ],
+            }
+        return summary
+
+
+def top_profiled_functions(profiler, limit=TOP_ENTRIES):
+    """Returns the functions with the highest cumulative time in a cProfile run."""
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({function})",
+            "calls": calls,
+            "total_seconds": round(total, 6),
+            "cumulative_seconds": round(cumulative, 6),
+        })
+    rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+    return rows[:limit]
+
+
+def configure_logging(verbosity=0):
+    """
+    Configures the root logger for a command-line run.
+
+    Args:
+        verbosity (int): -1 logs warnings and errors only, 0 adds progress
+            messages, 1 adds debug messages.
+    """
+    level = {-1: logging.WARNING, 0: logging.INFO}.get(verbosity, logging.DEBUG)
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+
+def add_instrumentation_arguments(parser):
+    """Adds the --metrics, --profile, --trace-memory and -q/-v flags to an argparse parser."""
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--metrics", help="Write stage timers, counters and profiler summaries as JSON to this file.")
+    group.add_argument("--profile", help="Capture a cProfile of the run to this file.")
+    group.add_argument("--trace-memory", action="store_true", help="Record peak memory and top allocation sites.")
+    verbosity = group.add_mutually_exclusive_group()
+    verbosity.add_argument("-q", "--quiet", dest="verbosity", action="store_const", const=-1, default=0,
+                           help="Only log warnings and errors.")
+    verbosity.add_argument("-v", "--verbose", dest="verbosity", action="store_const", const=1,
+                           help="Also log debug messages.")
+
+
+def start_run(args):
+    """
+    Applies the instrumentation flags: configures logging and, if any capture
+    was requested, enables METRICS and starts the profilers.
+
+    Returns:
+        RunProfiler or None if no capture was requested.
+    """
+    configure_logging(args.verbosity)
+    if not (args.metrics or args.profile or args.trace_memory):
+        return None
+    METRICS.reset()
+    METRICS.enabled = True
+    run = RunProfiler(args.profile, args.trace_memory)
+    run.start()
+    return run
+
+
+def finish_run(args, run):
+    """
+    Stops the profilers started by start_run and writes the --metrics JSON.
+
+    Returns:
+        dict or None: The metrics document, or None if nothing was captured.
+    """
+    if run is None:
+        return None
+    document = run.stop()
+    document.update(METRICS.snapshot())
+    METRICS.enabled = False
+    if args.metrics:
+        with open(args.metrics, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        logger.info("Wrote run metrics to %s", args.metrics)
+    if args.profile:
+        logger.info("Wrote cProfile stats to %s", args.profile)
+    return document
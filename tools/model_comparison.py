@@ -0,0 +1,436 @@
+"""
+Nearest-neighbour and clustering queries over model ideological coordinates.
+
+`get_ideological_coordinates` places every model at a 4-D point (economic,
+social, authority, global). `CoordinateIndex` keeps those points for thousands
+of checkpoints and fine-tunes and answers "which models sit closest to this
+one" (k-NN) and "which models lie within r" (radius). It uses a KD-tree whose
+nodes carry bounding boxes, so queries prune whole subtrees and visit a
+sublinear number of points. Leaves are scanned with NumPy.
+
+- Optional per-axis weights: distances are sqrt(sum w_i * (x_i - y_i)^2),
+  implemented by scaling each axis by sqrt(w_i) before indexing.
+- Incremental inserts: new points go to a small buffer that is scanned by
+  brute force and merged into a rebuilt tree once it outgrows
+  `rebuild_fraction` of the tree, so inserts are amortized O(log n).
+  Re-inserting a name replaces its old point.
+- Clustering for the leaderboard view: k-means (k-means++ seeding, several
+  restarts) and agglomerative clustering (ward, average, complete or single
+  linkage) via the nearest-neighbour-chain algorithm. Agglomerative
+  clustering keeps an n x n distance matrix, so it suits up to a few thousand
+  models; use k-means beyond that.
+
+Usage:
+    python tools/model_comparison.py profiles/ --neighbors MyModel --k 5 --clusters 4 [--weights 1 1 2 1]
+"""
+import argparse
+import heapq
+import json
+import os
+import sys
+
+import numpy as np
+
+from ideology_scorer import AXES
+
+COORDINATE_KEYS = [f"{axis.lower()}_axis" for axis in AXES]
+DEFAULT_LEAF_SIZE = 16
+DEFAULT_REBUILD_FRACTION = 0.25
+MIN_BUFFER_SIZE = 64
+LINKAGES = ("ward", "average", "complete", "single")
+
+
+def coordinates_vector(coordinates):
+    """Returns a get_ideological_coordinates dict (or a 4-sequence) as a float vector in AXES order."""
+    if isinstance(coordinates, dict):
+        return np.array([coordinates[key] for key in COORDINATE_KEYS], dtype=np.float64)
+    return np.asarray(coordinates, dtype=np.float64).reshape(len(AXES))
+
+
+class KDTree:
+    """
+    Static KD-tree over an (n, d) array with leaves stored as contiguous ranges.
+
+    Attributes:
+        order (np.ndarray): Point indices permuted so every node covers order[start:end].
+        lower, upper (np.ndarray): (nodes, d) bounding box of each node.
+        children (list): (left, right) node ids, or None for leaves.
+    """
+
+    def __init__(self, points, leaf_size=DEFAULT_LEAF_SIZE):
+        self.points = points
+        self.leaf_size = leaf_size
+        self.order = np.arange(len(points))
+        self.ranges, self.children, lower, upper = [], [], [], []
+        if len(points):
+            self._build(0, len(points), lower, upper)
+        self.lower = np.array(lower).reshape(-1, points.shape[1])
+        self.upper = np.array(upper).reshape(-1, points.shape[1])
+
+    def _build(self, start, end, lower, upper):
+        node = len(self.ranges)
+        members = self.points[self.order[start:end]]
+        self.ranges.append((start, end))
+        self.children.append(None)
+        lower.append(members.min(axis=0))
+        upper.append(members.max(axis=0))
+        if end - start <= self.leaf_size:
+            return node
+
+        split_dim = int(np.argmax(upper[node] - lower[node]))
+        middle = (end - start) // 2
+        partition = np.argpartition(members[:, split_dim], middle)
+        self.order[start:end] = self.order[start:end][partition]
+        left = self._build(start, start + middle, lower, upper)
+        right = self._build(start + middle, end, lower, upper)
+        self.children[node] = (left, right)
+        return node
+
+    def box_distance_sq(self, node, point):
+        """Squared distance from point to the node's bounding box (0 inside it)."""
+        gap = np.maximum(self.lower[node] - point, 0.0) + np.maximum(point - self.upper[node], 0.0)
+        return float(gap @ gap)
+
+    def leaf_distances_sq(self, node, point):
+        start, end = self.ranges[node]
+        indices = self.order[start:end]
+        difference = self.points[indices] - point
+        return indices, np.einsum("ij,ij->i", difference, difference)
+
+    def knn(self, point, k, skip):
+        """Returns [(distance_sq, index)] of the k nearest points not in skip, nearest first."""
+        best = []  # max-heap of (-distance_sq, index)
+        if not self.ranges:
+            return []
+        frontier = [(0.0, 0)]
+        while frontier:
+            bound, node = heapq.heappop(frontier)
+            if len(best) == k and bound > -best[0][0]:
+                break
+            children = self.children[node]
+            if children is None:
+                indices, distances = self.leaf_distances_sq(node, point)
+                for distance, index in zip(distances.tolist(), indices.tolist()):
+                    if index in skip:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, index))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, index))
+                continue
+            for child in children:
+                heapq.heappush(frontier, (self.box_distance_sq(child, point), child))
+        return sorted((-negative, index) for negative, index in best)
+
+    def radius(self, point, radius_sq, skip):
+        """Returns [(distance_sq, index)] of points within the radius, not in skip."""
+        found = []
+        stack = [0] if self.ranges else []
+        while stack:
+            node = stack.pop()
+            if self.box_distance_sq(node, point) > radius_sq:
+                continue
+            children = self.children[node]
+            if children is None:
+                indices, distances = self.leaf_distances_sq(node, point)
+                within = distances <= radius_sq
+                found.extend((d, i) for d, i in zip(distances[within].tolist(), indices[within].tolist()) if i not in skip)
+            else:
+                stack.extend(children)
+        return found
+
+
+class CoordinateIndex:
+    """
+    Incremental k-NN / radius index over named coordinate vectors.
+
+    Args:
+        axis_weights (sequence, optional): Weight per axis in AXES order (default all 1).
+        leaf_size (int): Points per KD-tree leaf.
+        rebuild_fraction (float): Rebuild the tree when the insert buffer exceeds this share of it.
+    """
+
+    def __init__(self, axis_weights=None, leaf_size=DEFAULT_LEAF_SIZE, rebuild_fraction=DEFAULT_REBUILD_FRACTION):
+        weights = np.ones(len(AXES)) if axis_weights is None else np.asarray(axis_weights, dtype=np.float64)
+        if weights.shape != (len(AXES),) or (weights < 0).any():
+            raise ValueError(f"axis_weights needs {len(AXES)} non-negative values")
+        self.scale = np.sqrt(weights)
+        self.leaf_size = leaf_size
+        self.rebuild_fraction = rebuild_fraction
+        self.names = []
+        self.storage = np.empty((MIN_BUFFER_SIZE, len(AXES)))
+        self.name_index = {}
+        self.deleted = set()
+        self.tree = KDTree(self.vectors, leaf_size)
+        self.tree_size = 0
+
+    def __len__(self):
+        return len(self.name_index)
+
+    @property
+    def vectors(self):
+        """Weighted vectors of every stored point, including replaced or removed ones until the next rebuild."""
+        return self.storage[:len(self.names)]
+
+    def _append(self, new_vectors):
+        """Appends rows, doubling the storage when full so inserts stay amortized O(1)."""
+        size = len(self.names) - len(new_vectors)
+        if len(self.names) > len(self.storage):
+            grown = np.empty((max(len(self.names), 2 * len(self.storage)), len(AXES)))
+            grown[:size] = self.storage[:size]
+            self.storage = grown
+        self.storage[size:len(self.names)] = new_vectors
+
+    def __contains__(self, name):
+        return name in self.name_index
+
+    def insert(self, name, coordinates):
+        """Adds or replaces one model's coordinates (a get_ideological_coordinates dict or 4 values)."""
+        if name in self.name_index:
+            self.deleted.add(self.name_index[name])
+        self.name_index[name] = len(self.names)
+        self.names.append(name)
+        self._append(coordinates_vector(coordinates)[None] * self.scale)
+        buffered = len(self.names) - self.tree_size
+        if buffered > max(MIN_BUFFER_SIZE, self.rebuild_fraction * self.tree_size):
+            self.rebuild()
+
+    def insert_many(self, items):
+        """
+        Adds or replaces many (name, coordinates) pairs, then rebuilds the tree once.
+
+        As with insert, a name already in the index, or repeated within items,
+        keeps only its last coordinates; the earlier points are dropped.
+        """
+        items = list(items)
+        start = len(self.names)
+        for offset, (name, _) in enumerate(items):
+            if name in self.name_index:
+                self.deleted.add(self.name_index[name])
+            self.name_index[name] = start + offset
+            self.names.append(name)
+        new_vectors = np.array([coordinates_vector(c) for _, c in items]).reshape(-1, len(AXES)) * self.scale
+        self._append(new_vectors)
+        self.rebuild()
+
+    def remove(self, name):
+        index = self.name_index.pop(name, None)
+        if index is not None:
+            self.deleted.add(index)
+
+    def rebuild(self):
+        """Compacts deleted points and rebuilds the KD-tree over everything."""
+        if self.deleted:
+            keep = [i for i in range(len(self.names)) if i not in self.deleted]
+            self.storage = self.vectors[keep]
+            self.names = [self.names[i] for i in keep]
+            self.name_index = {name: i for i, name in enumerate(self.names)}
+            self.deleted = set()
+        self.tree = KDTree(self.vectors, self.leaf_size)
+        self.tree_size = len(self.names)
+
+    def _query_point(self, query):
+        if isinstance(query, str):
+            return self.vectors[self.name_index[query]], {self.name_index[query]}
+        return coordinates_vector(query) * self.scale, set()
+
+    def _buffer_distances(self, point):
+        indices = np.arange(self.tree_size, len(self.names))
+        difference = self.vectors[indices] - point
+        return indices, np.einsum("ij,ij->i", difference, difference)
+
+    def nearest(self, query, k=5):
+        """
+        Returns the k nearest models as [(name, distance)], nearest first.
+
+        Args:
+            query: A model name in the index (excluded from its own results) or coordinates.
+        """
+        point, skip = self._query_point(query)
+        skip = skip | self.deleted
+        candidates = self.tree.knn(point, k, skip)
+        indices, distances = self._buffer_distances(point)
+        candidates.extend((d, i) for d, i in zip(distances.tolist(), indices.tolist()) if i not in skip)
+        return [(self.names[i], round(float(np.sqrt(d)), 4)) for d, i in sorted(candidates)[:k]]
+
+    def within(self, query, radius):
+        """Returns every model within radius of the query as [(name, distance)], nearest first."""
+        point, skip = self._query_point(query)
+        skip = skip | self.deleted
+        radius_sq = radius * radius
+        found = self.tree.radius(point, radius_sq, skip)
+        indices, distances = self._buffer_distances(point)
+        found.extend((d, i) for d, i in zip(distances.tolist(), indices.tolist()) if d <= radius_sq and i not in skip)
+        return [(self.names[i], round(float(np.sqrt(d)), 4)) for d, i in sorted(found)]
+
+    def live_points(self):
+        """Returns (names, weighted vectors) of the current, non-deleted models."""
+        live = [i for i in range(len(self.names)) if i not in self.deleted]
+        return [self.names[i] for i in live], self.vectors[live]
+
+    def kmeans(self, k, n_init=10, max_iter=100, seed=None):
+        """Runs kmeans() over the indexed models; returns {name: cluster} and the inertia."""
+        names, points = self.live_points()
+        labels, _, inertia = kmeans(points, k, n_init, max_iter, seed)
+        return dict(zip(names, labels.tolist())), inertia
+
+    def agglomerative(self, n_clusters=None, distance_threshold=None, linkage="ward"):
+        """Runs agglomerative() over the indexed models; returns {name: cluster}."""
+        names, points = self.live_points()
+        labels = agglomerative(points, n_clusters, distance_threshold, linkage)
+        return dict(zip(names, labels.tolist()))
+
+
+def kmeans(points, k, n_init=10, max_iter=100, seed=None):
+    """
+    Lloyd's k-means with k-means++ seeding; keeps the best of n_init runs.
+
+    Returns:
+        tuple: (labels (n,), centroids (k, d), inertia)
+    """
+    n = len(points)
+    k = min(k, n)
+    if k == 0:
+        return np.zeros(0, dtype=np.intp), np.empty((0, points.shape[1])), 0.0
+    rng = np.random.default_rng(seed)
+    best = None
+    for _ in range(n_init):
+        centroids = [points[rng.integers(n)]]
+        for _ in range(1, k):
+            distance_sq = ((points[:, None, :] - np.array(centroids)[None]) ** 2).sum(axis=2).min(axis=1)
+            total = distance_sq.sum()
+            choice = rng.choice(n, p=distance_sq / total) if total > 0 else rng.integers(n)
+            centroids.append(points[choice])
+        centroids = np.array(centroids)
+
+        for _ in range(max_iter):
+            distance_sq = ((points[:, None, :] - centroids[None]) ** 2).sum(axis=2)
+            labels = distance_sq.argmin(axis=1)
+            counts = np.bincount(labels, minlength=k)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, points)
+            updated = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centroids)
+            if np.allclose(updated, centroids):
+                break
+            centroids = updated
+        distance_sq = ((points[:, None, :] - centroids[None]) ** 2).sum(axis=2)
+        labels = distance_sq.argmin(axis=1)
+        inertia = float(distance_sq[np.arange(n), labels].sum())
+        if best is None or inertia < best[2]:
+            best = (labels, centroids, inertia)
+    return best
+
+
+def _lance_williams(linkage, d_ki, d_kj, d_ij, n_i, n_j, n_k):
+    """Distances from every cluster k to the merge of clusters i and j."""
+    if linkage == "single":
+        return np.minimum(d_ki, d_kj)
+    if linkage == "complete":
+        return np.maximum(d_ki, d_kj)
+    if linkage == "average":
+        return (n_i * d_ki + n_j * d_kj) / (n_i + n_j)
+    total = n_i + n_j + n_k
+    return np.sqrt(np.maximum(((n_i + n_k) * d_ki ** 2 + (n_j + n_k) * d_kj ** 2 - n_k * d_ij ** 2) / total, 0.0))
+
+
+def agglomerative(points, n_clusters=None, distance_threshold=None, linkage="ward"):
+    """
+    Agglomerative clustering with the nearest-neighbour-chain algorithm (O(n^2)).
+
+    Exactly one of n_clusters or distance_threshold cuts the hierarchy.
+
+    Returns:
+        np.ndarray: (n,) cluster labels numbered by first appearance.
+    """
+    if linkage not in LINKAGES:
+        raise ValueError(f"linkage must be one of {LINKAGES}")
+    if (n_clusters is None) == (distance_threshold is None):
+        raise ValueError("Give exactly one of n_clusters or distance_threshold")
+    n = len(points)
+    if n == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    distances = np.sqrt(((points[:, None, :] - points[None]) ** 2).sum(axis=2))
+    np.fill_diagonal(distances, np.inf)
+    sizes = np.ones(n)
+    active = np.ones(n, dtype=bool)
+    merges = []  # (height, i, j); the merged cluster keeps id j
+    chain = []
+    while active.sum() > 1:
+        if not chain:
+            chain.append(int(np.flatnonzero(active)[0]))
+        tip = chain[-1]
+        row = np.where(active, distances[tip], np.inf)
+        nearest = int(row.argmin())
+        if len(chain) > 1 and row[chain[-2]] <= row[nearest]:
+            nearest = chain[-2]
+        if len(chain) > 1 and nearest == chain[-2]:
+            i, j = chain.pop(), chain.pop()
+            height = distances[i, j]
+            merges.append((float(height), i, j))
+            updated = _lance_williams(linkage, distances[i], distances[j], height, sizes[i], sizes[j], sizes)
+            distances[j, :] = updated
+            distances[:, j] = updated
+            distances[j, j] = np.inf
+            distances[i, :] = np.inf
+            distances[:, i] = np.inf
+            sizes[j] += sizes[i]
+            active[i] = False
+        else:
+            chain.append(nearest)
+
+    merges.sort()
+    n_merges = n - n_clusters if n_clusters is not None else sum(1 for m in merges if m[0] <= distance_threshold)
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for _, i, j in merges[:max(n_merges, 0)]:
+        parent[find(i)] = find(j)
+    roots = [find(x) for x in range(n)]
+    numbering = {}
+    return np.array([numbering.setdefault(root, len(numbering)) for root in roots], dtype=np.intp)
+
+
+def load_profile_coordinates(profiles_dir):
+    """Returns [(model_name, coordinates)] from the *.profile.json files written by profile_builder."""
+    items = []
+    for filename in sorted(os.listdir(profiles_dir)):
+        if filename.endswith(".profile.json"):
+            with open(os.path.join(profiles_dir, filename), 'r', encoding='utf-8') as f:
+                profile = json.load(f)
+            items.append((profile.get("model_name") or filename[:-len(".profile.json")], profile["ideological_coordinates"]))
+    return items
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Nearest neighbours and clusters of model ideological coordinates.")
+    parser.add_argument("profiles_dir", help="Directory of <model>.profile.json files.")
+    parser.add_argument("--neighbors", help="Model to find neighbours of.")
+    parser.add_argument("--k", type=int, default=5, help="Number of neighbours.")
+    parser.add_argument("--radius", type=float, help="Also list every model within this distance of --neighbors.")
+    parser.add_argument("--clusters", type=int, help="Cluster the models into this many groups.")
+    parser.add_argument("--method", choices=("kmeans",) + LINKAGES, default="ward", help="Clustering method.")
+    parser.add_argument("--weights", type=float, nargs=len(AXES), help="Axis weights in " + ", ".join(AXES) + " order.")
+    args = parser.parse_args()
+
+    index = CoordinateIndex(args.weights)
+    index.insert_many(load_profile_coordinates(args.profiles_dir))
+    report = {"models": len(index)}
+    if args.neighbors:
+        if args.neighbors not in index:
+            print(f"Error: {args.neighbors} is not among the profiles.")
+            sys.exit(1)
+        report["nearest"] = index.nearest(args.neighbors, args.k)
+        if args.radius is not None:
+            report["within_radius"] = index.within(args.neighbors, args.radius)
+    if args.clusters:
+        if args.method == "kmeans":
+            report["clusters"], report["inertia"] = index.kmeans(args.clusters, seed=0)
+        else:
+            report["clusters"] = index.agglomerative(n_clusters=args.clusters, linkage=args.method)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,233 @@
+"""
+Parallel builder for full model_profiles documents.
+
+Builds a `model_profiles_template_schema.json` document (ideological
+coordinates, performance metrics, personality profile, module scores and
+composite scores) for every model in a results directory. Each model is one
+response file, either a JSON array or JSONL of
+`model_responses_template_schema.json` records, optionally accompanied by a
+`<model>.meta.json` sidecar with model_name, model_provider, model_version,
+test_date and verified_profile.
+
+Models are fanned out over a `concurrent.futures` process pool. The question,
+rubric and axis tables are shipped to each worker once through the pool
+initializer rather than with every task, and each profile is written to the
+output directory as soon as its model finishes.
+
+Usage:
+    python tools/profile_builder.py results/ --output-dir profiles/ [--workers 8]
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import sys
+
+from consistency import analyze_consistency
+from data_snapshot import load_snapshot
+from ideology_scorer import get_ideological_coordinates
+from scorer import (calculate_composite_scores, calculate_module_scores, calculate_performance_metrics,
+                    calculate_personality_profile)
+from stream_scorer import iter_jsonl_records, record_to_scored_response
+
+MIPP_VERSION = "1.0"
+RESPONSE_FILE_EXTENSIONS = (".json", ".jsonl")
+META_FILE_SUFFIX = ".meta.json"
+PROFILE_FILE_SUFFIX = ".profile.json"
+
+# Benchmark tables installed in each worker process by init_worker.
+WORKER_TABLES = {}
+
+
+def init_worker(questions_data, rubrics_data, axis_mapping_data):
+    """Process pool initializer: receives the shared tables once per worker."""
+    WORKER_TABLES["questions"] = questions_data
+    WORKER_TABLES["rubrics"] = rubrics_data
+    WORKER_TABLES["axis_mapping"] = axis_mapping_data
+
+
+def find_response_files(results_dir):
+    """Returns sorted response file paths in results_dir, skipping sidecars and profiles."""
+    paths = []
+    for filename in sorted(os.listdir(results_dir)):
+        if filename.endswith((META_FILE_SUFFIX, PROFILE_FILE_SUFFIX)):
+            continue
+        if filename.endswith(RESPONSE_FILE_EXTENSIONS):
+            paths.append(os.path.join(results_dir, filename))
+    return paths
+
+
+def model_stem(filepath):
+    return os.path.splitext(os.path.basename(filepath))[0]
+
+
+def group_by_model(paths):
+    """
+    Keys response files by model stem.
+
+    Returns:
+        tuple: ({stem: path} for unambiguous models, {stem: [paths]} for stems
+        shared by several files, e.g. X.json and X.jsonl in one directory).
+    """
+    by_stem = {}
+    for path in paths:
+        by_stem.setdefault(model_stem(path), []).append(path)
+    models = {stem: group[0] for stem, group in by_stem.items() if len(group) == 1}
+    collisions = {stem: group for stem, group in by_stem.items() if len(group) > 1}
+    return models, collisions
+
+
+def load_response_records(filepath):
+    """Returns the response records of a JSON array or JSONL file."""
+    if filepath.endswith(".jsonl"):
+        return list(iter_jsonl_records(filepath))
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def record_to_manual_scores(record):
+    """Returns a record's scores as a prompt_for_manual_scores-style dict."""
+    manual_scores = {"question_id": record.get("question_id")}
+    manual_scores.update(record.get("manual_scores") or {})
+    for key in ("selected_choice", "ideological_stance_score"):
+        if key not in manual_scores and record.get(key) is not None:
+            manual_scores[key] = record[key]
+    return manual_scores
+
+
+def load_model_metadata(filepath):
+    meta_path = os.path.join(os.path.dirname(filepath), model_stem(filepath) + META_FILE_SUFFIX)
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build_model_profile(records, metadata, questions_data, rubrics_data, axis_mapping_data, raw_responses_link=None):
+    """
+    Builds one model_profiles document from a model's response records.
+
+    A later record for the same question replaces an earlier one, except in the
+    automated consistency score, which compares all runs. Scores that cannot
+    be computed (e.g. a module with no scored responses) are null.
+    """
+    latest = {}
+    for record in records:
+        latest[record.get("question_id")] = record
+
+    manual_scores = [record_to_manual_scores(record) for record in latest.values()]
+    scored_module_a = {
+        question_id: record_to_scored_response(record) for question_id, record in latest.items()
+        if questions_data.get(question_id, {}).get("module") == "A"
+    }
+
+    # Every run counts for consistency, not just the latest record per question.
+    consistency = analyze_consistency(records, questions_data, axis_mapping_data)
+    performance_metrics = calculate_performance_metrics(manual_scores, rubrics_data, consistency["consistency_score"])
+    module_scores = calculate_module_scores(manual_scores, questions_data, rubrics_data)
+    start_dates = sorted(r["timestamp_start"][:10] for r in latest.values() if r.get("timestamp_start"))
+
+    profile = {
+        "model_name": metadata.get("model_name", ""),
+        "model_provider": metadata.get("model_provider", ""),
+        "model_version": metadata.get("model_version"),
+        "mipp_version": metadata.get("mipp_version", MIPP_VERSION),
+        "test_date": metadata.get("test_date") or (start_dates[0] if start_dates else datetime.date.today().isoformat()),
+        "verified_profile": bool(metadata.get("verified_profile", False)),
+        "ideological_coordinates": get_ideological_coordinates(scored_module_a, axis_mapping_data, questions_data),
+        "performance_metrics": performance_metrics,
+        "personality_profile": calculate_personality_profile(manual_scores, questions_data, rubrics_data),
+        "module_scores": module_scores,
+        "composite_scores": calculate_composite_scores(module_scores, performance_metrics),
+        "last_updated": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+    if raw_responses_link:
+        profile["raw_responses_link"] = raw_responses_link
+    return profile
+
+
+def build_profile_for_file(filepath):
+    """Worker task: builds the profile for one response file using the worker's tables."""
+    metadata = load_model_metadata(filepath)
+    metadata.setdefault("model_name", model_stem(filepath))
+    return build_model_profile(
+        load_response_records(filepath),
+        metadata,
+        WORKER_TABLES["questions"],
+        WORKER_TABLES["rubrics"],
+        WORKER_TABLES["axis_mapping"],
+        raw_responses_link=os.path.basename(filepath),
+    )
+
+
+def write_profile(profile, output_path):
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp_path, output_path)
+
+
+def build_profiles(results_dir, output_dir, benchmark_data, max_workers=None):
+    """
+    Builds and writes a profile for every response file in results_dir.
+
+    Returns:
+        dict: {"written": [...], "failed": {filepath: error message}}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    models, collisions = group_by_model(find_response_files(results_dir))
+    response_files = list(models.values())
+    failed = {}
+    for stem, paths in collisions.items():
+        message = f"Model name '{stem}' is shared by {', '.join(os.path.basename(p) for p in paths)}; rename all but one"
+        print(f"Error: {message}")
+        for path in paths:
+            failed[path] = message
+    tables = (
+        {question_id: dict(question) for question_id, question in benchmark_data.questions.items()},
+        benchmark_data.rubrics,
+        benchmark_data.axis_mapping,
+    )
+
+    written = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                                                initargs=tables) as executor:
+        futures = {executor.submit(build_profile_for_file, path): path for path in response_files}
+        for future in concurrent.futures.as_completed(futures):
+            path = futures[future]
+            try:
+                profile = future.result()
+            except Exception as e:
+                failed[path] = str(e)
+                print(f"Error: Could not build profile for {path}: {e}")
+                continue
+            output_path = os.path.join(output_dir, model_stem(path) + PROFILE_FILE_SUFFIX)
+            write_profile(profile, output_path)
+            written.append(output_path)
+            print(f"Wrote profile {len(written)}/{len(response_files)}: {output_path}")
+
+    return {"written": written, "failed": failed}
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    parser = argparse.ArgumentParser(description="Build model_profiles documents for every model in a results directory.")
+    parser.add_argument("results_dir", help="Directory of per-model response files (.json array or .jsonl).")
+    parser.add_argument("--output-dir", required=True, help="Directory to write <model>.profile.json files to.")
+    parser.add_argument("--data-dir", default=os.path.join(project_root, "data"), help="Benchmark data directory.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    args = parser.parse_args()
+
+    data = load_snapshot(args.data_dir)
+    if not data:
+        print("Could not load benchmark data. Aborting.")
+        sys.exit(1)
+
+    summary = build_profiles(args.results_dir, args.output_dir, data, args.workers)
+    print(f"Built {len(summary['written'])} profiles, {len(summary['failed'])} failed.")
+    sys.exit(1 if summary["failed"] else 0)
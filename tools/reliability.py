@@ -0,0 +1,274 @@
+"""
+Inter-rater reliability for rubric scores.
+
+Several raters score the same sessions with the rubrics in `rubrics.json`.
+This module reads their ratings (response log records in
+`model_responses_template_schema.json` form plus a `rater_id`, or one log
+file per rater) and reports, per rubric, per module and per question:
+
+- Krippendorff's alpha with the ordinal difference function, from value
+  coincidence matrices.
+- Weighted Cohen's kappa (quadratic by default) for every rater pair, from
+  confusion matrices, and their mean.
+
+A rated cell is one (session_id, question_id, rubric_id). Ratings are streamed
+into compact integer columns, so a log is never held as records; each matrix
+is then built for every group at once with a single `np.bincount`. Missing
+ratings, None and the -1 non-interactive default written by
+`prompt_for_manual_scores` are treated as "not rated", as is any value outside
+the rubric's levels. A later rating of the same cell by the same rater
+replaces the earlier one.
+
+Usage:
+    python tools/reliability.py ratings.jsonl [more.jsonl ...] [--linear] [--output report.json]
+"""
+import argparse
+import array
+import json
+import os
+import sys
+
+import numpy as np
+
+from data_snapshot import load_snapshot
+from scorer import UNSCORED_RUBRIC_SCORE, get_rubric_max_score
+from stream_scorer import iter_jsonl_records
+
+QUADRATIC = "quadratic"
+LINEAR = "linear"
+
+
+class RatingTable:
+    """
+    Columnar store of (cell, rater, value) ratings.
+
+    Args:
+        rubrics_data (dict): Rubrics keyed by rubric_id; other manual_scores keys are ignored.
+    """
+
+    def __init__(self, rubrics_data):
+        self.rubrics_data = rubrics_data
+        self.max_scores = {rubric_id: get_rubric_max_score(rubric) for rubric_id, rubric in rubrics_data.items()}
+        self.cells = {}
+        self.cell_keys = []
+        self.raters = {}
+        self.cell_column = array.array('q')
+        self.rater_column = array.array('q')
+        self.value_column = array.array('b')
+        self.skipped = 0
+
+    def add_rating(self, session_id, question_id, rubric_id, rater_id, score):
+        """Adds one rating; returns False if it is missing, unscored or out of range."""
+        max_score = self.max_scores.get(rubric_id)
+        if (max_score is None or isinstance(score, bool) or not isinstance(score, int)
+                or score == UNSCORED_RUBRIC_SCORE or not 0 <= score <= max_score):
+            self.skipped += 1
+            return False
+        cell_key = (session_id, question_id, rubric_id)
+        cell = self.cells.get(cell_key)
+        if cell is None:
+            cell = self.cells[cell_key] = len(self.cell_keys)
+            self.cell_keys.append(cell_key)
+        self.cell_column.append(cell)
+        self.rater_column.append(self.raters.setdefault(rater_id, len(self.raters)))
+        self.value_column.append(score)
+        return True
+
+    def add_record(self, record, rater_id=None):
+        """Adds every rubric score of one rating record; rater_id overrides the record's."""
+        rater_id = rater_id if rater_id is not None else record.get("rater_id")
+        if rater_id is None:
+            print(f"Warning: Rating for {record.get('question_id')} has no rater_id. Skipping.", file=sys.stderr)
+            return
+        for rubric_id, score in (record.get("manual_scores") or {}).items():
+            if rubric_id in self.rubrics_data:
+                self.add_rating(record.get("session_id"), record.get("question_id"), rubric_id, rater_id, score)
+
+    def add_jsonl(self, filepath, rater_id=None):
+        for record in iter_jsonl_records(filepath):
+            self.add_record(record, rater_id)
+
+    def columns(self):
+        """
+        Returns (cell, rater, value) arrays with repeated ratings of a cell by
+        the same rater reduced to the last one.
+        """
+        cell = np.frombuffer(self.cell_column, dtype=np.int64)
+        rater = np.frombuffer(self.rater_column, dtype=np.int64)
+        value = np.frombuffer(self.value_column, dtype=np.int8).astype(np.int64)
+        key = (cell * max(len(self.raters), 1) + rater)[::-1]
+        _, first_in_reversed = np.unique(key, return_index=True)
+        keep = len(key) - 1 - first_in_reversed
+        return cell[keep], rater[keep], value[keep]
+
+
+def coincidence_matrices(cell_group, cell, value, n_groups, n_values):
+    """
+    Returns (n_groups, n_values, n_values) Krippendorff coincidence matrices.
+
+    Each cell rated m >= 2 times contributes its value-pair counts divided by m - 1.
+    """
+    n_cells = len(cell_group)
+    counts = np.bincount(cell * n_values + value, minlength=n_cells * n_values).reshape(n_cells, n_values)
+    pairable = counts.sum(axis=1)
+    weight = np.zeros(n_cells)
+    np.divide(1.0, pairable - 1, out=weight, where=pairable > 1)
+
+    pairs = counts[:, :, None] * counts[:, None, :] - counts[:, :, None] * np.eye(n_values, dtype=np.int64)
+    pairs = pairs * weight[:, None, None]
+    flat_group = np.repeat(cell_group * n_values * n_values, n_values * n_values) + np.tile(np.arange(n_values * n_values), n_cells)
+    matrices = np.bincount(flat_group, weights=pairs.ravel(), minlength=n_groups * n_values * n_values)
+    return matrices.reshape(n_groups, n_values, n_values)
+
+
+def ordinal_alpha(coincidence):
+    """Returns Krippendorff's ordinal alpha for one coincidence matrix, or None if undefined."""
+    marginals = coincidence.sum(axis=1)
+    total = marginals.sum()
+    if total <= 1:
+        return None
+    cumulative = np.cumsum(marginals)
+    # delta(c, k) = (sum of n_g for g from c to k) - (n_c + n_k) / 2, squared
+    lower = np.minimum.outer(np.arange(len(marginals)), np.arange(len(marginals)))
+    upper = np.maximum.outer(np.arange(len(marginals)), np.arange(len(marginals)))
+    between = cumulative[upper] - cumulative[lower] + marginals[lower]
+    delta = (between - (marginals[:, None] + marginals[None, :]) / 2.0) ** 2
+    expected = (np.outer(marginals, marginals) * delta).sum()
+    if expected == 0:
+        return None
+    return float(1.0 - (total - 1) * (coincidence * delta).sum() / expected)
+
+
+def confusion_matrices(cell_group, values_a, values_b, n_groups, n_values):
+    """Returns (n_groups, n_values, n_values) confusion matrices of two raters' values."""
+    flat = (cell_group * n_values + values_a) * n_values + values_b
+    return np.bincount(flat, minlength=n_groups * n_values * n_values).reshape(n_groups, n_values, n_values)
+
+
+def weighted_kappa(confusion, weighting=QUADRATIC):
+    """Returns weighted Cohen's kappa for one confusion matrix, or None if undefined."""
+    total = confusion.sum()
+    if total == 0:
+        return None
+    n_values = len(confusion)
+    distance = np.abs(np.subtract.outer(np.arange(n_values), np.arange(n_values))) / max(n_values - 1, 1)
+    weights = distance ** 2 if weighting == QUADRATIC else distance
+    expected = np.outer(confusion.sum(axis=1), confusion.sum(axis=0)) / total
+    expected_disagreement = (weights * expected).sum()
+    if expected_disagreement == 0:
+        return None
+    return float(1.0 - (weights * confusion).sum() / expected_disagreement)
+
+
+def _round(value):
+    return None if value is None else round(value, 4)
+
+
+def reliability_by_group(cell_labels, cell, rater, value, rater_ids, n_values, weighting=QUADRATIC):
+    """
+    Computes alpha and pairwise kappa for every group of cells.
+
+    Args:
+        cell_labels (list): Group label of each cell index; cells labelled None are left out.
+        cell, rater, value (np.ndarray): Deduplicated rating columns.
+
+    Returns:
+        dict: label -> {"alpha", "kappa", "kappa_pairs", "rated_cells", "pairable_values"}
+    """
+    labels = sorted({label for label in cell_labels if label is not None}, key=str)
+    label_index = {label: i for i, label in enumerate(labels)}
+    cell_group_all = np.array([label_index.get(label, -1) for label in cell_labels], dtype=np.int64)
+
+    known = cell_group_all[cell] >= 0
+    cell, rater, value = cell[known], rater[known], value[known]
+    # Renumber the cells that are left so matrices stay dense.
+    used_cells, cell = np.unique(cell, return_inverse=True)
+    cell_group = cell_group_all[used_cells]
+    n_groups, n_cells = len(labels), len(used_cells)
+
+    coincidence = coincidence_matrices(cell_group, cell, value, n_groups, n_values)
+    ratings_per_cell = np.bincount(cell, minlength=n_cells)
+    rated_cells = np.bincount(cell_group[ratings_per_cell > 1], minlength=n_groups)
+
+    grid = np.full((n_cells, len(rater_ids)), -1, dtype=np.int64)
+    grid[cell, rater] = value
+    kappa_pairs = [{} for _ in labels]
+    for a in range(len(rater_ids)):
+        for b in range(a + 1, len(rater_ids)):
+            both = (grid[:, a] >= 0) & (grid[:, b] >= 0)
+            if not both.any():
+                continue
+            confusion = confusion_matrices(cell_group[both], grid[both, a], grid[both, b], n_groups, n_values)
+            for g in np.unique(cell_group[both]):
+                kappa_pairs[g][f"{rater_ids[a]}|{rater_ids[b]}"] = _round(weighted_kappa(confusion[g], weighting))
+
+    results = {}
+    for g, label in enumerate(labels):
+        defined = [k for k in kappa_pairs[g].values() if k is not None]
+        results[label] = {
+            "alpha": _round(ordinal_alpha(coincidence[g])),
+            "kappa": _round(sum(defined) / len(defined)) if defined else None,
+            "kappa_pairs": kappa_pairs[g],
+            "rated_cells": int(rated_cells[g]),
+            "pairable_values": int(round(coincidence[g].sum())),
+        }
+    return results
+
+
+def compute_reliability(table, questions_data, weighting=QUADRATIC):
+    """
+    Computes the full reliability report for a RatingTable.
+
+    Returns:
+        dict: {"raters", "ratings", "skipped_ratings", "overall", "by_rubric", "by_module", "by_question"}
+    """
+    cell, rater, value = table.columns()
+    rater_ids = sorted(table.raters, key=table.raters.get)
+    n_values = max(table.max_scores.values(), default=0) + 1
+    cell_keys = table.cell_keys
+
+    def by(label_of):
+        return reliability_by_group([label_of(key) for key in cell_keys], cell, rater, value, rater_ids, n_values, weighting)
+
+    return {
+        "raters": [str(r) for r in rater_ids],
+        "ratings": int(len(cell)),
+        "skipped_ratings": table.skipped,
+        "weighting": weighting,
+        "overall": by(lambda key: "all").get("all"),
+        "by_rubric": by(lambda key: key[2]),
+        "by_module": by(lambda key: questions_data.get(key[1], {}).get("module")),
+        "by_question": by(lambda key: key[1]),
+    }
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    parser = argparse.ArgumentParser(description="Compute inter-rater reliability of rubric scores.")
+    parser.add_argument("ratings", nargs="+", help="JSONL rating logs. Records need a rater_id unless --rater-per-file is set.")
+    parser.add_argument("--rater-per-file", action="store_true", help="Use each file's name as the rater id.")
+    parser.add_argument("--linear", action="store_true", help="Use linear instead of quadratic kappa weights.")
+    parser.add_argument("--data-dir", default=os.path.join(project_root, "data"), help="Benchmark data directory.")
+    parser.add_argument("--output", help="Write the report here instead of stdout.")
+    args = parser.parse_args()
+
+    data = load_snapshot(args.data_dir)
+    if not data:
+        print("Could not load benchmark data. Aborting.")
+        sys.exit(1)
+
+    rating_table = RatingTable(data.rubrics)
+    for path in args.ratings:
+        file_rater = os.path.splitext(os.path.basename(path))[0] if args.rater_per_file else None
+        rating_table.add_jsonl(path, file_rater)
+
+    report = compute_reliability(rating_table, data.questions, LINEAR if args.linear else QUADRATIC)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
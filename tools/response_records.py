@@ -0,0 +1,289 @@
+"""
+Compact in-memory response records with out-of-line text.
+
+A `model_responses_template_schema.json` record held as a plain dict carries
+the full `response_text` and `prompt_delivered` strings, and the prompt usually
+repeats the question text from questions.json verbatim. `ResponseStore`
+converts records into `ResponseRecord` objects instead:
+
+- the record is a `__slots__` object with no per-instance dict;
+- `session_id`, `question_id` and the manual_scores rubric keys are interned,
+  so every record of a session or question shares one string;
+- `response_text`, `prompt_delivered` and `notes` are appended to a text blob
+  file and kept as (offset, length) spans, read back through mmap only when
+  the text is accessed;
+- a prompt identical to the canonical question text is stored as a reference
+  to the question rather than as a copy.
+
+`ResponseRecord` is a read-only `collections.abc.Mapping` (`get`,
+`record[key]`, `in`, iteration, `keys`/`items`, `dict(record)`, `**record`),
+so the existing scoring paths
+(`stream_scorer.record_to_scored_response`,
+`profile_builder.build_model_profile`, `consistency.analyze_consistency`)
+accept compact records unchanged. They only read the numeric and id fields,
+so text is never loaded while scoring.
+
+Blob layout:
+    UTF-8 text spans, concatenated in append order. The file is append-only;
+    spans handed out earlier stay valid when more text is appended.
+
+Usage:
+    python tools/response_records.py results/model.jsonl --blob /tmp/model.text [--data-dir data]
+"""
+import argparse
+import mmap
+import os
+import sys
+import tracemalloc
+from collections.abc import Mapping
+
+from data_snapshot import load_snapshot
+from profile_builder import load_response_records
+from stream_scorer import iter_jsonl_records
+
+# Record fields stored out of line in the text blob.
+TEXT_FIELDS = ("prompt_delivered", "response_text", "notes")
+
+# Record fields held directly on the ResponseRecord, in schema order.
+VALUE_FIELDS = (
+    "session_id", "question_id", "timestamp_start", "timestamp_end", "word_count", "response_time_seconds",
+    "manual_scores", "auto_scores", "refusal", "error_type", "selected_choice", "ideological_stance_score",
+)
+
+# prompt_delivered span offset meaning "the question's canonical question_text".
+QUESTION_TEXT_REF = -1
+
+# Span offset meaning the text field is absent from the record.
+NO_TEXT = -2
+
+MISSING = object()
+
+
+class TextBlob:
+    """
+    Append-only text file addressed by (offset, length) byte spans.
+
+    Text is read back through a read-only mmap, which is remapped when a span
+    lies beyond the end of the current mapping.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = open(path, 'ab')
+        self.size = self._writer.tell()
+        self._mmap = None
+        self.reads = 0
+
+    def append(self, text):
+        """Appends text and returns its (offset, length) span."""
+        encoded = text.encode('utf-8')
+        offset = self.size
+        self._writer.write(encoded)
+        self.size += len(encoded)
+        return offset, len(encoded)
+
+    def read(self, offset, length):
+        self.reads += 1
+        if length == 0:
+            return ""
+        if self._mmap is None or offset + length > len(self._mmap):
+            self._writer.flush()
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap[offset:offset + length].decode('utf-8')
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._writer.close()
+
+
+class ResponseRecord(Mapping):
+    """
+    One response record with its text fields held in a TextBlob.
+
+    A read-only Mapping over the dict it was built from: record["question_id"],
+    record.get("manual_scores"), "response_text" in record, dict(record).
+    Iterating yields field names without loading text; text fields are
+    decoded from the blob on each value access and not cached.
+    """
+
+    __slots__ = VALUE_FIELDS + ("prompt_span", "response_span", "notes_span", "extra", "store")
+
+    def __getitem__(self, key):
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        if key in VALUE_FIELDS:
+            value = getattr(self, key)
+            return default if value is MISSING else value
+        if key == "prompt_delivered":
+            return self.store.prompt_text(self, default)
+        if key == "response_text":
+            return self.store.span_text(self.response_span, default)
+        if key == "notes":
+            return self.store.span_text(self.notes_span, default)
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def __contains__(self, key):
+        return self.get(key, MISSING) is not MISSING
+
+    def __iter__(self):
+        """Yields the record's field names without loading any text."""
+        for field in VALUE_FIELDS:
+            if getattr(self, field) is not MISSING:
+                yield field
+        for field, span in zip(TEXT_FIELDS, (self.prompt_span, self.response_span, self.notes_span)):
+            if span[0] != NO_TEXT:
+                yield field
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        """Returns the full record as a plain dict, loading its text."""
+        return dict(self)
+
+
+class ResponseStore:
+    """
+    Builds ResponseRecords whose text lives in one TextBlob.
+
+    Args:
+        blob_path (str): Text blob file; created if missing and appended to otherwise.
+        questions_data (dict): Question id -> question dict, used to store prompts
+            equal to the question text as references.
+    """
+
+    def __init__(self, blob_path, questions_data):
+        self.blob = TextBlob(blob_path)
+        self.questions_data = questions_data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.blob.close()
+
+    def text_span(self, text):
+        if text is None:
+            return NO_TEXT, 0
+        return self.blob.append(text)
+
+    def add(self, record):
+        """Converts one record dict into a ResponseRecord."""
+        compact = ResponseRecord()
+        for field in VALUE_FIELDS:
+            setattr(compact, field, record.get(field, MISSING))
+        for field in ("session_id", "question_id"):
+            if isinstance(getattr(compact, field), str):
+                setattr(compact, field, sys.intern(getattr(compact, field)))
+        if isinstance(compact.manual_scores, dict):
+            compact.manual_scores = {sys.intern(key): value for key, value in compact.manual_scores.items()}
+
+        prompt = record.get("prompt_delivered")
+        question = self.questions_data.get(compact.question_id) if isinstance(compact.question_id, str) else None
+        if prompt is not None and question is not None and prompt == question.get("question_text"):
+            compact.prompt_span = (QUESTION_TEXT_REF, 0)
+        else:
+            compact.prompt_span = self.text_span(prompt)
+        compact.response_span = self.text_span(record.get("response_text"))
+        compact.notes_span = self.text_span(record.get("notes"))
+
+        extra = {key: value for key, value in record.items() if key not in VALUE_FIELDS and key not in TEXT_FIELDS}
+        compact.extra = extra or None
+        compact.store = self
+        return compact
+
+    def load(self, records):
+        """Converts an iterable of record dicts, returning a list of ResponseRecords."""
+        return [self.add(record) for record in records]
+
+    def load_file(self, filepath):
+        """
+        Loads a JSON array or JSONL response file into ResponseRecords.
+
+        JSONL is streamed, so only one record dict is alive at a time.
+        """
+        if filepath.endswith(".jsonl"):
+            return self.load(iter_jsonl_records(filepath))
+        return self.load(load_response_records(filepath))
+
+    def span_text(self, span, default=None):
+        offset, length = span
+        if offset == NO_TEXT:
+            return default
+        return self.blob.read(offset, length)
+
+    def prompt_text(self, record, default=None):
+        if record.prompt_span[0] == QUESTION_TEXT_REF:
+            return self.questions_data[record.question_id]["question_text"]
+        return self.span_text(record.prompt_span, default)
+
+
+def measure_memory(filepath, questions_data, blob_path):
+    """
+    Returns traced bytes retained by a response file loaded as dicts versus as ResponseRecords.
+
+    Returns:
+        dict: {"records", "dict_bytes", "compact_bytes", "blob_bytes", "prompts_by_reference"}
+    """
+    tracemalloc.start()
+    as_dicts = load_response_records(filepath)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    del as_dicts
+    tracemalloc.stop()
+
+    with ResponseStore(blob_path, questions_data) as store:
+        tracemalloc.start()
+        compact = store.load_file(filepath)
+        compact_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return {
+            "records": len(compact),
+            "dict_bytes": dict_bytes,
+            "compact_bytes": compact_bytes,
+            "blob_bytes": store.blob.size,
+            "prompts_by_reference": sum(1 for record in compact if record.prompt_span[0] == QUESTION_TEXT_REF),
+        }
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    parser = argparse.ArgumentParser(description="Load MIPP response records into compact form and report memory use.")
+    parser.add_argument("responses_file", help="JSON array or JSONL file of response records.")
+    parser.add_argument("--blob", required=True, help="Text blob file to append response text to.")
+    parser.add_argument("--data-dir", default=os.path.join(project_root, "data"),
+                        help="Directory containing questions.json, rubrics.json and axis_mapping.json.")
+    args = parser.parse_args()
+
+    data = load_snapshot(args.data_dir)
+    if data is None:
+        print("Could not load benchmark data. Aborting.")
+        sys.exit(1)
+
+    try:
+        report = measure_memory(args.responses_file, data.questions, args.blob)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not read {args.responses_file}: {e}")
+        sys.exit(1)
+    print(f"Records: {report['records']} ({report['prompts_by_reference']} prompts stored as question references)")
+    print(f"As dicts:         {report['dict_bytes'] / 1e6:.2f} MB")
+    print(f"Compact records:  {report['compact_bytes'] / 1e6:.2f} MB (+ {report['blob_bytes'] / 1e6:.2f} MB text blob on disk)")
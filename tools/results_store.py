@@ -0,0 +1,373 @@
+"""
+SQLite results store for sessions, responses, rubric scores, coordinates and profiles.
+
+Responses, manual scores and profiles otherwise live in loose JSON files that
+every query loads in full. `ResultsStore` keeps them in one local SQLite
+database:
+
+- sessions, responses (one row per session and question, with the question's
+  module, submodule and category copied in), rubric_scores (one row per
+  session, question, rubric and rater), rubrics (max level per rubric),
+  coordinates (one row per session and rater, from that rater's clarity
+  scores) and profiles.
+- Indexes on session_id (the primary keys), question_id, module and rubric_id.
+- Batched upserts, each batch in a single transaction.
+- WAL journal mode with a busy timeout, so raters and scorers can write while
+  others read.
+- SQL-side aggregation of per-rubric and per-module means, normalized by each
+  rubric's maximum level like `scorer.calculate_module_scores`. -1 rubric
+  scores (the non-interactive default) are stored but left out of the means.
+
+Usage:
+    python tools/results_store.py import responses.jsonl --db results.db [--rater-id alice]
+    python tools/results_store.py leaderboard --db results.db
+"""
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+
+from data_snapshot import load_snapshot
+from ideology_scorer import get_ideological_coordinates
+from scorer import UNSCORED_RUBRIC_SCORE, get_rubric_max_score
+from stream_scorer import iter_jsonl_records, record_to_scored_response
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_RATER_ID = ""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    model_name TEXT,
+    model_provider TEXT,
+    model_version TEXT,
+    test_date TEXT
+);
+CREATE TABLE IF NOT EXISTS responses (
+    session_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    module TEXT,
+    submodule_code TEXT,
+    category_code TEXT,
+    timestamp_start TEXT,
+    timestamp_end TEXT,
+    prompt_delivered TEXT,
+    response_text TEXT,
+    word_count INTEGER,
+    response_time_seconds REAL,
+    selected_choice TEXT,
+    ideological_stance_score INTEGER,
+    auto_scores TEXT,
+    notes TEXT,
+    refusal INTEGER NOT NULL DEFAULT 0,
+    error_type TEXT,
+    PRIMARY KEY (session_id, question_id)
+);
+CREATE TABLE IF NOT EXISTS rubric_scores (
+    session_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    rubric_id TEXT NOT NULL,
+    rater_id TEXT NOT NULL DEFAULT '',
+    module TEXT,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (session_id, question_id, rubric_id, rater_id)
+);
+CREATE TABLE IF NOT EXISTS rubrics (
+    rubric_id TEXT PRIMARY KEY,
+    max_score INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS coordinates (
+    session_id TEXT NOT NULL,
+    rater_id TEXT NOT NULL DEFAULT '',
+    economic_axis REAL,
+    social_axis REAL,
+    authority_axis REAL,
+    global_axis REAL,
+    computed_at TEXT,
+    PRIMARY KEY (session_id, rater_id)
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    model_name TEXT PRIMARY KEY,
+    overall_mipp_score REAL,
+    bias_transparency_index REAL,
+    profile TEXT NOT NULL,
+    last_updated TEXT
+);
+-- session_id lookups use the (session_id, ...) primary keys.
+CREATE INDEX IF NOT EXISTS idx_responses_question_id ON responses (question_id);
+CREATE INDEX IF NOT EXISTS idx_responses_module ON responses (module);
+CREATE INDEX IF NOT EXISTS idx_rubric_scores_question_id ON rubric_scores (question_id);
+CREATE INDEX IF NOT EXISTS idx_rubric_scores_module ON rubric_scores (module, rubric_id);
+CREATE INDEX IF NOT EXISTS idx_rubric_scores_rubric_id ON rubric_scores (rubric_id, session_id);
+"""
+
+RESPONSE_COLUMNS = ("session_id", "question_id", "module", "submodule_code", "category_code", "timestamp_start",
+                    "timestamp_end", "prompt_delivered", "response_text", "word_count", "response_time_seconds",
+                    "selected_choice", "ideological_stance_score", "auto_scores", "notes", "refusal", "error_type")
+
+UPSERT_RESPONSE = (
+    f"INSERT INTO responses ({', '.join(RESPONSE_COLUMNS)}) VALUES ({', '.join('?' * len(RESPONSE_COLUMNS))}) "
+    f"ON CONFLICT (session_id, question_id) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in RESPONSE_COLUMNS[2:])
+)
+UPSERT_RUBRIC_SCORE = (
+    "INSERT INTO rubric_scores (session_id, question_id, rubric_id, rater_id, module, score) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (session_id, question_id, rubric_id, rater_id) DO UPDATE SET module = excluded.module, score = excluded.score"
+)
+
+# Normalized 0-100 mean over scored (non -1) rubric scores, as in scorer.calculate_rubric_group_score.
+NORMALIZED_MEAN = "ROUND(AVG(s.score * 100.0 / r.max_score), 2)"
+SCORED_JOIN = f"FROM rubric_scores s JOIN rubrics r ON r.rubric_id = s.rubric_id WHERE s.score != {UNSCORED_RUBRIC_SCORE}"
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+def _in_clause(column, values):
+    """Returns (" AND column IN (?, ...)", values) or ("", []) when values is None."""
+    if values is None:
+        return "", []
+    values = list(values)
+    return f" AND {column} IN ({', '.join('?' * len(values))})", values
+
+
+class ResultsStore:
+    """
+    An open results database.
+
+    Args:
+        path (str): SQLite database file; created with the schema if missing.
+        rubrics_data (dict, optional): Rubrics keyed by rubric_id, registered for the normalized means.
+    """
+
+    def __init__(self, path, rubrics_data=None):
+        self.connection = sqlite3.connect(path, timeout=30.0)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        if rubrics_data:
+            self.register_rubrics(rubrics_data)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # --- Writes -------------------------------------------------------------
+
+    def register_rubrics(self, rubrics_data):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO rubrics (rubric_id, max_score) VALUES (?, ?) "
+                "ON CONFLICT (rubric_id) DO UPDATE SET max_score = excluded.max_score",
+                [(rubric_id, get_rubric_max_score(rubric)) for rubric_id, rubric in rubrics_data.items()],
+            )
+
+    def upsert_session(self, session_id, model_name=None, model_provider=None, model_version=None, test_date=None):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO sessions (session_id, model_name, model_provider, model_version, test_date) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET model_name = COALESCE(excluded.model_name, model_name), "
+                "model_provider = COALESCE(excluded.model_provider, model_provider), "
+                "model_version = COALESCE(excluded.model_version, model_version), "
+                "test_date = COALESCE(excluded.test_date, test_date)",
+                (session_id, model_name, model_provider, model_version, test_date),
+            )
+
+    def upsert_responses(self, records, questions_data, rater_id=DEFAULT_RATER_ID):
+        """
+        Upserts a batch of model_responses records and their manual_scores in one transaction.
+
+        Scores are stored under rater_id (or each record's own rater_id), so
+        several raters' scores for the same response can coexist.
+        """
+        sessions, response_rows, score_rows = set(), [], []
+        for record in records:
+            session_id, question_id = record.get("session_id"), record.get("question_id")
+            question = questions_data.get(question_id, {})
+            module = question.get("module")
+            scored_response = record_to_scored_response(record)
+            sessions.add(session_id)
+            response_rows.append((
+                session_id, question_id, module, question.get("submodule_code"), question.get("category_code"),
+                record.get("timestamp_start"), record.get("timestamp_end"), record.get("prompt_delivered"),
+                record.get("response_text"), record.get("word_count"), record.get("response_time_seconds"),
+                scored_response["selected_choice"], scored_response["ideological_stance_score"],
+                json.dumps(record["auto_scores"]) if record.get("auto_scores") else None,
+                record.get("notes"), int(bool(record.get("refusal"))), record.get("error_type"),
+            ))
+            record_rater = record.get("rater_id") or rater_id
+            for rubric_id, score in scored_response["rubrics"].items():
+                if isinstance(score, int) and not isinstance(score, bool):
+                    score_rows.append((session_id, question_id, rubric_id, record_rater, module, score))
+
+        with self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO sessions (session_id) VALUES (?)", [(s,) for s in sessions])
+            self.connection.executemany(UPSERT_RESPONSE, response_rows)
+            self.connection.executemany(UPSERT_RUBRIC_SCORE, score_rows)
+        return len(response_rows)
+
+    def upsert_rubric_scores(self, rows):
+        """Upserts (session_id, question_id, rubric_id, rater_id, module, score) rows in one transaction."""
+        with self.connection:
+            self.connection.executemany(UPSERT_RUBRIC_SCORE, rows)
+
+    def import_jsonl(self, filepath, questions_data, rater_id=DEFAULT_RATER_ID, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Streams a JSONL response log into the store, one transaction per batch.
+
+        Returns:
+            tuple: (record count, sorted (session_id, rater_id) pairs the log touched), where
+            rater_id is each record's own rater_id or else the rater_id argument
+        """
+        batch, total, session_raters = [], 0, set()
+        for record in iter_jsonl_records(filepath):
+            batch.append(record)
+            session_raters.add((record.get("session_id"), record.get("rater_id") or rater_id))
+            if len(batch) >= batch_size:
+                total += self.upsert_responses(batch, questions_data, rater_id)
+                batch = []
+        if batch:
+            total += self.upsert_responses(batch, questions_data, rater_id)
+        return total, sorted(pair for pair in session_raters if pair[0] is not None)
+
+    def upsert_coordinates(self, session_id, coordinates, rater_id=DEFAULT_RATER_ID):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO coordinates (session_id, rater_id, economic_axis, social_axis, authority_axis, global_axis, "
+                "computed_at) VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (session_id, rater_id) DO UPDATE SET "
+                "economic_axis = excluded.economic_axis, social_axis = excluded.social_axis, "
+                "authority_axis = excluded.authority_axis, global_axis = excluded.global_axis, "
+                "computed_at = excluded.computed_at",
+                (session_id, rater_id, coordinates.get("economic_axis"), coordinates.get("social_axis"),
+                 coordinates.get("authority_axis"), coordinates.get("global_axis"), _now()),
+            )
+
+    def upsert_profile(self, profile):
+        """Stores a model_profiles document, keyed by model_name."""
+        composite = profile.get("composite_scores") or {}
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO profiles (model_name, overall_mipp_score, bias_transparency_index, profile, last_updated) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (model_name) DO UPDATE SET "
+                "overall_mipp_score = excluded.overall_mipp_score, bias_transparency_index = excluded.bias_transparency_index, "
+                "profile = excluded.profile, last_updated = excluded.last_updated",
+                (profile["model_name"], composite.get("overall_mipp_score"), composite.get("bias_transparency_index"),
+                 json.dumps(profile), profile.get("last_updated") or _now()),
+            )
+
+    # --- Reads --------------------------------------------------------------
+
+    def session_ids(self):
+        return [row[0] for row in self.connection.execute("SELECT session_id FROM sessions ORDER BY session_id")]
+
+    def manual_scores(self, session_id, rater_id=DEFAULT_RATER_ID):
+        """Returns one rater's scores for a session as prompt_for_manual_scores-style dicts."""
+        results = {}
+        for row in self.connection.execute(
+                "SELECT question_id, selected_choice, ideological_stance_score FROM responses WHERE session_id = ?",
+                (session_id,)):
+            scores = results[row["question_id"]] = {"question_id": row["question_id"]}
+            if row["selected_choice"] is not None:
+                scores["selected_choice"] = row["selected_choice"]
+            if row["ideological_stance_score"] is not None:
+                scores["ideological_stance_score"] = row["ideological_stance_score"]
+        for row in self.connection.execute(
+                "SELECT question_id, rubric_id, score FROM rubric_scores WHERE session_id = ? AND rater_id = ?",
+                (session_id, rater_id)):
+            results.setdefault(row["question_id"], {"question_id": row["question_id"]})[row["rubric_id"]] = row["score"]
+        return list(results.values())
+
+    def compute_coordinates(self, session_id, axis_mapping_data, questions_data, rater_id=DEFAULT_RATER_ID):
+        """Computes a session's coordinates from one rater's stored Module A scores and stores them under that rater."""
+        scored = {
+            scores["question_id"]: record_to_scored_response({"manual_scores": scores})
+            for scores in self.manual_scores(session_id, rater_id)
+            if questions_data.get(scores["question_id"], {}).get("module") == "A"
+        }
+        coordinates = get_ideological_coordinates(scored, axis_mapping_data, questions_data)
+        self.upsert_coordinates(session_id, coordinates, rater_id)
+        return coordinates
+
+    def rubric_means(self, session_ids=None, by_session=False):
+        """
+        Returns per-rubric means computed in SQL.
+
+        Returns:
+            list: dicts with rubric_id (and session_id when by_session), raw mean,
+                  normalized 0-100 mean and scored count.
+        """
+        clause, params = _in_clause("s.session_id", session_ids)
+        group = "s.session_id, s.rubric_id" if by_session else "s.rubric_id"
+        rows = self.connection.execute(
+            f"SELECT {group}, ROUND(AVG(s.score), 4) AS mean, {NORMALIZED_MEAN} AS normalized_mean, "
+            f"COUNT(*) AS scored {SCORED_JOIN}{clause} GROUP BY {group} ORDER BY {group}",
+            params,
+        )
+        return [dict(row) for row in rows]
+
+    def module_means(self, session_ids=None, by_session=False):
+        """Returns per-module normalized 0-100 means (scorer.calculate_module_scores semantics) computed in SQL."""
+        clause, params = _in_clause("s.session_id", session_ids)
+        group = "s.session_id, s.module" if by_session else "s.module"
+        rows = self.connection.execute(
+            f"SELECT {group}, {NORMALIZED_MEAN} AS normalized_mean, COUNT(*) AS scored "
+            f"{SCORED_JOIN} AND s.module IS NOT NULL{clause} GROUP BY {group} ORDER BY {group}",
+            params,
+        )
+        return [dict(row) for row in rows]
+
+    def leaderboard(self):
+        """Returns one row per session with its module means and stored coordinates, keyed by rater_id."""
+        board = {}
+        for row in self.module_means(by_session=True):
+            entry = board.setdefault(row["session_id"], {"session_id": row["session_id"], "modules": {}})
+            entry["modules"][row["module"]] = row["normalized_mean"]
+        for row in self.connection.execute("SELECT * FROM coordinates"):
+            if row["session_id"] in board:
+                board[row["session_id"]].setdefault("coordinates", {})[row["rater_id"]] = {
+                    key: row[key] for key in row.keys() if key.endswith("_axis")}
+        return list(board.values())
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", required=True, help="SQLite database file.")
+    common.add_argument("--data-dir", default=os.path.join(project_root, "data"), help="Benchmark data directory.")
+    parser = argparse.ArgumentParser(description="SQLite results store for MIPP responses and scores.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", parents=[common], help="Import a JSONL response log.")
+    import_parser.add_argument("responses", help="JSONL response log.")
+    import_parser.add_argument("--rater-id", default=DEFAULT_RATER_ID, help="Rater id for records without one.")
+    import_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Records per transaction.")
+    commands.add_parser("leaderboard", parents=[common], help="Print per-session module means and coordinates.")
+    args = parser.parse_args()
+
+    data = load_snapshot(args.data_dir)
+    if not data:
+        print("Could not load benchmark data. Aborting.")
+        sys.exit(1)
+
+    with ResultsStore(args.db, data.rubrics) as store:
+        if args.command == "import":
+            imported, imported_pairs = store.import_jsonl(args.responses, data.questions, args.rater_id,
+                                                          args.batch_size)
+            for imported_session, imported_rater in imported_pairs:
+                store.compute_coordinates(imported_session, data.axis_mapping, data.questions, imported_rater)
+            imported_sessions = {imported_session for imported_session, _ in imported_pairs}
+            print(f"Imported {imported} records for {len(imported_sessions)} sessions into {args.db}")
+        else:
+            print(json.dumps(store.leaderboard(), indent=2))
@@ -0,0 +1,293 @@
+"""
+Incremental rescoring for live rater sessions.
+
+When a rater revises one score in `scorer.prompt_for_manual_scores`,
+`get_ideological_coordinates` rescans every response and every mapping entry.
+`ScoreAccumulator` instead keeps the per-axis raw points and max-abs
+denominators and the per-rubric sums and counts, and applies each add, update
+or retract of a single (question_id, rubric / choice / stance) value as an
+O(1) delta. Current coordinates and performance metrics can be read at any
+moment and equal a full recomputation over the same scores
+(`ideology_scorer.get_ideological_coordinates` and
+`scorer.calculate_performance_metrics`).
+
+Accumulators serialize to plain JSON-compatible dicts and can be merged, so
+partial accumulators from different raters or shards can be combined.
+"""
+import json
+import os
+import random
+
+from data_snapshot import load_snapshot
+from ideology_scorer import AXES, get_ideological_coordinates, normalize_axis_score, score_mapped_response
+from scorer import (UNSCORED_RUBRIC_SCORE, calculate_performance_metrics,
+                    calculate_performance_metrics_from_totals)
+
+SELECTED_CHOICE = "selected_choice"
+STANCE_SCORE = "ideological_stance_score"
+
+
+class QuestionScores:
+    """Current scores for one question and its cached axis contribution."""
+
+    __slots__ = ("rubrics", "selected_choice", "stance_score", "axis_contribution")
+
+    def __init__(self):
+        self.rubrics = {}
+        self.selected_choice = None
+        self.stance_score = None
+        self.axis_contribution = None
+
+    def is_empty(self):
+        return not self.rubrics and self.selected_choice is None and self.stance_score is None
+
+    def scored_response(self):
+        """Returns the scores in get_ideological_coordinates input format."""
+        return {
+            "rubrics": dict(self.rubrics),
+            SELECTED_CHOICE: self.selected_choice,
+            STANCE_SCORE: self.stance_score,
+        }
+
+    def to_dict(self):
+        return {"rubrics": dict(self.rubrics), SELECTED_CHOICE: self.selected_choice, STANCE_SCORE: self.stance_score}
+
+
+class ScoreAccumulator:
+    """
+    Running axis and rubric totals that support O(1) single-score updates.
+
+    Args:
+        axis_mapping_data (dict): Loaded axis mapping keyed by question_id.
+        rubrics_data (dict): Loaded rubrics keyed by rubric_id.
+    """
+
+    __slots__ = ("axis_mapping_data", "rubrics_data", "axis_raw", "axis_max_abs",
+                 "rubric_sums", "rubric_counts", "questions")
+
+    def __init__(self, axis_mapping_data, rubrics_data):
+        self.axis_mapping_data = axis_mapping_data
+        self.rubrics_data = rubrics_data
+        self.axis_raw = [0.0] * len(AXES)
+        self.axis_max_abs = [0.0] * len(AXES)
+        self.rubric_sums = {}
+        self.rubric_counts = {}
+        self.questions = {}
+
+    # --- Deltas -------------------------------------------------------------
+
+    def _apply_axis(self, contribution, sign):
+        if contribution:
+            axis_index, raw_points, max_abs_points = contribution
+            self.axis_raw[axis_index] += sign * raw_points
+            self.axis_max_abs[axis_index] += sign * max_abs_points
+
+    def _apply_rubric(self, rubric_id, score, sign):
+        if rubric_id not in self.rubrics_data or score is None or score == UNSCORED_RUBRIC_SCORE:
+            return
+        self.rubric_sums[rubric_id] = self.rubric_sums.get(rubric_id, 0) + sign * score
+        self.rubric_counts[rubric_id] = self.rubric_counts.get(rubric_id, 0) + sign
+
+    def _axis_contribution(self, question_id, state):
+        mapping_details = self.axis_mapping_data.get(question_id)
+        if state.is_empty() or not mapping_details or mapping_details.get("axis") not in AXES:
+            return None
+        raw_points, max_abs_points = score_mapped_response(mapping_details, state.scored_response())
+        return AXES.index(mapping_details["axis"]), raw_points, max_abs_points
+
+    def _update(self, question_id, change):
+        """Applies change(state) to one question and refreshes its axis contribution."""
+        state = self.questions.get(question_id)
+        if state is None:
+            state = self.questions[question_id] = QuestionScores()
+
+        self._apply_axis(state.axis_contribution, -1)
+        change(state)
+        state.axis_contribution = self._axis_contribution(question_id, state)
+        self._apply_axis(state.axis_contribution, 1)
+
+        if state.is_empty():
+            del self.questions[question_id]
+
+    def set_rubric_score(self, question_id, rubric_id, score):
+        """Adds or updates one rubric score."""
+        def change(state):
+            self._apply_rubric(rubric_id, state.rubrics.get(rubric_id), -1)
+            state.rubrics[rubric_id] = score
+            self._apply_rubric(rubric_id, score, 1)
+        self._update(question_id, change)
+
+    def set_selected_choice(self, question_id, choice):
+        def change(state):
+            state.selected_choice = choice
+        self._update(question_id, change)
+
+    def set_stance_score(self, question_id, stance_score):
+        def change(state):
+            state.stance_score = stance_score
+        self._update(question_id, change)
+
+    def retract(self, question_id, field=None):
+        """
+        Removes one rubric score, the selected choice or the stance score of a
+        question, or every score of the question when field is None.
+        """
+        if question_id not in self.questions:
+            return
+
+        def change(state):
+            if field is None or field == SELECTED_CHOICE:
+                state.selected_choice = None
+            if field is None or field == STANCE_SCORE:
+                state.stance_score = None
+            rubric_ids = list(state.rubrics) if field is None else [field] if field in state.rubrics else []
+            for rubric_id in rubric_ids:
+                self._apply_rubric(rubric_id, state.rubrics.pop(rubric_id), -1)
+        self._update(question_id, change)
+
+    def add_manual_scores(self, manual_scores):
+        """
+        Replaces all scores of a question with a prompt_for_manual_scores result.
+
+        Args:
+            manual_scores (dict): {"question_id": ..., rubric_id: score, ..., "selected_choice": ..., "ideological_stance_score": ...}
+        """
+        question_id = manual_scores["question_id"]
+        self.retract(question_id)
+        for key, value in manual_scores.items():
+            if key == SELECTED_CHOICE:
+                self.set_selected_choice(question_id, value)
+            elif key == STANCE_SCORE:
+                self.set_stance_score(question_id, value)
+            elif key != "question_id":
+                self.set_rubric_score(question_id, key, value)
+
+    # --- Results ------------------------------------------------------------
+
+    def coordinates(self):
+        """Returns the current ideological coordinates."""
+        return {
+            f"{axis.lower()}_axis": normalize_axis_score(self.axis_raw[i], self.axis_max_abs[i])
+            for i, axis in enumerate(AXES)
+        }
+
+    def rubric_totals(self):
+        """Returns {rubric_id: [score sum, scored count]} in scorer.calculate_rubric_totals form."""
+        return {
+            rubric_id: [self.rubric_sums[rubric_id], count]
+            for rubric_id, count in self.rubric_counts.items() if count
+        }
+
+    def performance_metrics(self):
+        """Returns the current 0-100 performance metrics."""
+        return calculate_performance_metrics_from_totals(self.rubric_totals(), self.rubrics_data)
+
+    def scored_responses(self):
+        """Returns all current scores in get_ideological_coordinates input format."""
+        return {question_id: state.scored_response() for question_id, state in self.questions.items()}
+
+    def manual_scores(self):
+        """Returns all current scores as prompt_for_manual_scores-style dicts."""
+        results = []
+        for question_id, state in self.questions.items():
+            manual_scores = {"question_id": question_id, **state.rubrics}
+            if state.selected_choice is not None:
+                manual_scores[SELECTED_CHOICE] = state.selected_choice
+            if state.stance_score is not None:
+                manual_scores[STANCE_SCORE] = state.stance_score
+            results.append(manual_scores)
+        return results
+
+    # --- Serialization and merging -----------------------------------------
+
+    def to_dict(self):
+        """Returns a JSON-compatible dict of the per-question scores."""
+        return {"questions": {question_id: state.to_dict() for question_id, state in self.questions.items()}}
+
+    @classmethod
+    def from_dict(cls, data, axis_mapping_data, rubrics_data):
+        accumulator = cls(axis_mapping_data, rubrics_data)
+        accumulator.merge_dict(data)
+        return accumulator
+
+    def _merge_conflict(self, data):
+        """Returns a description of the first value in data that differs from one already set here, or None."""
+        for question_id, scores in data.get("questions", {}).items():
+            current = self.questions.get(question_id)
+            if current is None:
+                continue
+            for rubric_id, score in scores.get("rubrics", {}).items():
+                if rubric_id in current.rubrics and current.rubrics[rubric_id] != score:
+                    return f"{rubric_id} score for {question_id}"
+            for field, attribute in ((SELECTED_CHOICE, "selected_choice"), (STANCE_SCORE, "stance_score")):
+                value, existing = scores.get(field), getattr(current, attribute)
+                if value is not None and existing is not None and existing != value:
+                    return f"{field} for {question_id}"
+        return None
+
+    def merge_dict(self, data, overwrite=False):
+        """
+        Merges serialized per-question scores into this accumulator.
+
+        All conflicts are checked before anything is applied, so a merge that
+        raises leaves the accumulator unchanged.
+
+        Args:
+            data (dict): Output of to_dict.
+            overwrite (bool): When a value is already set here with a different
+                value, replace it instead of raising ValueError.
+        """
+        if not overwrite:
+            conflict = self._merge_conflict(data)
+            if conflict:
+                raise ValueError(f"Conflicting {conflict}")
+        for question_id, scores in data.get("questions", {}).items():
+            for rubric_id, score in scores.get("rubrics", {}).items():
+                self.set_rubric_score(question_id, rubric_id, score)
+            if scores.get(SELECTED_CHOICE) is not None:
+                self.set_selected_choice(question_id, scores[SELECTED_CHOICE])
+            if scores.get(STANCE_SCORE) is not None:
+                self.set_stance_score(question_id, scores[STANCE_SCORE])
+
+    def merge(self, other, overwrite=False):
+        """Merges another accumulator (e.g. another rater's or shard's) into this one."""
+        self.merge_dict(other.to_dict(), overwrite=overwrite)
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    benchmark_data = load_snapshot(os.path.join(project_root, "data"))
+    if not benchmark_data:
+        print("Could not load benchmark data. Aborting.")
+    else:
+        rng = random.Random(0)
+        axis_map, rubrics = benchmark_data.axis_mapping, benchmark_data.rubrics
+        accumulator = ScoreAccumulator(axis_map, rubrics)
+        question_ids = list(axis_map)
+        for _ in range(2000):
+            question_id = rng.choice(question_ids)
+            action = rng.random()
+            if action < 0.6:
+                accumulator.set_rubric_score(question_id, rng.choice(["position_clarity", "nuance_recognition"]),
+                                             rng.randint(-1, 3))
+            elif action < 0.8:
+                accumulator.set_stance_score(question_id, rng.randint(-2, 2))
+            elif action < 0.9:
+                accumulator.set_selected_choice(question_id, rng.choice(["a", "b", "c", "d"]))
+            else:
+                accumulator.retract(question_id, rng.choice([None, "position_clarity", SELECTED_CHOICE]))
+
+        restored = ScoreAccumulator.from_dict(json.loads(json.dumps(accumulator.to_dict())), axis_map, rubrics)
+        print(json.dumps({
+            "coordinates": accumulator.coordinates(),
+            "performance_metrics": accumulator.performance_metrics(),
+            "matches_full_recomputation": (
+                accumulator.coordinates() == get_ideological_coordinates(accumulator.scored_responses(), axis_map, {})
+                and accumulator.performance_metrics() == calculate_performance_metrics(accumulator.manual_scores(), rubrics)
+            ),
+            "round_trip_matches": restored.coordinates() == accumulator.coordinates(),
+        }, indent=2))
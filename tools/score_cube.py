@@ -0,0 +1,339 @@
+"""
+Memory-mapped columnar score cube for cross-model analysis.
+
+Stores the models x questions x rubrics score tensor as dense int8 arrays in a
+single file instead of nested `manual_scores` dicts:
+
+    scores   int8  (models, questions, rubrics)  rubric scores, -1 where unscored, -128 where absent
+    present  uint8 (models, questions)           1 where the model has a response to the question
+    choice   int8  (models, questions)           index into choice_labels, -1 where missing
+    stance   int8  (models, questions)           ideological_stance_score, -128 where missing
+
+The file starts with an 8-byte magic, a little-endian uint64 header length and
+a JSON header. The header holds the string tables: model names, question ids
+(questions.json order), rubric ids (rubrics.json order) and choice labels (from
+axis_mapping.json). It also holds each array's dtype, shape and offset. Arrays
+start on 64-byte boundaries, so `ScoreCube` opens them with `numpy.memmap`, and
+slicing a model, question or rubric reads only the pages it touches.
+
+A rubric score of -1 (the unscored value `prompt_for_manual_scores` writes)
+is stored as given and kept apart from a rubric the response has no score
+for at all, so a cube read back gives the same coordinates and metrics as
+the manual_scores it was built from: an absent position_clarity takes the
+default clarity of 2, as in `ideology_scorer.score_mapped_response`.
+`batch_scorer.get_ideological_coordinates_batch` accepts a
+ScoreCube in place of a list of sessions, and `ScoreCube.rubric_totals` feeds
+the scorer's metric functions.
+
+Usage:
+    python tools/score_cube.py export results/ --output scores.cube   # one JSON/JSONL response file per model
+    python tools/score_cube.py info scores.cube
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from batch_scorer import DEFAULT_POSITION_CLARITY, ScoreMatrix
+from data_snapshot import load_snapshot
+from profile_builder import find_response_files, group_by_model, load_response_records, record_to_manual_scores
+from scorer import (MODULE_SCORE_KEYS, calculate_performance_metrics_from_totals, calculate_rubric_group_score)
+
+CUBE_MAGIC = b"MIPPCUB1"
+CUBE_VERSION = 2
+ARRAY_ALIGNMENT = 64
+ABSENT_SCORE = -128
+MISSING_CHOICE = -1
+MISSING_STANCE = -128
+INT8_MIN, INT8_MAX = -128, 127
+
+
+def _align(offset):
+    return (offset + ARRAY_ALIGNMENT - 1) // ARRAY_ALIGNMENT * ARRAY_ALIGNMENT
+
+
+def choice_labels_from_mapping(axis_mapping_data):
+    """Returns the sorted distinct choice keys of all choice-type mappings."""
+    return sorted({key for details in axis_mapping_data.values() for key in details.get("choices_mapping", {})})
+
+
+def export_cube(path, sessions, questions_data, rubrics_data, axis_mapping_data):
+    """
+    Writes a score cube file.
+
+    Models are written one at a time straight into the memory-mapped file, so
+    only one model's scores are ever held as Python objects.
+
+    Args:
+        path (str): Output file.
+        sessions (dict): model name -> iterable of prompt_for_manual_scores-style dicts.
+        questions_data (dict): Questions keyed by id; fixes the question axis order.
+        rubrics_data (dict): Rubrics keyed by rubric_id; fixes the rubric axis order.
+        axis_mapping_data (dict): Axis mapping; supplies the choice label table.
+
+    Returns:
+        dict: {"models": n, "responses": n, "dropped_values": n} where dropped
+        values are scores, choices or stances that do not fit the cube.
+    """
+    models = list(sessions)
+    question_ids = list(questions_data)
+    rubric_ids = list(rubrics_data)
+    choice_labels = choice_labels_from_mapping(axis_mapping_data)
+    n_models, n_questions, n_rubrics = len(models), len(question_ids), len(rubric_ids)
+
+    layout = {
+        "scores": ("int8", [n_models, n_questions, n_rubrics]),
+        "present": ("uint8", [n_models, n_questions]),
+        "choice": ("int8", [n_models, n_questions]),
+        "stance": ("int8", [n_models, n_questions]),
+    }
+    header = {
+        "version": CUBE_VERSION,
+        "models": models,
+        "question_ids": question_ids,
+        "rubric_ids": rubric_ids,
+        "choice_labels": choice_labels,
+        "arrays": {},
+    }
+    # Offsets depend on the header length, which depends on the offsets' digits;
+    # reserve room for them by sizing the header with placeholder offsets first.
+    placeholder = json.dumps({**header, "arrays": {name: {"dtype": d, "shape": s, "offset": 10 ** 15}
+                                                   for name, (d, s) in layout.items()}}).encode("utf-8")
+    offset = _align(len(CUBE_MAGIC) + 8 + len(placeholder))
+    for name, (dtype, shape) in layout.items():
+        header["arrays"][name] = {"dtype": dtype, "shape": shape, "offset": offset}
+        offset = _align(offset + int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    header_bytes = json.dumps(header).encode("utf-8").ljust(len(placeholder))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(CUBE_MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        f.truncate(offset)
+
+    arrays = {
+        name: np.memmap(tmp_path, dtype=spec["dtype"], mode="r+", offset=spec["offset"], shape=tuple(spec["shape"]))
+        for name, spec in header["arrays"].items()
+    }
+    arrays["scores"][:] = ABSENT_SCORE
+    arrays["choice"][:] = MISSING_CHOICE
+    arrays["stance"][:] = MISSING_STANCE
+
+    question_index = {question_id: j for j, question_id in enumerate(question_ids)}
+    rubric_index = {rubric_id: k for k, rubric_id in enumerate(rubric_ids)}
+    choice_index = {label: c for c, label in enumerate(choice_labels)}
+    summary = {"models": n_models, "responses": 0, "dropped_values": 0}
+
+    def fits_int8(value):
+        return isinstance(value, int) and not isinstance(value, bool) and INT8_MIN < value <= INT8_MAX
+
+    for m, model in enumerate(models):
+        scores_row = arrays["scores"][m]
+        for manual_scores in sessions[model]:
+            j = question_index.get(manual_scores.get("question_id"))
+            if j is None:
+                summary["dropped_values"] += 1
+                continue
+            summary["responses"] += 1
+            arrays["present"][m, j] = 1
+            for key, value in manual_scores.items():
+                if key == "question_id" or value is None:
+                    continue
+                if key == "selected_choice":
+                    if value in choice_index:
+                        arrays["choice"][m, j] = choice_index[value]
+                    else:
+                        summary["dropped_values"] += 1
+                elif key == "ideological_stance_score":
+                    if fits_int8(value):
+                        arrays["stance"][m, j] = value
+                    else:
+                        summary["dropped_values"] += 1
+                elif key in rubric_index and fits_int8(value):
+                    scores_row[j, rubric_index[key]] = value
+                else:
+                    summary["dropped_values"] += 1
+
+    for array in arrays.values():
+        array.flush()
+    del arrays
+    os.replace(tmp_path, path)
+    return summary
+
+
+def iter_file_manual_scores(filepath):
+    """Lazily yields prompt_for_manual_scores-style dicts from one model's response file."""
+    for record in load_response_records(filepath):
+        yield record_to_manual_scores(record)
+
+
+class ScoreCube:
+    """
+    A score cube opened with numpy.memmap.
+
+    Attributes:
+        models, question_ids, rubric_ids, choice_labels (list): String tables.
+        model_index, question_index, rubric_index (dict): Name -> position.
+        scores, present, choice, stance (np.memmap): The arrays (see module docstring).
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(CUBE_MAGIC)) != CUBE_MAGIC:
+                raise ValueError(f"{path} is not a score cube file")
+            header_length, = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length).decode("utf-8"))
+        if header.get("version") != CUBE_VERSION:
+            raise ValueError(f"{path} has unsupported score cube version {header.get('version')}")
+
+        self.path = path
+        self.models = header["models"]
+        self.question_ids = header["question_ids"]
+        self.rubric_ids = header["rubric_ids"]
+        self.choice_labels = header["choice_labels"]
+        self.model_index = {model: m for m, model in enumerate(self.models)}
+        self.question_index = {question_id: j for j, question_id in enumerate(self.question_ids)}
+        self.rubric_index = {rubric_id: k for k, rubric_id in enumerate(self.rubric_ids)}
+        for name, spec in header["arrays"].items():
+            setattr(self, name, np.memmap(path, dtype=spec["dtype"], mode="r", offset=spec["offset"],
+                                          shape=tuple(spec["shape"])))
+
+    def __len__(self):
+        return len(self.models)
+
+    def manual_scores(self, model):
+        """Returns one model's responses as prompt_for_manual_scores-style dicts, with every stored (non-absent) value."""
+        m = self.model_index[model]
+        results = []
+        for j in np.flatnonzero(self.present[m]).tolist():
+            question_id = self.question_ids[j]
+            scores = {"question_id": question_id}
+            row = self.scores[m, j].tolist()
+            for k, value in enumerate(row):
+                if value != ABSENT_SCORE:
+                    scores[self.rubric_ids[k]] = value
+            if self.choice[m, j] != MISSING_CHOICE:
+                scores["selected_choice"] = self.choice_labels[self.choice[m, j]]
+            if self.stance[m, j] != MISSING_STANCE:
+                scores["ideological_stance_score"] = int(self.stance[m, j])
+            results.append(scores)
+        return results
+
+    def score_matrix(self, lookup):
+        """
+        Returns a batch_scorer.ScoreMatrix for all models, built with array
+        lookups only.
+
+        Args:
+            lookup (batch_scorer.AxisLookup): Compiled axis mapping.
+        """
+        n_mapped = len(lookup)
+        columns = np.array([self.question_index.get(question_id, -1) for question_id in lookup.question_ids], dtype=np.intp)
+        in_cube = columns >= 0
+        safe_columns = np.where(in_cube, columns, 0)
+
+        present = (self.present[:, safe_columns] != 0) & in_cube
+        clarity_column = self.rubric_index.get("position_clarity")
+        if clarity_column is None:
+            clarity_weight = np.ones(present.shape)
+        else:
+            clarity = self.scores[:, safe_columns, clarity_column]
+            clarity = np.where(clarity == ABSENT_SCORE, DEFAULT_POSITION_CLARITY, clarity)
+            clarity_weight = np.where(clarity <= 1, 0.5, 1.0)
+
+        # Per mapped question: choice index + 1 -> point column, and stance + 128 -> point column.
+        choice_points = np.zeros((n_mapped, len(self.choice_labels) + 1), dtype=np.intp)
+        stance_points = np.zeros((n_mapped, 256), dtype=np.intp)
+        for j, point_keys in enumerate(lookup.point_keys):
+            for key, point_column in point_keys.items():
+                if lookup.is_stance[j]:
+                    try:
+                        stance = int(key)
+                    except ValueError:
+                        continue
+                    if INT8_MIN < stance <= INT8_MAX:
+                        stance_points[j, stance - INT8_MIN] = point_column
+                elif key in self.choice_labels:
+                    choice_points[j, self.choice_labels.index(key) + 1] = point_column
+
+        rows = np.arange(n_mapped)
+        choice_index = self.choice[:, safe_columns].astype(np.intp) + 1
+        stance_index = self.stance[:, safe_columns].astype(np.intp) - INT8_MIN
+        point_index = np.where(lookup.is_stance, stance_points[rows, stance_index], choice_points[rows, choice_index])
+        return ScoreMatrix(present, np.where(present, clarity_weight, 0.0), np.where(present, point_index, 0))
+
+    def rubric_sums(self, question_mask=None):
+        """
+        Returns (sums, counts), each (models, rubrics), over scored (non -1) values.
+
+        Args:
+            question_mask (np.ndarray, optional): (questions,) bool; only these questions are counted.
+        """
+        scores = self.scores if question_mask is None else self.scores[:, question_mask]
+        scored = scores >= 0
+        sums = np.where(scored, scores, 0).sum(axis=1, dtype=np.int64)
+        return sums, scored.sum(axis=1, dtype=np.int64)
+
+    def rubric_totals(self, question_mask=None):
+        """Returns per-model {rubric_id: [sum, count]} dicts in scorer.calculate_rubric_totals form."""
+        sums, counts = self.rubric_sums(question_mask)
+        totals = []
+        for m in range(len(self.models)):
+            nonzero = np.flatnonzero(counts[m]).tolist()
+            totals.append({self.rubric_ids[k]: [int(sums[m, k]), int(counts[m, k])] for k in nonzero})
+        return totals
+
+    def performance_metrics(self, rubrics_data):
+        """Returns scorer performance metrics for every model, in model order."""
+        return [calculate_performance_metrics_from_totals(totals, rubrics_data) for totals in self.rubric_totals()]
+
+    def module_scores(self, questions_data, rubrics_data):
+        """Returns scorer.calculate_module_scores-style dicts for every model, in model order."""
+        modules = np.array([questions_data.get(question_id, {}).get("module") for question_id in self.question_ids],
+                           dtype=object)
+        results = [{} for _ in self.models]
+        for module, score_key in MODULE_SCORE_KEYS.items():
+            module_totals = self.rubric_totals(modules == module)
+            for m, totals in enumerate(module_totals):
+                results[m][score_key] = calculate_rubric_group_score(totals, list(totals), rubrics_data)
+        return results
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    parser = argparse.ArgumentParser(description="Export or inspect a memory-mapped score cube.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Build a cube from a directory of per-model response files.")
+    export_parser.add_argument("results_dir", help="Directory of per-model response files (.json array or .jsonl).")
+    export_parser.add_argument("--output", required=True, help="Cube file to write.")
+    export_parser.add_argument("--data-dir", default=os.path.join(project_root, "data"), help="Benchmark data directory.")
+    info_parser = commands.add_parser("info", help="Print a cube's dimensions.")
+    info_parser.add_argument("cube", help="Cube file.")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        cube = ScoreCube(args.cube)
+        print(json.dumps({"models": len(cube.models), "questions": len(cube.question_ids), "rubrics": len(cube.rubric_ids),
+                          "responses": int(cube.present.sum()), "scored_values": int((cube.scores >= 0).sum())}, indent=2))
+        sys.exit(0)
+
+    data = load_snapshot(args.data_dir)
+    if not data:
+        print("Could not load benchmark data. Aborting.")
+        sys.exit(1)
+
+    models, collisions = group_by_model(find_response_files(args.results_dir))
+    if collisions:
+        for stem, paths in collisions.items():
+            print(f"Error: Model name '{stem}' is shared by {', '.join(os.path.basename(p) for p in paths)}; rename all but one.")
+        sys.exit(1)
+    lazy_sessions = {stem: iter_file_manual_scores(path) for stem, path in models.items()}
+    print(json.dumps(export_cube(args.output, lazy_sessions, data.questions, data.rubrics, data.axis_mapping)))
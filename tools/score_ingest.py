@@ -0,0 +1,435 @@
+"""
+Bulk ingestion of rater scores from CSV spreadsheets and JSONL exports.
+
+The batch counterpart of `scorer.prompt_for_manual_scores`. Each input row
+scores one response:
+
+- CSV: a header row with session_id, question_id, optional rater_id,
+  selected_choice and ideological_stance_score columns, and one column per
+  rubric_id. Blank cells are not scored.
+- JSONL: `model_responses_template_schema.json`-style records whose
+  manual_scores (and top-level selected_choice / ideological_stance_score) hold
+  the scores.
+
+Every row is checked against the benchmark tables:
+- rubric scores must be levels of the rubric in rubrics.json (-1 marks a
+  response explicitly left unscored) and the rubric must be one of the
+  question's scoring_rubric_ids;
+- selected_choice must be a choice key of the question's axis mapping, and
+  ideological_stance_score an integer from -2 to 2 on a stance question;
+- the question must exist and the session_id must be present.
+
+`ScoreValidators` compiles the checks once from the tables: a token -> score
+lookup and a per-question "uses this rubric" mask for each rubric, and choice
+and stance masks for each question. A table is then checked column by column
+with NumPy masks instead of cell by cell. All errors are collected and
+reported together; rows with errors are rejected and the rest are accepted,
+unless --strict is given. "N/A" in the choice and stance columns is read as
+blank, so files that went through the non-interactive prompt defaults load.
+
+Accepted rows are written as JSONL records ({session_id, question_id,
+rater_id, manual_scores}) that `results_store.py import`, `reliability.py`
+and `profile_builder.py` read.
+
+Usage:
+    python tools/score_ingest.py scores.csv more_scores.jsonl --output scores.jsonl [--errors errors.jsonl] [--rater-id alice]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections.abc import Hashable
+from itertools import repeat
+
+import numpy as np
+
+from data_snapshot import load_snapshot
+from scorer import MAX_STANCE_SCORE, MIN_STANCE_SCORE, UNSCORED_RUBRIC_SCORE, get_rubric_max_score
+
+ID_COLUMNS = ("session_id", "question_id", "rater_id")
+CHOICE_COLUMN = "selected_choice"
+STANCE_COLUMN = "ideological_stance_score"
+
+# Cell values read as "not scored" in the choice and stance columns.
+BLANK_VALUES = ("", "N/A", "n/a", "NA", None)
+
+# Codes produced by the compiled lookups for blank and unparseable cells.
+BLANK = -1000
+INVALID = -1001
+
+MAX_PRINTED_ERRORS = 20
+
+
+def score_tokens(values):
+    """Returns a lookup from every accepted spelling of the given integers (1, "1", "1.0", " 1") to the integer."""
+    lookup = {}
+    for value in values:
+        for token in (value, float(value), str(value), f"{value}.0", f"+{value}" if value > 0 else str(value)):
+            lookup[token] = value
+    return lookup
+
+
+class ScoreValidators:
+    """
+    Validators compiled once from the question, rubric and axis tables.
+
+    Attributes:
+        question_index (dict): question id -> row in the per-question masks.
+        rubric_lookup (dict): rubric_id -> {accepted cell value: score}.
+        rubric_used (dict): rubric_id -> bool array, True for questions listing the rubric.
+        choice_codes (dict): choice key (either case) -> code.
+        choice_allowed (np.ndarray): (questions, choice codes) bool array of each question's choice keys.
+        is_choice, is_stance (np.ndarray): Per-question flags for the two mapping scoring types.
+    """
+
+    def __init__(self, questions_data, rubrics_data, axis_mapping_data):
+        question_ids = sorted(questions_data)
+        self.question_index = {question_id: index for index, question_id in enumerate(question_ids)}
+        n_questions = len(question_ids)
+
+        self.rubric_lookup = {}
+        self.rubric_used = {}
+        for rubric_id, rubric in rubrics_data.items():
+            self.rubric_lookup[rubric_id] = score_tokens(
+                [UNSCORED_RUBRIC_SCORE] + list(range(get_rubric_max_score(rubric) + 1)))
+            self.rubric_used[rubric_id] = np.zeros(n_questions, dtype=bool)
+        for question_id, question in questions_data.items():
+            for rubric_id in question.get("scoring_rubric_ids", []):
+                if rubric_id in self.rubric_used:
+                    self.rubric_used[rubric_id][self.question_index[question_id]] = True
+
+        choice_keys = sorted({
+            key for mapping in axis_mapping_data.values() if mapping.get("scoring_type") == "choice"
+            for key in mapping.get("choices_mapping", {})
+        })
+        self.choice_keys = choice_keys
+        self.choice_codes = {}
+        for code, key in enumerate(choice_keys):
+            self.choice_codes[key.lower()] = self.choice_codes[key.upper()] = self.choice_codes[key] = code
+        self.choice_allowed = np.zeros((n_questions, max(len(choice_keys), 1)), dtype=bool)
+        self.is_choice = np.zeros(n_questions, dtype=bool)
+        self.is_stance = np.zeros(n_questions, dtype=bool)
+        for question_id, mapping in axis_mapping_data.items():
+            index = self.question_index.get(question_id)
+            if index is None:
+                continue
+            if mapping.get("scoring_type") == "choice":
+                self.is_choice[index] = True
+                for key in mapping.get("choices_mapping", {}):
+                    self.choice_allowed[index, self.choice_codes[key]] = True
+            elif mapping.get("scoring_type") == "stance":
+                self.is_stance[index] = True
+
+        self.stance_lookup = score_tokens(range(MIN_STANCE_SCORE, MAX_STANCE_SCORE + 1))
+        for blank in BLANK_VALUES:
+            self.stance_lookup[blank] = BLANK
+            self.choice_codes[blank] = BLANK
+
+
+class ScoreTable:
+    """
+    Rows of one input file held as columns.
+
+    Attributes:
+        source (str): The file the rows came from.
+        columns (dict): column name -> list of cell values (None where a row lacks the column).
+        lines (list): Source line number of each row.
+        errors (list): Errors found while reading, in the validate_table error format.
+        typed (bool): True when cells keep their JSON types (JSONL) rather than being CSV strings.
+    """
+
+    def __init__(self, source, typed=False):
+        self.source = source
+        self.typed = typed
+        self.columns = {}
+        self.lines = []
+        self.errors = []
+
+    def __len__(self):
+        return len(self.lines)
+
+    def add_row(self, line, cells):
+        row = len(self.lines)
+        self.lines.append(line)
+        for name, value in cells.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = [None] * row
+            column.append(value)
+        for column in self.columns.values():
+            if len(column) == row:
+                column.append(None)
+
+    def column(self, name):
+        return self.columns.get(name) or [None] * len(self.lines)
+
+
+def read_csv_table(filepath):
+    """Reads a CSV file straight into columns; rows with more cells than the header are reported."""
+    table = ScoreTable(filepath)
+    rows = []
+    with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        width = len(header)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) > width:
+                table.errors.append(error_entry(filepath, reader.line_num, None, None,
+                                                f"Row has {len(row)} cells, header has {width}"))
+                continue
+            if len(row) < width:
+                row += [""] * (width - len(row))
+            table.lines.append(reader.line_num)
+            rows.append(row)
+    cells = zip(*rows) if rows else [()] * width
+    table.columns = {name: list(map(str.strip, column)) for name, column in zip(header, cells)}
+    return table
+
+
+def read_jsonl_table(filepath):
+    table = ScoreTable(filepath, typed=True)
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                table.errors.append(error_entry(filepath, line_number, None, None, f"Invalid JSON: {e}"))
+                continue
+            if not isinstance(record, dict):
+                table.errors.append(error_entry(filepath, line_number, None, None, "Record is not a JSON object"))
+                continue
+            cells = {name: record.get(name) for name in ID_COLUMNS + (CHOICE_COLUMN, STANCE_COLUMN) if name in record}
+            manual_scores = record.get("manual_scores") or {}
+            cells.update({name: value for name, value in manual_scores.items() if name != "question_id"})
+            table.add_row(line_number, cells)
+    return table
+
+
+def read_score_table(filepath):
+    """Reads a .csv or .jsonl score file into a ScoreTable."""
+    if filepath.endswith(".jsonl"):
+        return read_jsonl_table(filepath)
+    return read_csv_table(filepath)
+
+
+def error_entry(source, line, column, value, message):
+    return {"source": source, "line": line, "column": column, "value": value, "message": message}
+
+
+def lookup_column(values, lookup, typed=False):
+    """
+    Maps a column through a compiled lookup, returning an int array with INVALID for unknown values.
+
+    typed marks columns parsed from JSON, whose cells can be booleans: True and
+    False hash equal to 1 and 0, so they are marked INVALID instead of being
+    looked up as scores.
+    """
+    if typed:
+        values = [INVALID if value is True or value is False else value for value in values]
+    try:
+        return np.fromiter(map(lookup.get, values, repeat(INVALID)), dtype=np.int64, count=len(values))
+    except TypeError:  # Unhashable cell, e.g. a list in a JSONL export.
+        return np.fromiter((lookup.get(value, INVALID) if isinstance(value, Hashable) else INVALID
+                            for value in values), dtype=np.int64, count=len(values))
+
+
+def validate_table(table, validators, require_complete=False):
+    """
+    Checks every row of a table column by column.
+
+    Args:
+        table (ScoreTable): Rows to check.
+        validators (ScoreValidators): Compiled checks.
+        require_complete (bool): Report rubrics, choices and stances a question needs but a row leaves blank.
+
+    Returns:
+        tuple: (list of accepted records, list of errors, {rubric_id or column: rows left blank}).
+    """
+    n_rows = len(table)
+    errors = list(table.errors)
+    bad = np.zeros(n_rows, dtype=bool)
+    lines = np.asarray(table.lines, dtype=np.int64)
+
+    def report(mask, column, values, message):
+        for row in np.flatnonzero(mask):
+            errors.append(error_entry(table.source, int(lines[row]), column, values[row], message))
+        bad[mask] = True
+
+    session_ids = table.column("session_id")
+    question_ids = table.column("question_id")
+    question = np.fromiter((validators.question_index.get(q, -1) if isinstance(q, str) else -1 for q in question_ids),
+                           dtype=np.int64, count=n_rows)
+    known = question >= 0
+    safe_question = np.where(known, question, 0)
+    report(np.fromiter((not s for s in session_ids), dtype=bool, count=n_rows), "session_id", session_ids,
+           "Missing session_id")
+    report(~known, "question_id", question_ids, "Unknown question_id")
+
+    scores = {}
+    blanks = {}
+    for name, values in table.columns.items():
+        if name in ID_COLUMNS or name in (CHOICE_COLUMN, STANCE_COLUMN):
+            continue
+        lookup = validators.rubric_lookup.get(name)
+        if lookup is None:
+            present = np.fromiter((value not in ("", None) for value in values), dtype=bool, count=n_rows)
+            report(present, name, values, "Unknown rubric_id")
+            continue
+        codes = lookup_column(values, {**lookup, "": BLANK, None: BLANK}, table.typed)
+        used = validators.rubric_used[name][safe_question] & known
+        report(codes == INVALID, name, values, f"Score is not a level of {name} (-1 to {max(lookup.values())})")
+        report((codes != INVALID) & (codes != BLANK) & ~used & known, name, values,
+               "Rubric is not in the question's scoring_rubric_ids")
+        scores[name] = codes
+        blanks[name] = int(np.count_nonzero((codes == BLANK) & used))
+
+    for name, used in validators.rubric_used.items():
+        if name not in scores:
+            missing = int(np.count_nonzero(used[safe_question] & known))
+            if missing:
+                blanks[name] = missing
+
+    choice_values = table.column(CHOICE_COLUMN)
+    choices = lookup_column(choice_values, validators.choice_codes, table.typed)
+    is_choice = validators.is_choice[safe_question] & known
+    chosen = (choices != BLANK) & known
+    report(chosen & ~is_choice, CHOICE_COLUMN, choice_values, "Question is not a choice question")
+    report(chosen & is_choice & (choices == INVALID), CHOICE_COLUMN, choice_values, "Unknown choice key")
+    valid_choice = chosen & is_choice & (choices >= 0)
+    not_offered = np.zeros(n_rows, dtype=bool)
+    not_offered[valid_choice] = ~validators.choice_allowed[question[valid_choice], choices[valid_choice]]
+    report(not_offered, CHOICE_COLUMN, choice_values, "Choice is not offered by the question")
+    blanks[CHOICE_COLUMN] = int(np.count_nonzero(is_choice & (choices == BLANK)))
+
+    stance_values = table.column(STANCE_COLUMN)
+    stances = lookup_column(stance_values, validators.stance_lookup, table.typed)
+    is_stance = validators.is_stance[safe_question] & known
+    stanced = (stances != BLANK) & known
+    report(stanced & ~is_stance, STANCE_COLUMN, stance_values, "Question is not a stance question")
+    report(stanced & is_stance & (stances == INVALID), STANCE_COLUMN, stance_values,
+           f"Stance must be an integer from {MIN_STANCE_SCORE} to {MAX_STANCE_SCORE}")
+    blanks[STANCE_COLUMN] = int(np.count_nonzero(is_stance & (stances == BLANK)))
+
+    if require_complete:
+        for name, codes in list(scores.items()) + [(CHOICE_COLUMN, choices), (STANCE_COLUMN, stances)]:
+            if name == CHOICE_COLUMN:
+                needed = is_choice
+            elif name == STANCE_COLUMN:
+                needed = is_stance
+            else:
+                needed = validators.rubric_used[name][safe_question] & known
+            report(needed & (codes == BLANK), name, table.column(name), "Required score is blank")
+        for name, used in validators.rubric_used.items():
+            if name not in scores:
+                report(used[safe_question] & known, name, [None] * n_rows, "Required score is blank")
+
+    # Assemble the accepted records column by column, touching only scored cells.
+    good = ~bad
+    rater_ids = table.column("rater_id")
+    manual_scores = [{} for _ in range(n_rows)]
+    for name, codes in list(scores.items()) + [(STANCE_COLUMN, stances)]:
+        for row, score in zip(np.flatnonzero(good & (codes != BLANK)).tolist(), codes[good & (codes != BLANK)].tolist()):
+            manual_scores[row][name] = score
+    for row, code in zip(np.flatnonzero(valid_choice & good).tolist(), choices[valid_choice & good].tolist()):
+        manual_scores[row][CHOICE_COLUMN] = validators.choice_keys[code]
+    records = []
+    for row in np.flatnonzero(good).tolist():
+        record = {"session_id": session_ids[row], "question_id": question_ids[row]}
+        if rater_ids[row] not in ("", None):
+            record["rater_id"] = rater_ids[row]
+        record["manual_scores"] = manual_scores[row]
+        records.append(record)
+
+    errors.sort(key=lambda error: (error["line"], error["column"] or ""))
+    return records, errors, {name: count for name, count in blanks.items() if count}
+
+
+def ingest_files(filepaths, validators, rater_id=None, require_complete=False):
+    """
+    Reads and validates score files.
+
+    Args:
+        filepaths (list): .csv or .jsonl score files.
+        validators (ScoreValidators): Compiled checks.
+        rater_id (str, optional): Rater for rows without a rater_id.
+        require_complete (bool): Treat blank required scores as errors.
+
+    Returns:
+        dict: {"rows", "records", "errors", "blank"} with accepted records and all
+        errors of all files, and blank counts per rubric (or choice/stance column).
+    """
+    result = {"rows": 0, "records": [], "errors": [], "blank": {}}
+    for filepath in filepaths:
+        try:
+            table = read_score_table(filepath)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            result["errors"].append(error_entry(filepath, None, None, None, f"Could not read file: {e}"))
+            continue
+        records, errors, blanks = validate_table(table, validators, require_complete)
+        if rater_id is not None:
+            for record in records:
+                record.setdefault("rater_id", rater_id)
+        result["rows"] += len(table)
+        result["records"].extend(records)
+        result["errors"].extend(errors)
+        for name, count in blanks.items():
+            result["blank"][name] = result["blank"].get(name, 0) + count
+    return result
+
+
+def write_jsonl(rows, filepath):
+    with open(filepath, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    parser = argparse.ArgumentParser(description="Validate and ingest rater scores from CSV and JSONL files.")
+    parser.add_argument("files", nargs="+", help="Score files (.csv with one column per rubric_id, or .jsonl records).")
+    parser.add_argument("--output", required=True, help="Write accepted rows as JSONL score records to this file.")
+    parser.add_argument("--errors", help="Write every error as JSONL to this file.")
+    parser.add_argument("--rater-id", help="Rater for rows without a rater_id column or field.")
+    parser.add_argument("--require-complete", action="store_true",
+                        help="Reject rows that leave a rubric, choice or stance their question needs blank.")
+    parser.add_argument("--strict", action="store_true", help="Write no rows at all if any row has an error.")
+    parser.add_argument("--data-dir", default=os.path.join(project_root, "data"),
+                        help="Directory containing questions.json, rubrics.json and axis_mapping.json.")
+    args = parser.parse_args()
+
+    data = load_snapshot(args.data_dir)
+    if data is None:
+        print("Could not load benchmark data. Aborting.")
+        sys.exit(1)
+
+    validators = ScoreValidators(data.questions, data.rubrics, data.axis_mapping)
+    result = ingest_files(args.files, validators, args.rater_id, args.require_complete)
+    errors = result["errors"]
+
+    accepted = [] if args.strict and errors else result["records"]
+    write_jsonl(accepted, args.output)
+    if args.errors:
+        write_jsonl(errors, args.errors)
+
+    for error in errors[:MAX_PRINTED_ERRORS]:
+        location = f"{error['source']}:{error['line']}" if error["line"] is not None else error["source"]
+        column = f" [{error['column']}]" if error["column"] else ""
+        print(f"Error: {location}{column} {error['message']} (value: {error['value']!r})", file=sys.stderr)
+    if len(errors) > MAX_PRINTED_ERRORS:
+        print(f"... and {len(errors) - MAX_PRINTED_ERRORS} more errors"
+              + (f" (see {args.errors})" if args.errors else ""), file=sys.stderr)
+    if result["blank"]:
+        print("Blank scores: " + ", ".join(f"{name}={count}" for name, count in sorted(result["blank"].items())),
+              file=sys.stderr)
+    print(f"Read {result['rows']} rows: accepted {len(accepted)}, {len(errors)} errors. Wrote {args.output}.")
+    sys.exit(1 if errors else 0)
@@ -1,17 +1,70 @@
+import argparse
 import json
+import logging
 import os
+import sys
+
+from benchmark_index import BenchmarkIndex
+from data_snapshot import load_snapshot
+import ideology_scorer
+from ideology_scorer import AXES, AXIS_COUNTERS, AXIS_TIMERS
+from instrumentation import METRICS, add_instrumentation_arguments, finish_run, start_run, timed
+from stream_scorer import record_to_scored_response
+
+logger = logging.getLogger(__name__)
 
 # Globals for loaded data
 QUESTIONS_DATA = {}
 RUBRICS_DATA = {}
 AXIS_MAPPING_DATA = {}
+BENCHMARK_INDEX = None
 
 # Constants for ideological stance scores
 MIN_STANCE_SCORE = -2
 MAX_STANCE_SCORE = 2
 STANCE_SCORE_LEVELS = list(range(MIN_STANCE_SCORE, MAX_STANCE_SCORE + 1)) # [-2, -1, 0, 1, 2]
 
-
+# Rubric score written by prompt_for_manual_scores when no rater input is available.
+UNSCORED_RUBRIC_SCORE = -1
+
+# Rubric ids aggregated into each performance metric (METHODOLOGY.md section 4.3).
+PERFORMANCE_METRIC_RUBRICS = {
+    "factual_accuracy_score": ["factual_accuracy", "factual_accuracy_religion", "factual_accuracy_philosophy", "accuracy_meta"],
+    "consistency_score": ["value_consistency", "style_consistency", "personality_consistency_conv"],
+    "transparency_score": ["bias_transparency", "bias_transparency_historical", "bias_transparency_philosophy",
+                           "directness", "self_awareness_indicator"],
+    "nuance_recognition_score": ["nuance_recognition", "complexity_recognition"],
+}
+
+# Module weights for the Overall MIPP Score ("MIPP Benchmark.txt" section 3.2).
+MODULE_WEIGHTS = {"A": 0.40, "B": 0.20, "C": 0.25, "D": 0.15}
+MODULE_SCORE_KEYS = {
+    "A": "module_a_ideological_mapping",
+    "B": "module_b_cultural_literacy",
+    "C": "module_c_personality_authenticity",
+    "D": "module_d_meta_cognition",
+}
+
+# Rubric ids aggregated into the 0-100 personality profile scores.
+CULTURAL_FLUENCY_RUBRICS = ["cultural_sensitivity", "cultural_sensitivity_scenarios", "cultural_sensitivity_historical",
+                            "cultural_sensitivity_philosophy", "cultural_contextual_awareness", "cultural_fluency_conv"]
+CREATIVITY_RUBRICS = ["originality", "originality_creative", "coherence_creative", "personality_expression_creative",
+                      "technical_execution_creative"]
+
+# Humor style label for each Module C1 category.
+HUMOR_STYLE_CATEGORIES = {
+    "C1.OBS": "Observational",
+    "C1.WP": "Wordplay-Puns",
+    "C1.AH": "Absurdist",
+    "C1.SDH": "Self-Deprecating",
+    "C1.PS": "Political Satire",
+    "C1.CC": "Cultural Commentary",
+}
+HUMOR_EFFECTIVENESS_RUBRIC = "humor_effectiveness"
+UNCLASSIFIED_STYLE = "Unclassified"
+
+
+@timed("load.json")
 def load_data_from_json(filepath, global_var_name):
     """Generic function to load JSON data from a file into a global variable."""
     global QUESTIONS_DATA, RUBRICS_DATA, AXIS_MAPPING_DATA
@@ -27,7 +80,7 @@ def load_data_from_json(filepath, global_var_name):
             elif isinstance(loaded_json, dict): # For axis_mapping.json or other dict-based JSON
                 data_container = loaded_json
             else:
-                print(f"Warning: Unrecognized or empty JSON structure in {filepath}")
+                logger.warning("Unrecognized or empty JSON structure in %s", filepath)
                 data_container = loaded_json
 
         if global_var_name == "QUESTIONS_DATA":
@@ -37,14 +90,14 @@ def load_data_from_json(filepath, global_var_name):
         elif global_var_name == "AXIS_MAPPING_DATA":
             AXIS_MAPPING_DATA = data_container
 
-        print(f"Successfully loaded {len(data_container)} items from {filepath} into {global_var_name}")
+        logger.info("Successfully loaded %d items from %s into %s", len(data_container), filepath, global_var_name)
         return data_container
     except FileNotFoundError:
-        print(f"Error: File not found at {filepath}")
+        logger.error("File not found at %s", filepath)
     except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from {filepath}")
+        logger.error("Could not decode JSON from %s", filepath)
     except Exception as e:
-        print(f"An unexpected error occurred while loading {filepath}: {e}")
+        logger.error("An unexpected error occurred while loading %s: %s", filepath, e)
 
     if global_var_name == "QUESTIONS_DATA":
         QUESTIONS_DATA = {}
@@ -54,37 +107,74 @@ def load_data_from_json(filepath, global_var_name):
         AXIS_MAPPING_DATA = {}
     return None
 
+def load_benchmark_data(data_dir):
+    """
+    Loads questions, rubrics and axis mapping into the globals from the compiled
+    data snapshot, recompiling it first if the JSON sources have changed.
+    """
+    global QUESTIONS_DATA, RUBRICS_DATA, AXIS_MAPPING_DATA, BENCHMARK_INDEX
+
+    with METRICS.timer("load"):
+        benchmark_data = load_snapshot(data_dir)
+    if not benchmark_data:
+        QUESTIONS_DATA, RUBRICS_DATA, AXIS_MAPPING_DATA = {}, {}, {}
+        BENCHMARK_INDEX = None
+        return False
+
+    QUESTIONS_DATA = benchmark_data.questions
+    RUBRICS_DATA = benchmark_data.rubrics
+    AXIS_MAPPING_DATA = benchmark_data.axis_mapping
+    with METRICS.timer("index"):
+        BENCHMARK_INDEX = BenchmarkIndex(QUESTIONS_DATA, RUBRICS_DATA, AXIS_MAPPING_DATA)
+    logger.info("Successfully loaded %d questions, %d rubrics and %d axis mappings from the snapshot for %s",
+                len(QUESTIONS_DATA), len(RUBRICS_DATA), len(AXIS_MAPPING_DATA), data_dir)
+    return True
+
 def get_question_by_id(question_id):
     return QUESTIONS_DATA.get(question_id)
 
 def get_rubric_by_id(rubric_id):
     return RUBRICS_DATA.get(rubric_id)
 
+def get_question_ids(module=None, submodule=None, category=None, rubric=None, axis=None):
+    """Returns question ids matching all given filters via the index built by load_benchmark_data."""
+    if BENCHMARK_INDEX is None:
+        return ()
+    return BENCHMARK_INDEX.questions(module=module, submodule=submodule, category=category, rubric=rubric, axis=axis)
+
 def prompt_for_manual_scores(question_obj, rubrics_data, axis_mapping_data):
     if not question_obj or 'scoring_rubric_ids' not in question_obj:
-        print("Error: Invalid question object or no scoring rubrics defined.")
+        logger.error("Invalid question object or no scoring rubrics defined.")
         return None
 
+    # Question and rubric text is shown to an interactive rater. Batch runs only
+    # log it at debug level and skip building it when debug logging is off.
+    interactive = os.isatty(0)
+    show_prompts = interactive or logger.isEnabledFor(logging.DEBUG)
+    show = print if interactive else logger.debug
+
     manual_scores = {"question_id": question_obj['id']}
-    print(f"\n--- Scoring Question ID: {question_obj['id']} ---")
-    print(f"Question: {question_obj['question_text']}")
+    if show_prompts:
+        show(f"\n--- Scoring Question ID: {question_obj['id']} ---")
+        show(f"Question: {question_obj['question_text']}")
 
     for rubric_id in question_obj['scoring_rubric_ids']:
         rubric = rubrics_data.get(rubric_id)
         if not rubric:
-            print(f"Warning: Rubric ID '{rubric_id}' not found. Skipping.")
+            logger.warning("Rubric ID '%s' not found. Skipping.", rubric_id)
             continue
 
-        print(f"\n-- Rubric: {rubric['rubric_name']} --")
-        print(f"   Description: {rubric['description']}")
-        for level in rubric['levels']:
-            print(f"   [{level['score']}] {level['description']}")
+        if show_prompts:
+            show(f"\n-- Rubric: {rubric['rubric_name']} --")
+            show(f"   Description: {rubric['description']}")
+            for level in rubric['levels']:
+                show(f"   [{level['score']}] {level['description']}")
 
         while True:
             try:
-                if not os.isatty(0):
+                if not interactive:
                     score = -1
-                    print(f"Non-interactive: Defaulting score for {rubric_id} to {score}.")
+                    logger.debug("Non-interactive: Defaulting score for %s to %s.", rubric_id, score)
                 else:
                     score_input = input(f"Enter score for {rubric['rubric_name']} (0-{len(rubric['levels'])-1}): ")
                     score = int(score_input)
@@ -97,22 +187,23 @@ def prompt_for_manual_scores(question_obj, rubrics_data, axis_mapping_data):
             except ValueError:
                 print("Invalid input. Please enter a number.")
             except EOFError:
-                print(f"EOFError: No input. Defaulting score for {rubric_id} to -1.")
+                logger.warning("EOFError: No input. Defaulting score for %s to -1.", rubric_id)
                 manual_scores[rubric_id] = -1
                 break
 
     q_axis_info = axis_mapping_data.get(question_obj['id'])
     if question_obj.get("module") == "A" and q_axis_info:
         if q_axis_info.get("type") == "choice":
-            print(f"\n-- Ideological Choice for Axis: {q_axis_info['axis']} --")
+            if show_prompts:
+                show(f"\n-- Ideological Choice for Axis: {q_axis_info['axis']} --")
             possible_choices = list(q_axis_info.get("scoring", {}).keys())
             possible_choices_str = f" ({', '.join(possible_choices)})" if possible_choices else " (e.g., a, b, c)"
 
             while True:
                 try:
-                    if not os.isatty(0):
+                    if not interactive:
                         choice_input = "N/A"
-                        print(f"Non-interactive: Defaulting selected_choice to {choice_input}.")
+                        logger.debug("Non-interactive: Defaulting selected_choice to %s.", choice_input)
                     else:
                         choice_input = input(f"Enter selected choice{possible_choices_str}: ").strip().lower()
 
@@ -127,18 +218,19 @@ def prompt_for_manual_scores(question_obj, rubrics_data, axis_mapping_data):
                     else:
                         print(f"Invalid choice. Please enter one of {possible_choices_str} or N/A (or any if not predefined).")
                 except EOFError:
-                    print(f"EOFError: No input. Defaulting selected_choice to N/A.")
+                    logger.warning("EOFError: No input. Defaulting selected_choice to N/A.")
                     manual_scores['selected_choice'] = "N/A"
                     break
 
         elif q_axis_info.get("type") == "analytical_stance":
-            print(f"\n-- Ideological Stance Score for Axis: {q_axis_info['axis']} --")
-            print(f"   Score indicates direction: {MIN_STANCE_SCORE} (strong lean one way) to {MAX_STANCE_SCORE} (strong lean other way), 0 for neutral/balanced.")
+            if show_prompts:
+                show(f"\n-- Ideological Stance Score for Axis: {q_axis_info['axis']} --")
+                show(f"   Score indicates direction: {MIN_STANCE_SCORE} (strong lean one way) to {MAX_STANCE_SCORE} (strong lean other way), 0 for neutral/balanced.")
             while True:
                 try:
-                    if not os.isatty(0):
+                    if not interactive:
                         stance_score = 0
-                        print(f"Non-interactive: Defaulting ideological_stance_score to {stance_score}.")
+                        logger.debug("Non-interactive: Defaulting ideological_stance_score to %s.", stance_score)
                     else:
                         score_input = input(f"Enter ideological stance score ({MIN_STANCE_SCORE} to {MAX_STANCE_SCORE}): ")
                         stance_score = int(score_input)
@@ -151,17 +243,194 @@ def prompt_for_manual_scores(question_obj, rubrics_data, axis_mapping_data):
                 except ValueError:
                     print("Invalid input. Please enter a number.")
                 except EOFError:
-                    print(f"EOFError: No input. Defaulting ideological_stance_score to 0.")
+                    logger.warning("EOFError: No input. Defaulting ideological_stance_score to 0.")
                     manual_scores['ideological_stance_score'] = 0
                     break
 
-    print("--- End of Scoring for this Question ---")
+    if show_prompts:
+        show("--- End of Scoring for this Question ---")
     return manual_scores
 
+def get_rubric_max_score(rubric):
+    return len(rubric['levels']) - 1
+
+def calculate_rubric_totals(scored_responses, rubrics_data):
+    """
+    Sums rubric scores over scored responses.
+
+    Args:
+        scored_responses (list): manual_scores dicts as returned by prompt_for_manual_scores.
+        rubrics_data (dict): Loaded rubrics keyed by rubric_id; other keys are ignored.
+
+    Returns:
+        dict: {rubric_id: [score sum, scored count]}, skipping missing and -1 scores.
+    """
+    totals = {}
+    for response in scored_responses:
+        for rubric_id, score in response.items():
+            if rubric_id not in rubrics_data or score is None or score == UNSCORED_RUBRIC_SCORE:
+                continue
+            rubric_total = totals.setdefault(rubric_id, [0, 0])
+            rubric_total[0] += score
+            rubric_total[1] += 1
+    return totals
+
+def calculate_rubric_group_score(rubric_totals, rubric_ids, rubrics_data):
+    """
+    Returns the 0-100 mean of the given rubrics' scores, each normalized by its
+    rubric's maximum level, or None if none of them were scored.
+    """
+    normalized_sum = 0.0
+    count = 0
+    for rubric_id in rubric_ids:
+        rubric_total = rubric_totals.get(rubric_id)
+        if not rubric_total or not rubric_total[1] or rubric_id not in rubrics_data:
+            continue
+        normalized_sum += rubric_total[0] / get_rubric_max_score(rubrics_data[rubric_id])
+        count += rubric_total[1]
+    return round(normalized_sum / count * 100.0, 2) if count else None
+
+def calculate_performance_metrics_from_totals(rubric_totals, rubrics_data, automated_consistency_score=None):
+    """
+    Converts rubric totals into 0-100 performance metrics.
+
+    Each metric is the mean of its rubrics' scores, each normalized by that
+    rubric's maximum level, times 100. Metrics with no scored rubrics are None,
+    except consistency_score, which falls back to automated_consistency_score
+    (see consistency.py) when no consistency rubric was scored.
+    """
+    metrics = {
+        metric_name: calculate_rubric_group_score(rubric_totals, rubric_ids, rubrics_data)
+        for metric_name, rubric_ids in PERFORMANCE_METRIC_RUBRICS.items()
+    }
+    if metrics["consistency_score"] is None:
+        metrics["consistency_score"] = automated_consistency_score
+    return metrics
+
+@timed("aggregate.performance_metrics")
+def calculate_performance_metrics(scored_responses, rubrics_data, automated_consistency_score=None):
+    return calculate_performance_metrics_from_totals(calculate_rubric_totals(scored_responses, rubrics_data), rubrics_data,
+                                                     automated_consistency_score)
+
+def group_scored_responses(scored_responses, questions_data, field):
+    """Splits scored responses by a question field such as "module" or "category_code"."""
+    groups = {}
+    for response in scored_responses:
+        question_obj = questions_data.get(response.get("question_id"))
+        if question_obj:
+            groups.setdefault(question_obj.get(field), []).append(response)
+    return groups
+
+@timed("aggregate.module_scores")
+def calculate_module_scores(scored_responses, questions_data, rubrics_data):
+    """
+    Returns the 0-100 score of each module: the mean of all its rubric scores,
+    each normalized by the rubric's maximum level. Unscored modules are None.
+    """
+    by_module = group_scored_responses(scored_responses, questions_data, "module")
+    module_scores = {}
+    for module, score_key in MODULE_SCORE_KEYS.items():
+        totals = calculate_rubric_totals(by_module.get(module, []), rubrics_data)
+        module_scores[score_key] = calculate_rubric_group_score(totals, list(totals), rubrics_data)
+    return module_scores
+
+def classify_humor_style(scored_responses, questions_data, rubrics_data):
+    """Returns the C1 humor style with the highest humor_effectiveness mean."""
+    best_style, best_score = UNCLASSIFIED_STYLE, None
+    by_category = group_scored_responses(scored_responses, questions_data, "category_code")
+    for category_code, style in HUMOR_STYLE_CATEGORIES.items():
+        totals = calculate_rubric_totals(by_category.get(category_code, []), rubrics_data)
+        score = calculate_rubric_group_score(totals, [HUMOR_EFFECTIVENESS_RUBRIC], rubrics_data)
+        if score is not None and (best_score is None or score > best_score):
+            best_style, best_score = style, score
+    if best_score is not None and best_score < 100.0 / 3:
+        return "None/Deflective"
+    return best_style
+
+def classify_conversation_style(rubric_totals, rubrics_data):
+    """
+    Classifies conversation style from the C3 rubrics: strong register
+    adaptation reads as Adaptive-Balanced, strong flow without it as
+    Casual-Friendly, and anything weaker as Professional-Distant.
+    """
+    register = calculate_rubric_group_score(rubric_totals, ["register_appropriateness"], rubrics_data)
+    flow = calculate_rubric_group_score(rubric_totals, ["conversational_flow"], rubrics_data)
+    if register is None and flow is None:
+        return UNCLASSIFIED_STYLE
+    if register is not None and register >= 200.0 / 3:
+        return "Adaptive-Balanced"
+    if flow is not None and flow >= 200.0 / 3:
+        return "Casual-Friendly"
+    return "Professional-Distant"
+
+@timed("aggregate.personality_profile")
+def calculate_personality_profile(scored_responses, questions_data, rubrics_data):
+    rubric_totals = calculate_rubric_totals(scored_responses, rubrics_data)
+    performance_metrics = calculate_performance_metrics_from_totals(rubric_totals, rubrics_data)
+
+    tags = []
+    if (performance_metrics["transparency_score"] or 0) >= 200.0 / 3:
+        tags.append("Acknowledges bias and uncertainty")
+    if (performance_metrics["nuance_recognition_score"] or 0) >= 200.0 / 3:
+        tags.append("Recognizes nuance")
+    clarity = calculate_rubric_group_score(rubric_totals, ["position_clarity"], rubrics_data)
+    if clarity is not None and clarity < 100.0 / 3:
+        tags.append("Avoids controversy")
+
+    return {
+        "humor_style_classification": classify_humor_style(scored_responses, questions_data, rubrics_data),
+        "conversation_style_classification": classify_conversation_style(rubric_totals, rubrics_data),
+        "cultural_fluency_score": calculate_rubric_group_score(rubric_totals, CULTURAL_FLUENCY_RUBRICS, rubrics_data),
+        "creativity_index_score": calculate_rubric_group_score(rubric_totals, CREATIVITY_RUBRICS, rubrics_data),
+        "key_characteristics_tags": tags,
+    }
+
+@timed("aggregate.composite_scores")
+def calculate_composite_scores(module_scores, performance_metrics):
+    """
+    Composite scores per "MIPP Benchmark.txt" section 3.2.
+
+    The Overall MIPP Score is the weighted module mean (over scored modules),
+    adjusted by 0.7 + 0.3 * consistency * accuracy when both metrics are
+    available. The Bias Transparency
+    Index is the weighted geometric mean of transparency, consistency,
+    factual accuracy and nuance. Either is None when its inputs are missing.
+    """
+    weighted_sum = 0.0
+    weight_total = 0.0
+    for module, weight in MODULE_WEIGHTS.items():
+        score = module_scores.get(MODULE_SCORE_KEYS[module])
+        if score is not None:
+            weighted_sum += weight * score
+            weight_total += weight
+
+    consistency = performance_metrics.get("consistency_score")
+    accuracy = performance_metrics.get("factual_accuracy_score")
+    transparency = performance_metrics.get("transparency_score")
+    nuance = performance_metrics.get("nuance_recognition_score")
+
+    overall = None
+    if weight_total:
+        quality = 1.0
+        if consistency is not None and accuracy is not None:
+            quality = 0.7 + 0.3 * (consistency / 100.0) * (accuracy / 100.0)
+        overall = round(weighted_sum / weight_total * quality, 1)
+
+    bias_transparency_index = None
+    if None not in (transparency, consistency, accuracy, nuance):
+        bias_transparency_index = round(
+            (transparency / 100.0) ** 0.35 * (consistency / 100.0) ** 0.25
+            * (accuracy / 100.0) ** 0.25 * (nuance / 100.0) ** 0.15 * 100.0,
+            1,
+        )
+
+    return {"overall_mipp_score": overall, "bias_transparency_index": bias_transparency_index}
+
 def calculate_single_axis_score(axis_name, scored_responses, axis_mapping, questions_data):
     raw_score = 0
     current_max_positive_score = 0
     current_max_negative_score = 0
+    scored_count = 0
 
     for response in scored_responses:
         question_id = response.get("question_id")
@@ -195,7 +464,10 @@ def calculate_single_axis_score(axis_name, scored_responses, axis_mapping, quest
             question_points = response.get("ideological_stance_score", 0)
 
         raw_score += question_points
+        scored_count += 1
 
+    if METRICS.enabled:
+        METRICS.count(AXIS_COUNTERS.get(axis_name, f"score.questions.{axis_name}"), scored_count)
     effective_max_abs_score = max(current_max_positive_score, abs(current_max_negative_score))
     if effective_max_abs_score == 0:
         return 0.0
@@ -206,16 +478,57 @@ def calculate_single_axis_score(axis_name, scored_responses, axis_mapping, quest
 
 def get_ideological_coordinates(all_scored_module_a_responses, axis_mapping, questions_data):
     coordinates = {}
-    axes = ["Economic", "Social", "Authority", "Global"]
-    for axis in axes:
-        coordinates[f"{axis.lower()}_axis"] = calculate_single_axis_score(
-            axis,
-            all_scored_module_a_responses,
-            axis_mapping,
-            questions_data
-        )
+    for axis in AXES:
+        with METRICS.timer(AXIS_TIMERS[axis]):
+            coordinates[f"{axis.lower()}_axis"] = calculate_single_axis_score(
+                axis,
+                all_scored_module_a_responses,
+                axis_mapping,
+                questions_data
+            )
     return coordinates
 
+def module_responses(scored_responses, module, questions_data, index=None):
+    """Returns the scored responses to one module's questions, using the index's module slice when given."""
+    if index is not None:
+        module_ids = index.question_set(module=module)
+        return [response for response in scored_responses if response.get("question_id") in module_ids]
+    return [response for response in scored_responses
+            if questions_data.get(response.get("question_id"), {}).get("module") == module]
+
+def score_run(scored_responses, questions_data, rubrics_data, axis_mapping_data, index=None):
+    """
+    Scores one model's manual_scores dicts into coordinates, metrics and composite scores.
+
+    Coordinates come from `ideology_scorer.get_ideological_coordinates`, which reads
+    the current axis mapping format (scoring_type / choices_mapping / stance_scale).
+    With a BenchmarkIndex over the same tables (BENCHMARK_INDEX after
+    load_benchmark_data), the Module A responses are picked by the index's
+    module slice and each axis visits only its axis slice.
+
+    Returns:
+        dict: {"ideological_coordinates", "performance_metrics", "module_scores",
+        "personality_profile", "composite_scores"}
+    """
+    with METRICS.timer("score"):
+        scored_module_a = {
+            response.get("question_id"): record_to_scored_response({"manual_scores": response})
+            for response in module_responses(scored_responses, "A", questions_data, index)
+        }
+        coordinates = ideology_scorer.get_ideological_coordinates(scored_module_a, axis_mapping_data, questions_data, index)
+    METRICS.count("score.responses", len(scored_responses))
+
+    with METRICS.timer("aggregate"):
+        performance_metrics = calculate_performance_metrics(scored_responses, rubrics_data)
+        module_scores = calculate_module_scores(scored_responses, questions_data, rubrics_data)
+        return {
+            "ideological_coordinates": coordinates,
+            "performance_metrics": performance_metrics,
+            "module_scores": module_scores,
+            "personality_profile": calculate_personality_profile(scored_responses, questions_data, rubrics_data),
+            "composite_scores": calculate_composite_scores(module_scores, performance_metrics),
+        }
+
 if __name__ == '__main__':
     try:
         script_dir = os.path.dirname(__file__)
@@ -223,55 +536,66 @@ if __name__ == '__main__':
     except NameError:
         project_root = os.getcwd()
 
-    questions_file = os.path.join(project_root, "data", "questions.json")
-    rubrics_file = os.path.join(project_root, "data", "rubrics.json")
-    axis_map_file = os.path.join(project_root, "data", "axis_mapping.json")
+    data_dir = os.path.join(project_root, "data")
+    if not os.path.isdir(data_dir):
+        data_dir = "data"
 
-    if not os.path.exists(questions_file):
-        questions_file = "data/questions.json"
-    if not os.path.exists(rubrics_file):
-        rubrics_file = "data/rubrics.json"
-    if not os.path.exists(axis_map_file):
-        axis_map_file = "data/axis_mapping.json"
+    parser = argparse.ArgumentParser(description="Score manual_scores dicts into MIPP coordinates, metrics and composite scores.")
+    parser.add_argument("--data-dir", default=data_dir,
+                        help="Directory containing questions.json, rubrics.json and axis_mapping.json.")
+    parser.add_argument("--responses",
+                        help="JSON array of manual_scores dicts as returned by prompt_for_manual_scores "
+                             "(default: a built-in set of mock Module A responses).")
+    parser.add_argument("--output", help="Write the scores as JSON to this file instead of stdout.")
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args()
+    run = start_run(args)
 
-    print(f"Attempting to load questions from: {os.path.abspath(questions_file)}")
-    load_data_from_json(questions_file, "QUESTIONS_DATA")
-
-    print(f"Attempting to load rubrics from: {os.path.abspath(rubrics_file)}")
-    load_data_from_json(rubrics_file, "RUBRICS_DATA")
-
-    print(f"Attempting to load axis mapping from: {os.path.abspath(axis_map_file)}")
-    load_data_from_json(axis_map_file, "AXIS_MAPPING_DATA")
+    logger.info("Attempting to load benchmark data from: %s", os.path.abspath(args.data_dir))
+    load_benchmark_data(args.data_dir)
 
     if QUESTIONS_DATA and RUBRICS_DATA and AXIS_MAPPING_DATA:
-        print("\n--- Starting Ideological Coordinate Calculation Test ---")
-
-        mock_scored_module_a_responses = [
-            {"question_id": "A1.GR.1", "position_clarity": 3, "selected_choice": "a"},
-            {"question_id": "A1.GR.2", "position_clarity": 2, "ideological_stance_score": -1},
-            {"question_id": "A1.GR.3", "position_clarity": 3, "selected_choice": "b"},
-            {"question_id": "A1.GR.9", "position_clarity": 2, "ideological_stance_score": 1},
-            {"question_id": "A2.MR.1", "position_clarity": 3, "selected_choice": "c"},
-            {"question_id": "A2.MR.3", "position_clarity": 1, "ideological_stance_score": 1},
-            {"question_id": "A3.GIE.1", "position_clarity": 3, "ideological_stance_score": -2},
-            {"question_id": "A4.CET.1", "position_clarity": 3, "ideological_stance_score": 2},
-            {"question_id": "A4.CET.3", "position_clarity": 3, "ideological_stance_score": 1},
-            {"question_id": "A5.GIL.1", "position_clarity": 2, "ideological_stance_score": -1},
-            {"question_id": "A5.GIL.4", "position_clarity": 3, "ideological_stance_score": -1},
-        ]
-
-        for resp in mock_scored_module_a_responses:
-            question_data = QUESTIONS_DATA.get(resp["question_id"])
-            if question_data:
-                for rubric_id_def in question_data.get("scoring_rubric_ids", []):
-                    if rubric_id_def not in resp:
-                        resp[rubric_id_def] = 0
-
-        coordinates = get_ideological_coordinates(mock_scored_module_a_responses, AXIS_MAPPING_DATA, QUESTIONS_DATA)
-        print("\n--- Calculated Ideological Coordinates (Full Test) ---")
-        print(json.dumps(coordinates, indent=2))
-        print("--- Test Script Completed ---")
+        if args.responses:
+            try:
+                with METRICS.timer("load.responses"), open(args.responses, 'r', encoding='utf-8') as f:
+                    scored_responses = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error("Could not read scored responses from %s: %s", args.responses, e)
+                finish_run(args, run)
+                sys.exit(1)
+        else:
+            logger.info("--- Starting Ideological Coordinate Calculation Test ---")
+            scored_responses = [
+                {"question_id": "A1.GR.1", "position_clarity": 3, "selected_choice": "a"},
+                {"question_id": "A1.GR.2", "position_clarity": 2, "ideological_stance_score": -1},
+                {"question_id": "A1.GR.3", "position_clarity": 3, "selected_choice": "b"},
+                {"question_id": "A1.GR.9", "position_clarity": 2, "ideological_stance_score": 1},
+                {"question_id": "A2.MR.1", "position_clarity": 3, "selected_choice": "c"},
+                {"question_id": "A2.MR.3", "position_clarity": 1, "ideological_stance_score": 1},
+                {"question_id": "A3.GIE.1", "position_clarity": 3, "ideological_stance_score": -2},
+                {"question_id": "A4.CET.1", "position_clarity": 3, "ideological_stance_score": 2},
+                {"question_id": "A4.CET.3", "position_clarity": 3, "ideological_stance_score": 1},
+                {"question_id": "A5.GIL.1", "position_clarity": 2, "ideological_stance_score": -1},
+                {"question_id": "A5.GIL.4", "position_clarity": 3, "ideological_stance_score": -1},
+            ]
+
+            for resp in scored_responses:
+                question_data = QUESTIONS_DATA.get(resp["question_id"])
+                if question_data:
+                    for rubric_id_def in question_data.get("scoring_rubric_ids", []):
+                        if rubric_id_def not in resp:
+                            resp[rubric_id_def] = 0
+
+        scores = score_run(scored_responses, QUESTIONS_DATA, RUBRICS_DATA, AXIS_MAPPING_DATA, BENCHMARK_INDEX)
+        with METRICS.timer("write"):
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    json.dump(scores, f, indent=2)
+                logger.info("Wrote scores to %s", args.output)
+            else:
+                print(json.dumps(scores, indent=2))
+        finish_run(args, run)
     else:
-        print("\nCould not load all necessary data. Aborting test.")
-
-```
+        logger.error("Could not load all necessary data. Aborting test.")
+        finish_run(args, run)
+        sys.exit(1)
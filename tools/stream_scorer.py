@@ -0,0 +1,201 @@
+"""
+Streaming scorer for JSONL model response logs.
+
+Response logs follow `model_responses_template_schema.json`, one record per
+line, and can reach many GB across sessions. Instead of loading a whole file
+the way `scorer.load_data_from_json` does, this module reads records one at a
+time, groups consecutive records by `session_id`, keeps per-session running
+axis and rubric totals, and emits one profile per session as soon as that
+session's records end. Memory use is bounded by the size of one session.
+
+Rubric scores, `selected_choice` and `ideological_stance_score` are read from
+`manual_scores` (where `scorer.prompt_for_manual_scores` puts them), falling
+back to top-level record fields. Rubric scores of -1 (the non-interactive
+default) are counted as unscored and left out of the means.
+
+Usage:
+    python tools/stream_scorer.py responses.jsonl [--axis-mapping data/axis_mapping.json] [--output profiles.jsonl]
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+
+from ideology_scorer import AXES, load_axis_mapping, normalize_axis_score, score_mapped_response
+
+# manual_scores keys that are not rubric ids.
+NON_RUBRIC_SCORE_KEYS = ("question_id", "selected_choice", "ideological_stance_score")
+
+# Rubric score written by prompt_for_manual_scores when no rater input is available.
+UNSCORED_RUBRIC_SCORE = -1
+
+
+def iter_jsonl_records(filepath):
+    """
+    Yields one decoded record per non-empty line of a JSONL file.
+
+    Lines that fail to decode are reported and skipped.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Warning: Could not decode JSON on line {line_number} of {filepath}. Skipping.", file=sys.stderr)
+
+
+def record_to_scored_response(record):
+    """
+    Converts a response log record into the get_ideological_coordinates input format.
+
+    Returns:
+        dict: {"rubrics": {...}, "selected_choice": ..., "ideological_stance_score": ...}
+    """
+    manual_scores = record.get("manual_scores") or {}
+    rubric_scores = {
+        rubric_id: score for rubric_id, score in manual_scores.items()
+        if rubric_id not in NON_RUBRIC_SCORE_KEYS
+    }
+    return {
+        "rubrics": rubric_scores,
+        "selected_choice": manual_scores.get("selected_choice", record.get("selected_choice")),
+        "ideological_stance_score": manual_scores.get("ideological_stance_score", record.get("ideological_stance_score")),
+    }
+
+
+class SessionTotals:
+    """
+    Running axis and rubric totals for one session.
+
+    A later record for a question already seen in the session replaces the
+    earlier one, matching a {question_id: scored_response} dict built from
+    the same records.
+    """
+
+    def __init__(self, session_id, axis_mapping_data):
+        self.session_id = session_id
+        self.axis_mapping_data = axis_mapping_data
+        self.axis_raw = {axis: 0.0 for axis in AXES}
+        self.axis_max_abs = {axis: 0.0 for axis in AXES}
+        self.rubric_sums = {}
+        self.rubric_counts = {}
+        self.rubric_unscored = {}
+        self.contributions = {}
+
+    def add_record(self, record):
+        question_id = record.get("question_id")
+        if question_id in self.contributions:
+            self._apply(*self.contributions[question_id], sign=-1)
+
+        scored_response = record_to_scored_response(record)
+        axis_contribution = None
+        mapping_details = self.axis_mapping_data.get(question_id)
+        if mapping_details and mapping_details.get("axis") in AXES:
+            raw_points, max_abs_points = score_mapped_response(mapping_details, scored_response)
+            axis_contribution = (mapping_details["axis"], raw_points, max_abs_points)
+
+        contribution = (axis_contribution, scored_response["rubrics"])
+        self.contributions[question_id] = contribution
+        self._apply(*contribution, sign=1)
+
+    def _apply(self, axis_contribution, rubric_scores, sign):
+        if axis_contribution:
+            axis, raw_points, max_abs_points = axis_contribution
+            self.axis_raw[axis] += sign * raw_points
+            self.axis_max_abs[axis] += sign * max_abs_points
+
+        for rubric_id, score in rubric_scores.items():
+            if score is None or score == UNSCORED_RUBRIC_SCORE:
+                self.rubric_unscored[rubric_id] = self.rubric_unscored.get(rubric_id, 0) + sign
+                continue
+            self.rubric_sums[rubric_id] = self.rubric_sums.get(rubric_id, 0) + sign * score
+            self.rubric_counts[rubric_id] = self.rubric_counts.get(rubric_id, 0) + sign
+
+    def profile(self):
+        """Returns the session profile for the records seen so far."""
+        coordinates = {
+            f"{axis.lower()}_axis": normalize_axis_score(self.axis_raw[axis], self.axis_max_abs[axis])
+            for axis in AXES
+        }
+
+        rubric_scores = {}
+        for rubric_id in sorted(set(self.rubric_counts) | set(self.rubric_unscored)):
+            count = self.rubric_counts.get(rubric_id, 0)
+            rubric_scores[rubric_id] = {
+                "mean": round(self.rubric_sums[rubric_id] / count, 4) if count else None,
+                "scored": count,
+                "unscored": self.rubric_unscored.get(rubric_id, 0),
+            }
+
+        return {
+            "session_id": self.session_id,
+            "response_count": len(self.contributions),
+            "ideological_coordinates": coordinates,
+            "rubric_scores": rubric_scores,
+        }
+
+
+def stream_session_profiles(records, axis_mapping_data):
+    """
+    Yields one profile per session from an iterable of response records.
+
+    Records of a session are expected to be contiguous, as they are when a
+    collection run writes one session at a time. A session whose records
+    reappear later is reported and emitted again as a separate profile.
+    """
+    emitted_session_ids = set()
+    for session_id, session_records in itertools.groupby(records, key=lambda r: r.get("session_id")):
+        if session_id in emitted_session_ids:
+            print(f"Warning: Records for session '{session_id}' are not contiguous; emitting a separate profile.",
+                  file=sys.stderr)
+
+        totals = SessionTotals(session_id, axis_mapping_data)
+        for record in session_records:
+            totals.add_record(record)
+
+        emitted_session_ids.add(session_id)
+        yield totals.profile()
+
+
+def score_jsonl_file(filepath, axis_mapping_data, output_file):
+    """
+    Streams profiles for every session in a JSONL response log to output_file.
+
+    Returns:
+        int: The number of profiles written.
+    """
+    written = 0
+    for profile in stream_session_profiles(iter_jsonl_records(filepath), axis_mapping_data):
+        output_file.write(json.dumps(profile) + "\n")
+        written += 1
+    return written
+
+
+if __name__ == '__main__':
+    try:
+        project_root = os.path.dirname(os.path.dirname(__file__))
+    except NameError:
+        project_root = os.getcwd()
+
+    parser = argparse.ArgumentParser(description="Stream per-session MIPP profiles from a JSONL response log.")
+    parser.add_argument("responses", help="JSONL file of response records (model_responses_template_schema.json items).")
+    parser.add_argument("--axis-mapping", default=os.path.join(project_root, "data", "axis_mapping.json"),
+                        help="Path to axis_mapping.json.")
+    parser.add_argument("--output", help="Write profiles as JSONL to this file instead of stdout.")
+    args = parser.parse_args()
+
+    axis_map = load_axis_mapping(args.axis_mapping)
+    if not axis_map:
+        print("Could not load axis mapping. Aborting.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            count = score_jsonl_file(args.responses, axis_map, out)
+        print(f"Wrote {count} session profiles to {args.output}", file=sys.stderr)
+    else:
+        score_jsonl_file(args.responses, axis_map, sys.stdout)